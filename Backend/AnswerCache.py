@@ -0,0 +1,290 @@
+"""Cache of ChatBot answers for general, time-insensitive questions.
+
+"What is python programming language?" gets the same answer every time,
+yet each ask costs a full Groq round trip. Answers to questions the
+decision model routes as ``general`` are cached here and reused when the
+same question comes again:
+
+- exact hits on the normalised question (case, trailing punctuation,
+  "please", "jarvis", "what's" -> "what is" ...); numbers, operators and
+  other symbols are kept;
+- near-duplicate hits when the question word matches and the content words
+  are the same *in the same order*, give or take one extra word in
+  questions of four or more content words (found through a small inverted
+  index). Word order carries meaning: "convert fahrenheit to celsius" is
+  not "convert celsius to fahrenheit";
+- questions about time-dependent things (today, latest, weather, prices,
+  "current president" ...), about the user ("my name"), follow-ups that
+  lean on the conversation ("who was his wife?", "explain that"),
+  arithmetic and comparisons are never cached.
+
+Entries expire after ``ttl`` seconds and the least recently used are
+evicted beyond ``max_entries``. :meth:`AnswerCache.stats` reports the hit
+rate. The cache is stored in ``Data/AnswerCache.json``.
+
+    python -m Backend.AnswerCache --stats
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+CACHE_PATH = os.path.join("Data", "AnswerCache.json")
+MAX_ENTRIES = 500
+TTL_SECONDS = 7 * 24 * 3600
+NEAR_MIN_WORDS = 4  # shorter questions must match word for word
+
+_CONTRACTIONS = {"what's": "what is", "who's": "who is", "where's": "where is", "how's": "how is",
+                 "it's": "it is", "whats": "what is", "whos": "who is"}
+_FILLER = re.compile(
+    r"\b(?:please|jarvis|hey|ok|okay|can you|could you|would you|tell me|do you know|i want to know|"
+    r"explain to me|let me know)\b"
+)
+_QUESTION_WORDS = ("what", "who", "whom", "whose", "where", "when", "why", "which", "how")
+_STOPWORDS = frozenset(
+    "a an the is are was were be been of to in on for and or as at by with about from it its this that "
+    "these those do does did can could would should will shall me us".split()
+)
+# Anything whose answer can change with time (or depends on the user) is not cached.
+_TIME_SENSITIVE = re.compile(
+    r"\b(?:now|today|tonight|tomorrow|yesterday|current(?:ly)?|latest|recent(?:ly)?|news|this (?:week|month|year)|"
+    r"last (?:week|month|year)|next (?:week|month|year)|time|date|day|weather|temperature|forecast|"
+    r"price|prices|rate|rates|stock|stocks|score|scores|president|prime minister|ceo|"
+    r"trending|live|update|updates|20\d\d|19\d\d)\b"
+)
+_PERSONAL = re.compile(r"\b(?:i|me|my|mine|myself|i'm|i am|our|we)\b")
+# Follow-ups whose meaning comes from the conversation, not from the question.
+_CONTEXTUAL = re.compile(
+    r"\b(?:he|she|him|his|her|hers|it|its|they|them|their|theirs|that|this|these|those|there|then|"
+    r"previous|above|earlier|same|again|more|else|elaborate|continue)\b"
+)
+_ARITHMETIC = re.compile(
+    r"\d\s*[-+*/x×÷^%=<>]\s*\d|[+*/×÷^=<>]|\b(?:plus|minus|times|divided|multiplied|squared|cubed|"
+    r"square root|percent of|modulo)\b"
+)
+_COMPARISON = re.compile(r"\b(?:than|vs|versus|compare|compared|comparison|difference|better|worse)\b")
+_NEGATIONS = frozenset({"not", "no", "never", "without"})
+
+# Words (with apostrophes) and numbers, or any single other non-space symbol.
+_TOKEN = re.compile(r"[a-z0-9']+|[^\sa-z0-9']")
+
+
+def normalize(question: str) -> str:
+    text = (question or "").lower().replace("’", "'")
+    text = re.sub(r"[\s\.\?!,;:]+$", "", text)  # trailing punctuation only
+    tokens = [_CONTRACTIONS.get(t, t) for t in _TOKEN.findall(text) if t not in ",;:"]
+    text = _FILLER.sub(" ", " ".join(tokens))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def is_cacheable(question: str) -> bool:
+    text = normalize(question)
+    return bool(text) and not (
+        _TIME_SENSITIVE.search(text)
+        or _PERSONAL.search(text)
+        or _CONTEXTUAL.search(text)
+        or _ARITHMETIC.search(text)
+        or _COMPARISON.search(text)
+    )
+
+
+def _signature(normalized: str) -> Tuple[str, Tuple[str, ...]]:
+    """(question word, content words in order) used for near-duplicate matching."""
+    words = normalized.split()
+    qword = next((w for w in words if w in _QUESTION_WORDS), "")
+    content = tuple(
+        w[:-1] if len(w) > 3 and w.endswith("s") else w  # crude plural folding
+        for w in words
+        if w not in _STOPWORDS and w not in _QUESTION_WORDS
+    )
+    return qword, content
+
+
+def _near_match(a: Tuple[str, ...], b: Tuple[str, ...]) -> bool:
+    """Same words in the same order, or (for longer questions) one extra word
+    in either, as long as it isn't a negation."""
+    if a == b:
+        return True
+    if min(len(a), len(b)) < NEAR_MIN_WORDS or abs(len(a) - len(b)) != 1:
+        return False
+    short, long = (a, b) if len(a) < len(b) else (b, a)
+    for i, word in enumerate(long):
+        if long[:i] + long[i + 1:] == short:
+            return word not in _NEGATIONS
+    return False
+
+
+class AnswerCache:
+    """Size-bounded LRU of answers with TTL and near-duplicate lookup."""
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_entries: int = MAX_ENTRIES,
+                 ttl: float = TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # key -> (answer, created)
+        self._index: Dict[str, Set[str]] = {}  # content word -> keys
+        self.hits = self.near_hits = self.misses = self.skipped = 0
+        self._load()
+
+    # -- persistence ------------------------------------------------------
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(rows, list):
+            return
+        now = time.time()
+        for row in rows:
+            # Skip anything this version didn't write: [key, answer, created].
+            if not (isinstance(row, list) and len(row) == 3):
+                continue
+            key, answer, created = row
+            if not (isinstance(key, str) and isinstance(answer, str)
+                    and isinstance(created, (int, float)) and not isinstance(created, bool)):
+                continue
+            if now - created < self.ttl:
+                self._insert(key, answer, created)
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        rows = [[key, answer, created] for key, (answer, created) in self._entries.items()]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    # -- internals --------------------------------------------------------
+
+    def _insert(self, key: str, answer: str, created: float) -> None:
+        self._entries[key] = (answer, created)
+        self._entries.move_to_end(key)
+        for word in _signature(key)[1]:
+            self._index.setdefault(word, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        for word in _signature(key)[1]:
+            keys = self._index.get(word)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._index[word]
+
+    def _fresh(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[1] >= self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _near(self, key: str, now: float) -> Optional[str]:
+        qword, content = _signature(key)
+        if not content:
+            return None
+        candidates: Set[str] = set()
+        for word in content:
+            candidates |= self._index.get(word, set())
+        for other in candidates:
+            other_qword, other_content = _signature(other)
+            if other_qword == qword and _near_match(content, other_content):
+                answer = self._fresh(other, now)
+                if answer is not None:
+                    return answer
+        return None
+
+    # -- public API -------------------------------------------------------
+
+    def get(self, question: str, count: bool = True) -> Optional[str]:
+        """Cached answer for `question`, or None (also for uncacheable questions).
+
+        `count=False` leaves the hit/miss counters alone (a look ahead, not a use).
+        """
+        if not is_cacheable(question):
+            with self._lock:
+                self.skipped += count
+            return None
+        key = normalize(question)
+        now = time.time()
+        with self._lock:
+            answer = self._fresh(key, now)
+            if answer is not None:
+                self.hits += count
+                return answer
+            answer = self._near(key, now)
+            if answer is not None:
+                self.near_hits += count
+                return answer
+            self.misses += count
+            return None
+
+    def put(self, question: str, answer: str) -> bool:
+        """Cache `answer` if the question is cacheable; returns whether it was stored."""
+        if not answer or not is_cacheable(question):
+            return False
+        with self._lock:
+            self._insert(normalize(question), answer, time.time())
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Answer cache not saved: {e!r}")
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            self._save()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AnswerCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache()
+        return _cache
+
+
+if __name__ == "__main__":
+    cache = get_cache()
+    if "--clear" in sys.argv:
+        cache.clear()
+    for question in [a for a in sys.argv[1:] if not a.startswith("--")]:
+        print(f"{question!r}: cacheable={is_cacheable(question)} cached={cache.get(question) is not None}")
+    print(cache.stats())
@@ -0,0 +1,472 @@
+"""Cached index of installed applications with fuzzy name matching.
+
+AppOpener enumerates and fuzzy-scores every installed app on each command.
+Instead we scan the platform's launchers once:
+
+- Linux: ``.desktop`` files in the XDG application dirs (incl. Flatpak/Snap)
+- Windows: Start Menu shortcuts (``.lnk``)
+- macOS: ``*.app`` bundles
+- everywhere: currently running processes (so "close <x>" can find them)
+
+and resolve spoken names against it with an exact alias table first, then a
+trigram index refined by edit distance. The source directories are re-checked
+(by mtime) at most every ``REFRESH_INTERVAL`` seconds, so newly installed apps
+show up without a restart.
+
+    >>> index = get_index()
+    >>> index.resolve("vs code")
+    AppEntry(name='Visual Studio Code', command='code', ...)
+
+Benchmark over a synthetic catalog:
+    python -m Backend.AppIndex --bench
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import random
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import psutil
+except Exception:  # pragma: no cover
+    psutil = None  # type: ignore
+
+REFRESH_INTERVAL = 5.0   # seconds between launcher-dir mtime checks
+MIN_SCORE = 0.6          # below this a fuzzy match is treated as "not found"
+# With the scoring in AppIndex.search, an alias sharing < 40% of the query's
+# trigrams can never reach MIN_SCORE, so such aliases are never considered.
+MIN_COVERAGE = 0.4
+_CANDIDATES = 12         # trigram candidates refined with edit distance
+LAUNCHABLE = ("desktop", "lnk", "app")  # sources that can be opened; processes can only be closed
+
+# Words people add when speaking that are not part of an app's name.
+_FILLER = {"the", "app", "application", "program", "software", "please", "my"}
+
+
+SourceFilter = Union[None, str, Iterable[str]]
+
+
+@dataclass(frozen=True)
+class AppEntry:
+    name: str
+    command: str          # Exec line, shortcut path, .app path or process exe
+    source: str           # "desktop" | "lnk" | "app" | "process"
+    aliases: Tuple[str, ...] = field(default=(), compare=False)
+
+
+# -----------------------------
+# Text helpers
+# -----------------------------
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).split() if w not in _FILLER]
+
+
+def _compact(text: str) -> str:
+    return "".join(_words(text))
+
+
+def _trigrams(compact: str) -> List[str]:
+    padded = f"^{compact}$"
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def _levenshtein_ratio(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return 1.0 - prev[-1] / max(len(a), len(b))
+
+
+def aliases_for(name: str, extra: Iterable[str] = ()) -> Tuple[str, ...]:
+    """Compact spellings an app may be called by.
+
+    "Visual Studio Code" -> visualstudiocode, vsc, vscode (initials + last word).
+    """
+    words = _words(name)
+    out = [_compact(name)]
+    if len(words) > 1:
+        out.append("".join(w[0] for w in words))
+        out.append("".join(w[0] for w in words[:-1]) + words[-1])
+    out += [_compact(x) for x in extra]
+    seen = []
+    for a in out:
+        if a and a not in seen:
+            seen.append(a)
+    return tuple(seen)
+
+
+# -----------------------------
+# Launcher sources
+# -----------------------------
+
+def _desktop_dirs() -> List[str]:
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    dirs = [os.path.join(d, "applications") for d in [data_home] + data_dirs]
+    dirs += [
+        "/var/lib/flatpak/exports/share/applications",
+        os.path.expanduser("~/.local/share/flatpak/exports/share/applications"),
+        "/var/lib/snapd/desktop/applications",
+    ]
+    return dirs
+
+
+def _windows_dirs() -> List[str]:
+    return [
+        os.path.join(os.environ.get("ProgramData", r"C:\ProgramData"), r"Microsoft\Windows\Start Menu\Programs"),
+        os.path.join(os.environ.get("APPDATA", ""), r"Microsoft\Windows\Start Menu\Programs"),
+    ]
+
+
+def _mac_dirs() -> List[str]:
+    return ["/Applications", "/System/Applications", os.path.expanduser("~/Applications")]
+
+
+def source_dirs() -> List[str]:
+    if sys.platform.startswith("win"):
+        dirs = _windows_dirs()
+    elif sys.platform == "darwin":
+        dirs = _mac_dirs()
+    else:
+        dirs = _desktop_dirs()
+    return [d for d in dirs if d and os.path.isdir(d)]
+
+
+def parse_desktop_file(path: str) -> Optional[AppEntry]:
+    """Read Name/Exec/Keywords from the [Desktop Entry] group of a .desktop file."""
+    fields: Dict[str, str] = {}
+    in_entry = False
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    in_entry = line == "[Desktop Entry]"
+                    continue
+                if in_entry and "=" in line:
+                    key, _, value = line.partition("=")
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if fields.get("Type", "Application") != "Application":
+        return None
+    if fields.get("NoDisplay", "").lower() == "true" or fields.get("Hidden", "").lower() == "true":
+        return None
+    name, command = fields.get("Name"), fields.get("Exec")
+    if not name or not command:
+        return None
+
+    command = re.sub(r"\s*%[a-zA-Z]", "", command).strip()  # drop %U, %f, ... field codes
+    extra = [fields.get("GenericName", ""), os.path.splitext(os.path.basename(path))[0]]
+    extra += [k for k in fields.get("Keywords", "").split(";") if k]
+    try:
+        extra.append(os.path.basename(shlex.split(command)[0]))
+    except (ValueError, IndexError):
+        pass
+    return AppEntry(name, command, "desktop", aliases_for(name, extra))
+
+
+def _scan_dir(folder: str) -> List[AppEntry]:
+    entries = []
+    for root, dirs, files in os.walk(folder):
+        if root.endswith(".app"):
+            dirs[:] = []  # don't descend into bundles
+        for d in list(dirs):
+            if d.endswith(".app"):
+                name = d[:-4]
+                entries.append(AppEntry(name, os.path.join(root, d), "app", aliases_for(name)))
+        for fname in files:
+            path = os.path.join(root, fname)
+            if fname.endswith(".desktop"):
+                entry = parse_desktop_file(path)
+                if entry:
+                    entries.append(entry)
+            elif fname.lower().endswith(".lnk"):
+                name = fname[:-4]
+                entries.append(AppEntry(name, path, "lnk", aliases_for(name)))
+    return entries
+
+
+def _running_processes() -> List[AppEntry]:
+    entries: Dict[str, AppEntry] = {}
+    if psutil is None:
+        return []
+    for proc in psutil.process_iter(["name", "exe"]):
+        name = (proc.info.get("name") or "").removesuffix(".exe")
+        if name and name not in entries:
+            entries[name] = AppEntry(name, proc.info.get("exe") or name, "process", aliases_for(name))
+    return list(entries.values())
+
+
+# -----------------------------
+# Index
+# -----------------------------
+
+class AppIndex:
+    """Alias table + trigram index over a list of :class:`AppEntry`."""
+
+    def __init__(self, entries: Iterable[AppEntry] = ()):
+        self.entries: List[AppEntry] = []
+        self._exact: Dict[str, int] = {}
+        self._aliases: List[Tuple[str, int]] = []
+        self._grams: Dict[str, List[int]] = defaultdict(list)
+        self._alias_grams: List[frozenset] = []
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: AppEntry) -> None:
+        idx = len(self.entries)
+        self.entries.append(entry)
+        for alias in entry.aliases or aliases_for(entry.name):
+            # Launchers beat processes; otherwise the first (shortest) name wins.
+            current = self._exact.get(alias)
+            if current is None or (self.entries[current].source == "process" and entry.source != "process"):
+                self._exact[alias] = idx
+            aid = len(self._aliases)
+            self._aliases.append((alias, idx))
+            grams = _trigrams(alias)
+            self._alias_grams.append(frozenset(grams))
+            for g in grams:
+                self._grams[g].append(aid)
+
+    def resolve(self, query: str, source: SourceFilter = None) -> Optional[AppEntry]:
+        """Best entry for a spoken/typed app name, or None."""
+        match = self.search(query, limit=1, source=source)
+        return match[0][0] if match else None
+
+    def search(self, query: str, limit: int = 5, source: SourceFilter = None) -> List[Tuple[AppEntry, float]]:
+        """Ranked (entry, score); `source` is one source or several (e.g. LAUNCHABLE)."""
+        q = _compact(query)
+        if not q:
+            return []
+        sources = None if source is None else {source} if isinstance(source, str) else set(source)
+
+        exact = self._exact.get(q)
+        if exact is not None and (sources is None or self.entries[exact].source in sources):
+            return [(self.entries[exact], 1.0)]
+
+        # Prefix filtering: an alias sharing >= `need` of the n query trigrams
+        # must contain one of the (n - need + 1) rarest ones, so only those
+        # posting lists are scanned; the frequent trigrams are then checked
+        # per candidate instead of walking their (long) posting lists.
+        q_grams = sorted(_trigrams(q), key=lambda g: len(self._grams.get(g, ())))
+        n = len(q_grams)
+        need = max(1, math.ceil(MIN_COVERAGE * n))
+        counts: Dict[int, int] = defaultdict(int)
+        for g in q_grams[: n - need + 1]:
+            for aid in self._grams.get(g, ()):
+                counts[aid] += 1
+        frequent = q_grams[n - need + 1:]
+        if frequent:
+            for aid in counts:
+                grams = self._alias_grams[aid]
+                counts[aid] += sum(1 for g in frequent if g in grams)
+
+        top = heapq.nlargest(_CANDIDATES * 2, ((c, aid) for aid, c in counts.items() if c >= need))
+        best: Dict[int, float] = {}
+        for common, aid in top:
+            alias, idx = self._aliases[aid]
+            if sources is not None and self.entries[idx].source not in sources:
+                continue
+            coverage = common / n
+            dice = 2 * common / (n + len(self._alias_grams[aid]))
+            score = 0.5 * coverage + 0.3 * dice + 0.2 * _levenshtein_ratio(q, alias)
+            if score > best.get(idx, 0.0):
+                best[idx] = score
+
+        ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [(self.entries[i], s) for i, s in ranked if s >= MIN_SCORE]
+
+
+def build_index(include_processes: bool = True) -> AppIndex:
+    entries: List[AppEntry] = []
+    for folder in source_dirs():
+        entries += _scan_dir(folder)
+    if include_processes:
+        entries += _running_processes()
+    return AppIndex(entries)
+
+
+# -----------------------------
+# Process-wide cached index
+# -----------------------------
+
+_index: Optional[AppIndex] = None
+_stamp: Dict[str, float] = {}
+_checked = 0.0
+_lock = threading.Lock()
+
+
+def _dir_stamp() -> Dict[str, float]:
+    stamp = {}
+    for d in source_dirs():
+        try:
+            stamp[d] = os.stat(d).st_mtime
+        except OSError:
+            pass
+    return stamp
+
+
+def get_index() -> AppIndex:
+    """Cached index; rebuilt when a launcher directory changes."""
+    global _index, _stamp, _checked
+    now = time.monotonic()
+    with _lock:
+        if _index is not None and now - _checked < REFRESH_INTERVAL:
+            return _index
+        _checked = now
+        stamp = _dir_stamp()
+        if _index is None or stamp != _stamp:
+            _index, _stamp = build_index(), stamp
+        return _index
+
+
+def launch(entry: AppEntry) -> None:
+    if entry.source == "lnk":
+        os.startfile(entry.command)  # type: ignore[attr-defined]
+    elif entry.source == "app":
+        subprocess.Popen(["open", entry.command])
+    else:
+        subprocess.Popen(shlex.split(entry.command), start_new_session=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _protected_pids() -> Set[int]:
+    """This process, the processes that started it and the ones it started."""
+    me = psutil.Process()
+    pids = {me.pid}
+    for related in (me.parents, lambda: me.children(recursive=True)):
+        try:
+            pids.update(p.pid for p in related())
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return pids
+
+
+def _launcher_target(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """(executable name, .app bundle path) of the indexed launcher for `name`."""
+    for entry, _score in get_index().search(name, limit=1, source=LAUNCHABLE):
+        if entry.source == "desktop":
+            try:
+                argv = shlex.split(entry.command)
+            except ValueError:
+                return None, None
+            while argv and (argv[0] == "env" or "=" in argv[0]):
+                argv = argv[1:]
+            return (_compact(os.path.basename(argv[0])) or None) if argv else None, None
+        if entry.source == "app":
+            return None, entry.command.rstrip("/") + "/"
+        if entry.source == "lnk":
+            return _compact(entry.name), None
+    return None, None
+
+
+def terminate(name: str) -> bool:
+    """Terminate running processes called `name`. True if any.
+
+    Only processes whose name is exactly `name`, or whose executable is the
+    one an indexed launcher for `name` starts, are stopped; the assistant,
+    its parents and its children never are ("close python").
+    """
+    if psutil is None:
+        return False
+    wanted = _compact(name)
+    if not wanted:
+        return False
+    target, bundle = _launcher_target(name)
+    protected = _protected_pids()
+    killed = False
+    for proc in psutil.process_iter(["name", "exe"]):
+        if proc.pid in protected:
+            continue
+        proc_name = _compact((proc.info.get("name") or "").removesuffix(".exe"))
+        exe = proc.info.get("exe") or ""
+        exe_name = _compact(os.path.basename(exe).removesuffix(".exe"))
+        if not (proc_name == wanted or (target and target in (proc_name, exe_name))
+                or (bundle and exe.startswith(bundle))):
+            continue
+        try:
+            proc.terminate()
+            killed = True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return killed
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+_SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"] + ["sh", "ch", "th", "er", "on"]
+
+
+def _synthetic_catalog(n: int, seed: int = 7) -> List[AppEntry]:
+    rng = random.Random(seed)
+    entries = []
+    for i in range(n):
+        words = ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        name = " ".join(w.capitalize() for w in words) + f" {i}"
+        entries.append(AppEntry(name, words[0], "desktop", aliases_for(name)))
+    entries.append(AppEntry("Visual Studio Code", "code", "desktop", aliases_for("Visual Studio Code", ["code"])))
+    return entries
+
+
+def benchmark(sizes=(1_000, 10_000, 50_000), queries: int = 2_000) -> None:
+    from time import perf_counter
+
+    print(f"{'apps':>7} | {'build ms':>8} | {'exact us':>8} | {'fuzzy us':>8} | {'miss us':>8}")
+    for n in sizes:
+        catalog = _synthetic_catalog(n)
+        start = perf_counter()
+        index = AppIndex(catalog)
+        build_ms = (perf_counter() - start) * 1000
+
+        rng = random.Random(1)
+        sample = [rng.choice(catalog).name for _ in range(queries)]
+        typos = [s[:2] + s[3:] for s in sample]  # drop one character
+
+        def _time(qs) -> float:
+            t = perf_counter()
+            for q in qs:
+                index.resolve(q)
+            return (perf_counter() - t) / len(qs) * 1e6
+
+        exact_us = _time(sample + ["vs code"] * 10)
+        fuzzy_us = _time(typos[: queries // 4])
+        miss_us = _time(["qqqqqq zzzz"] * 100)
+        print(f"{n:>7} | {build_ms:>8.1f} | {exact_us:>8.2f} | {fuzzy_us:>8.2f} | {miss_us:>8.2f}")
+
+    assert AppIndex(_synthetic_catalog(100)).resolve("vs code").name == "Visual Studio Code"
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        idx = get_index()
+        print(f"{len(idx)} apps indexed from: {', '.join(source_dirs()) or '(no launcher dirs)'}")
+        for q in sys.argv[1:]:
+            print(q, "->", idx.search(q))
@@ -1,23 +1,22 @@
 # Import required libraries
-from AppOpener import close, open as appopen #Import functions to open and close apps. 
+# Heavy / platform-specific libraries (AppOpener, groq, keyboard, pywhatkit) are
+# imported inside the functions that need them, so importing this module stays cheap.
 from webbrowser import open as webopen # Import web browser functionality. 
-# from pywhatkit import search, playonyt #Import functions for Google search and YouTube playback. 
-from dotenv import dotenv_values #Import doteny to manage environment variables. 
-from bs4 import BeautifulSoup # Import BeautifulSoup for parsing HTML content. 
 from rich import print #Import rich for styled console output. 
-from groq import Groq #Import Groq for AI chat functionalities.
 import webbrowser # Import webbrowser for opening URLS.
 import subprocess # Import subprocess for interacting with the system. 
-import requests # Import requests for making HTTP requests.
-import keyboard #Import keyboard for keyboard-related actions. 
 import asyncio # Import asyncio for asynchronous programming. 
-import os
-import urllib # Import os for operating system functionalities.
-import smtplib
-from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor # Bounded pool for automation commands.
+from functools import partial
+import os # Import os for operating system functionalities.
+import re
+import sys
+from Backend.EmailSender import SMTPSender, NOT_CONFIGURED
+from Backend.EmailSpool import enqueue
+from Backend.Config import get_env
 
 #Load environment variables from the .env file.
-env_vars= dotenv_values(".env")
+env_vars= get_env()
 Username = env_vars.get("Username") or env_vars.get("username") or "User"
 GroqAPIKey = env_vars.get("GroqAPIKey") # Retrieve the Groq API key.
 
@@ -31,8 +30,20 @@ classes = ["zCubwf", "hgKELc", "LTKOO SY7ric", "ZOLcW", "gsrt vk_bk FzvWSb YwPhn
 # Define a user-agent for making web requests.
 useragent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.75 Safari/537.36"
 
-# Initialize the Groq client with the API key.
-client = Groq(api_key=GroqAPIKey)
+# A result message meaning the command did not happen (shown like any other
+# message, but counted as a failure by Automation()).
+class Failure(str):
+    pass
+
+# The Groq client is created on first use (see get_client).
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        from groq import Groq #Import Groq for AI chat functionalities.
+        client = Groq(api_key=GroqAPIKey)
+    return client
 
 # Predefined professiobal responses for user interactions.
 professional_responses = [
@@ -40,8 +51,10 @@ professional_responses = [
     "I'm at your service for any additional questions or support you may need-don't hesitate to ask.",
 ]
 
-#List to store chatbot messages.
-messages = []
+# Content jobs keep no shared history: each one sends only the system message
+# plus its own prompt (capped), so concurrent jobs can't race or grow the context.
+CONTENT_PROMPT_MAX_CHARS = 2000
+CONTENT_PROGRESS_EVERY = 400 # Report progress roughly every N characters written.
 
 # System message to provide context to the chatbot.
 SystemChatBot = [{"role": "system", "content": f"Hello, I am {Username}, You're a content writer. You have to write content like letters, codes, applications, essays, poems etc."}]
@@ -60,21 +73,27 @@ def GoogleSearch(Topic):
         webbrowser.open(url)
         return True
 
-# Function to generate content using AI and save it to a file.
-def Content (Topic):
+# Function to generate content using AI and stream it into a file.
+def Content (Topic, on_progress=None):
+    """
+    Write content about Topic with the AI and stream it straight into
+    Data/<topic>.txt as tokens arrive. `on_progress(topic, chars_written)`
+    is called every CONTENT_PROGRESS_EVERY characters and once at the end.
+    """
     
     #Nested function to open a file in Notepad.
     def OpenNotepad(File):
         default_text_editor = 'notepad.exe' # Default text editor.
         subprocess.Popen([default_text_editor, File]) # Open the file in Notepad.
 
-    # Nested function to generate content using the AI chatbot.
-    def ContentWriterAI(prompt):
-        messages.append({"role": "user", "content": f" {prompt}"}) # Add the user's prompt to messages. 
+    # Nested function to stream AI content into an open file.
+    def ContentWriterAI(prompt, file):
+        # This job's own context: system instructions + this prompt only.
+        job_messages = SystemChatBot + [{"role": "user", "content": f" {prompt[:CONTENT_PROMPT_MAX_CHARS]}"}]
     
-        completion = client.chat.completions.create(
+        completion = get_client().chat.completions.create(
             model="qwen/qwen3-32b", # Specify the AI model.
-            messages=SystemChatBot + messages, # Include system instructions and chat history.
+            messages=job_messages, # Include system instructions and the prompt.
             max_tokens=512, # Limit the maximum tokens in the response.
             temperature=0.7, # Adjust response randomness.
             top_p=1, # Use nucleus sampling for response diversity. 
@@ -82,24 +101,36 @@ def Content (Topic):
             stop=None # Allow the model to determine stopping conditions.
         )
         
-        Answer ="" #Initialize an empty string for the response.
+        written = 0 # Characters written so far.
+        reported = 0
+        pending = "" # Held-back tail, so a "</s>" split across chunks is still removed.
         
         #Process streamed response chunks.
         for chunk in completion:
             if chunk.choices[0].delta.content: # Check for content in the current chunk.
-                Answer += chunk.choices[0].delta.content #Append the content to the answer.
+                pending = (pending + chunk.choices[0].delta.content).replace("</s>", "") # Remove unwanted tokens.
+                keep = len("</s>") - 1
+                text, pending = pending[:-keep], pending[-keep:]
+                file.write(text)
+                file.flush()
+                written += len(text)
+                if on_progress and written - reported >= CONTENT_PROGRESS_EVERY:
+                    on_progress(Topic, written)
+                    reported = written
         
-        Answer = Answer.replace("</s>", "") # Remove unwanted tokens from the response. 
-        messages.append({"role": "assistant", "content": Answer}) #Add the AI's response to messages.
-        return Answer
+        file.write(pending)
+        written += len(pending)
+        if on_progress:
+            on_progress(Topic, written)
+        return written
     
-    Topic: str = Topic.replace("Content", "") # Remove "Content" from the topic. 
-    ContentByAI = ContentWriterAI (Topic) # Generate content using AI.
+    Topic: str = Topic.replace("Content", "").strip() # Remove "Content" from the topic. 
 
-    # Save the generated content to a text file.
+    # Stream the generated content into a text file.
+    os.makedirs("Data", exist_ok=True)
     filename = os.path.join("Data", f"{Topic.lower().replace(' ', '')}.txt")
     with open(filename, "w", encoding="utf-8") as file:
-        file.write(ContentByAI)
+        ContentWriterAI(Topic, file) # Generate content using AI.
 
     OpenNotepad(filename)  # Open the file in Notepad.
     return True  # Indicate success.
@@ -109,42 +140,14 @@ def SendEmailSMTP(to_email: str, subject: str, body: str, cc: str = "", bcc: str
     """
     Send an email using SMTP settings from .env.
     Returns True on success, or an error string on failure.
+    For several recipients prefer EmailSender.send_emails (one shared session).
     """
-    host = env_vars.get("SMTP_HOST")
-    port = int(env_vars.get("SMTP_PORT", "587"))
-    user = env_vars.get("SMTP_USER")
-    password = env_vars.get("SMTP_PASS")
-    use_tls = str(env_vars.get("SMTP_USE_TLS", "true")).lower() in ("1", "true", "yes", "y", "on")
-    from_addr = env_vars.get("SMTP_FROM") or user
-
-    if not all([host, port, user, password, from_addr]):
-        return "SMTP is not configured. Please set SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_FROM in .env"
-
-    msg = EmailMessage()
-    msg["From"] = from_addr
-    msg["To"] = to_email
-    if cc:
-        msg["Cc"] = cc
-    msg["Subject"] = subject
-    msg.set_content(body)
-
-    recipients = [to_email]
-    if cc:
-        recipients += [x.strip() for x in cc.split(",") if x.strip()]
-    if bcc:
-        recipients += [x.strip() for x in bcc.split(",") if x.strip()]
+    sender = SMTPSender.from_env(env_vars)
+    if sender is None:
+        return NOT_CONFIGURED
 
-    try:
-        with smtplib.SMTP(host, port, timeout=20) as server:
-            server.ehlo()
-            if use_tls:
-                server.starttls()
-                server.ehlo()
-            server.login(user, password)
-            server.send_message(msg, from_addr=from_addr, to_addrs=recipients)
-        return True
-    except Exception as e:
-        return f"Email failed: {e}"
+    with sender:
+        return sender.send(to_email, subject, body, cc, bcc)
 
 # Add a small parser for the command string
 # This lets you pass one “email … | subject … | body …” command cleanly:
@@ -202,45 +205,87 @@ def PlayYoutube(query):
         webbrowser.open(url)
         return True
 
+# Websites people ask to "open" by name. Anything else that isn't an installed
+# app is reported as unavailable instead of guessing https://<name>.com.
+KNOWN_SITES = {
+    "facebook": "https://www.facebook.com",
+    "instagram": "https://www.instagram.com",
+    "youtube": "https://www.youtube.com",
+    "twitter": "https://x.com",
+    "gmail": "https://mail.google.com",
+    "google": "https://www.google.com",
+    "whatsapp": "https://web.whatsapp.com",
+    "telegram": "https://web.telegram.org",
+    "linkedin": "https://www.linkedin.com",
+    "github": "https://github.com",
+    "reddit": "https://www.reddit.com",
+    "netflix": "https://www.netflix.com",
+    "chatgpt": "https://chatgpt.com",
+    "wikipedia": "https://www.wikipedia.org",
+}
+
+def _website_for(app):
+    name = app.strip().lower()
+    if re.fullmatch(r"[a-z0-9-]+(\.[a-z0-9-]+)+", name): # Looks like a domain, e.g. "bbc.com".
+        return f"https://{name}"
+    return KNOWN_SITES.get(name.replace(" ", ""))
+
 #Function to open an application or a relevant webpage.
 def OpenApp(app, sess=None):
     """
     Try to open an installed app.
+    Apps are resolved through the cached AppIndex (microseconds for known names);
+    AppOpener is only used as a fallback on Windows.
     If not installed, DON'T hang — return: "App '<name>' is not available".
-    Optionally, you can open a web search page instead.
     """
-    if sess is None:
-        sess = requests.Session()
-
+    app = app.strip()
     try:
-        appopen(app, match_closest=True, output=True, throw_error=True)
-        return True
+        from Backend.AppIndex import LAUNCHABLE, get_index, launch
+        entry = get_index().resolve(app, source=LAUNCHABLE) # Running processes can't be launched.
+        if entry is not None:
+            launch(entry)
+            return True
+    except Exception as e:
+        print(f"[red]App index lookup failed for {app!r}: {e}[/red]")
 
-    except Exception:
-        # --- quick & safe fallback (NO hanging) ---
+    if sys.platform.startswith("win"):
         try:
-            # Instead of scraping Google HTML (fragile), just open search page quickly
-            # (This is optional — remove these 2 lines if you ONLY want the message.)
-            q = urllib.parse.quote_plus(app)
-            webbrowser.open(f"https://{q}.com")
-        except Exception:
+            from AppOpener import open as appopen #Import function to open apps.
+            appopen(app, match_closest=True, output=True, throw_error=True)
+            return True
+        except (Exception, SystemExit):
             pass
 
-        return f"App '{app}' is not available on this system."
+    url = _website_for(app)
+    if url:
+        webbrowser.open(url)
+        return True
+
+    return Failure(f"App '{app}' is not available on this system.")
     
 #Function to close an application. 
 def CloseApp(app):
+    app = app.strip()
     if "chrome" in app:
-        pass # Skip if the app is Chrome.
-    else:
+        return "Chrome stays open: the assistant's window runs in it." # Skip if the app is Chrome.
+    try:
+        from Backend.AppIndex import terminate
+        if terminate(app):
+            return True
+    except Exception as e:
+        print(f"[red]App index close failed for {app!r}: {e}[/red]")
+    if sys.platform.startswith("win"):
         try:
+            from AppOpener import close #Import function to close apps.
             close(app, match_closest =True, output=True, throw_error=True) #Attempt to close the app. 
             return True #Indicate success.
-        except:
-            return False # Indicate failure.
+        except (Exception, SystemExit):
+            pass
+    return Failure(f"No running app called '{app}' was found.") # Indicate failure.
 
 #Function to execute system-level commands. 
 def System(command):
+    import keyboard #Import keyboard for keyboard-related actions.
     
     # Nested function to mute the system volume.
     def mute():
@@ -270,10 +315,36 @@ def System(command):
         
     return True #Indicate success.
 
-# Asynchronous function to translate and execute user commands. 
-async def TranslateAndExecute(commands: list[str]):
+# Scheduler settings: at most MAX_CONCURRENCY commands run at once, and each
+# command type gets its own timeout (measured from when it actually starts).
+MAX_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30.0
+TASK_TIMEOUTS = {
+    "open": 15.0,
+    "close": 10.0,
+    "play": 20.0,
+    "content": 120.0,
+    "google search": 15.0,
+    "youtube search": 10.0,
+    "system": 5.0,
+    "email": 5.0,
+}
+
+# Past-tense wording used to report each finished command.
+_DONE_VERBS = {
+    "open": "Opened",
+    "close": "Closed",
+    "play": "Playing",
+    "content": "Finished writing",
+    "google search": "Searched Google for",
+    "youtube search": "Searched YouTube for",
+    "system": "Done:",
+}
+
+# Turn the command list into (command, kind, function, argument) jobs.
+def PlanCommands(commands: list[str], on_progress=None):
     
-    funcs = [] # List to store asynchronous tasks.
+    jobs = [] # List of jobs to schedule.
     
     for command in commands:
         
@@ -286,8 +357,7 @@ async def TranslateAndExecute(commands: list[str]):
                 pass
             
             else:
-                fun =asyncio.to_thread(OpenApp, command.removeprefix("open ")) # Schedule app opening.
-                funcs.append(fun)
+                jobs.append((command, "open", OpenApp, command.removeprefix("open "))) # Schedule app opening.
                 
         elif command.startswith("general"): # Placeholder for general commands.
             pass
@@ -296,62 +366,131 @@ async def TranslateAndExecute(commands: list[str]):
             pass
         
         elif command.startswith("close"): # Handle "close" commands.
-            fun = asyncio.to_thread(CloseApp, command.removeprefix("close")) #Schedule app closing.
-            funcs.append(fun)
+            jobs.append((command, "close", CloseApp, command.removeprefix("close"))) #Schedule app closing.
             
         elif command.startswith("play "): #Handle "play" commands.
-            fun = asyncio.to_thread (PlayYoutube, command.removeprefix("play ")) # Schedule YouTube playback.
-            funcs.append(fun)
+            jobs.append((command, "play", PlayYoutube, command.removeprefix("play "))) # Schedule YouTube playback.
             
         elif command.startswith("content"): #Handle "content" commands. 
-            fun = asyncio.to_thread (Content, command.removeprefix("content")) #Schedule content creation.
-            funcs.append(fun)
+            jobs.append((command, "content", partial(Content, on_progress=on_progress), command.removeprefix("content"))) #Schedule content creation.
 
         elif command.startswith("google search "): #Handle Google search commands.
-            fun = asyncio.to_thread (GoogleSearch, command.removeprefix("google search ")) # Schedule Google search.
-            funcs.append(fun)
+            jobs.append((command, "google search", GoogleSearch, command.removeprefix("google search "))) # Schedule Google search.
             
         elif command.startswith("youtube search "): #Handle YouTube search commands.
-            fun = asyncio.to_thread (YouTubeSearch, command.removeprefix("youtube search ")) #Schedule YouTube search. 
-            funcs.append(fun)
+            jobs.append((command, "youtube search", YouTubeSearch, command.removeprefix("youtube search "))) #Schedule YouTube search. 
             
         elif command.startswith("system"): # Handle system commands.
-            fun = asyncio.to_thread (System, command.removeprefix("system")) # Schedule system command. 
-            funcs.append(fun)
+            jobs.append((command, "system", System, command.removeprefix("system"))) # Schedule system command. 
         
         elif command.startswith("email ") or command.startswith("send email "):
             data, err = parse_email_command(command)
             if err:
                 # return a message string so Automation() prints it
-                funcs.append(asyncio.to_thread(lambda: err))
+                jobs.append((command, "email", Failure, err))
             else:
-                fun = asyncio.to_thread(
-                    SendEmailSMTP,
-                    data["to"],
-                    data["subject"],
-                    data["body"],
-                    data["cc"],
-                    data["bcc"],
-                )
-                funcs.append(fun)
+                # Queue for background delivery instead of blocking on SMTP.
+                job_id = enqueue([data["to"]], data["subject"], data["body"], data["cc"], data["bcc"])
+                jobs.append((command, "email", str, f"Email to {data['to']} queued for delivery (job {job_id})."))
             
         else:
             print(f"No Function Found. For {command}") # Print an error for unrecognized commands.
     
-    results = await asyncio.gather(*funcs) #Execute all tasks concurrently.
-    
-    for result in results: # Process the results.
-        if isinstance(result, str):
-            yield result
-        else:
-            yield result
+    return jobs
+
+# Asynchronous generator that runs commands and yields (command, result) as each one finishes.
+async def ExecuteCommands(commands: list[str], on_progress=None):
+    """
+    Run the commands on a bounded thread pool and yield (command, result)
+    in completion order. A command that exceeds its TASK_TIMEOUTS entry
+    yields a "Timed out ..." message instead of stalling the batch.
+    Closing the generator (or cancelling its task) cancels whatever has not
+    finished yet. `on_progress(topic, chars)` from content jobs is delivered
+    on the event-loop thread.
+    """
+    loop = asyncio.get_running_loop()
+    if on_progress is not None:
+        report = on_progress
+
+        # Timed-out content jobs keep streaming after the batch (and its loop)
+        # has finished; their progress is dropped then.
+        def on_progress(*args):
+            if loop.is_closed():
+                return
+            try:
+                loop.call_soon_threadsafe(report, *args)
+            except RuntimeError:  # closed between the check and the call
+                pass
+
+    jobs = PlanCommands(commands, on_progress)
+    if not jobs:
+        return
+
+    # One thread per job so a hung call can't starve the others; the
+    # semaphore is what bounds how many run at the same time.
+    pool = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="Automation")
+    slots = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def _run(command, kind, fn, arg):
+        timeout = TASK_TIMEOUTS.get(kind, DEFAULT_TIMEOUT)
+        async with slots:
+            started = asyncio.Event()
+
+            def _call():
+                loop.call_soon_threadsafe(started.set)
+                return fn(arg)
+
+            future = loop.run_in_executor(pool, _call)
+            try:
+                await started.wait() # Queueing time doesn't count against the timeout.
+                return command, await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                # The thread can't be killed; we just stop waiting for it.
+                return command, Failure(f"Timed out after {timeout:g}s: {command}")
+            except Exception as e:
+                return command, Failure(f"Failed: {command} ({e})")
+
+    tasks = [asyncio.create_task(_run(*job)) for job in jobs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# Asynchronous function to translate and execute user commands. 
+async def TranslateAndExecute(commands: list[str]):
+    async for _, result in ExecuteCommands(commands): # Results arrive as each command finishes.
+        yield result
+
+# Function to turn a finished command into a short status line.
+def DescribeResult(command: str, result) -> str:
+    if isinstance(result, str):
+        return result
+    kind = next((k for k in _DONE_VERBS if command.startswith(k)), "")
+    target = command.removeprefix(kind).strip()
+    if result is False:
+        return f"Couldn't complete: {command}"
+    return f"{_DONE_VERBS.get(kind, 'Done:')} {target}.".strip()
             
 # Asynchronous function to autonate command execution. 
-async def Automation(commands: list[str]):
-    async for result in TranslateAndExecute(commands):
-        if isinstance(result, str):
+async def Automation(commands: list[str], on_result=None, on_progress=None):
+    """
+    Execute the commands; `on_result(command, result)` is called as each one
+    finishes, so callers can report progress before the slowest is done.
+    `on_progress(topic, chars)` reports content jobs while they stream.
+    Returns the commands that failed or timed out (empty if all went well).
+    """
+    failed = []
+    async for command, result in ExecuteCommands(commands, on_progress):
+        if result is False or isinstance(result, Failure):
+            failed.append(command)
+        if on_result is not None:
+            on_result(command, result)
+        elif isinstance(result, str):
             print(result)          # <--- now you will see "App 'x' is not available"
-    return True
+    return failed
 
 if __name__ == "__main__":
     asyncio.run(Automation([
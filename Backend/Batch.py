@@ -0,0 +1,188 @@
+"""Run a file of queries through routing and answering, without the UI.
+
+Each input line is a query, or a JSON object ``{"query": ..., "session": ...}``.
+Queries of one session run in order and see that session's earlier
+answers; different sessions (every plain line is its own) run in parallel
+on ``--concurrency`` threads. Nothing is spoken and no automation, email,
+reminder or image task is run (see :mod:`Backend.Pipeline`).
+
+One JSON line per query is written, in input order: the route, the
+decision model's tasks, skipped side-effect tasks, the answer and per-stage
+timings in milliseconds. A summary goes to stderr. ``--compare`` checks
+the routes against an earlier output and exits with status 1 on changes,
+for regression runs; queries are matched by text (and session, when one
+is given). ``--no-writes`` keeps the run from changing anything under
+``Data/``: realtime queries are not counted for prefetch and snapshots
+are not saved, so a regression run leaves the assistant's state as it
+was. ``--stand-in`` uses :class:`Backend.Pipeline.StandInBackends` (no
+keys or network; ``--latency`` seconds per model call).
+
+    python -m Backend.Batch queries.txt --out results.jsonl
+    python -m Backend.Batch - --stand-in --latency 0.05 --concurrency 32 < queries.txt
+    python -m Backend.Batch queries.txt --no-writes --compare results.jsonl
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from Backend.Pipeline import Backends, Result, StandInBackends, run_query
+
+CONCURRENCY = 4
+STAGES = ("route", "realtime_tools", "decide", "answer", "total")
+
+Item = Tuple[int, str, str]  # (index, session, query)
+
+
+def read_queries(lines: Iterable[str]) -> List[Item]:
+    items: List[Item] = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        session = None
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+                query, session = str(data.get("query") or ""), data.get("session")
+            except ValueError:
+                query = line
+        else:
+            query = line
+        index = len(items)
+        items.append((index, str(session) if session is not None else f"#{index}", query))
+    return items
+
+
+def _run_session(items: List[Item], backends: Backends) -> List[Tuple[int, str, Result]]:
+    messages: List[dict] = []
+    out = []
+    for index, session, query in items:
+        result = run_query(query, messages, backends)
+        if result.answer and result.route not in ("empty", "error"):
+            messages += [{"role": "user", "content": result.query},
+                         {"role": "assistant", "content": result.answer}]
+        out.append((index, session, result))
+    return out
+
+
+def _set_writes(enabled: bool) -> None:
+    from Backend.RealtimePrefetch import set_recording
+    from Backend.RealtimeSnapshots import set_read_only
+    set_recording(enabled)
+    set_read_only(not enabled)
+
+
+def run_batch(items: List[Item], backends: Optional[Backends] = None,
+              concurrency: int = CONCURRENCY, writes: bool = True) -> List[Tuple[int, str, Result]]:
+    """Results in input order. With `writes=False` nothing under Data/ is changed."""
+    backends = backends or Backends()
+    sessions: Dict[str, List[Item]] = {}
+    for item in items:
+        sessions.setdefault(item[1], []).append(item)
+    if not writes:
+        _set_writes(False)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as pool:
+            done = [row for rows in pool.map(lambda s: _run_session(s, backends), sessions.values()) for row in rows]
+    finally:
+        if not writes:
+            _set_writes(True)
+    done.sort(key=lambda row: row[0])
+    return done
+
+
+def write_results(rows: List[Tuple[int, str, Result]], out: TextIO) -> None:
+    for index, session, result in rows:
+        out.write(json.dumps({"index": index, "session": session, **result.to_dict()}, ensure_ascii=False) + "\n")
+
+
+def summary(rows: List[Tuple[int, str, Result]], elapsed: float) -> str:
+    routes: Dict[str, int] = {}
+    stages: Dict[str, List[float]] = {}
+    for _, _, result in rows:
+        routes[result.route] = routes.get(result.route, 0) + 1
+        for stage, ms in result.timings.items():
+            stages.setdefault(stage, []).append(ms)
+    lines = [f"{len(rows)} queries in {elapsed:.2f} s ({len(rows) / elapsed if elapsed else 0:,.1f}/s)",
+             "routes: " + ", ".join(f"{k} {v}" for k, v in sorted(routes.items(), key=lambda kv: -kv[1]))]
+    for stage in sorted(stages, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+        values = sorted(stages[stage])
+        lines.append(f"  {stage:<15} p50 {values[len(values) // 2]:9.2f} ms   "
+                     f"p95 {values[int(len(values) * 0.95)]:9.2f} ms   max {values[-1]:9.2f} ms")
+    return "\n".join(lines)
+
+
+def _compare_key(session: Optional[str], query: str) -> Tuple[Optional[str], str]:
+    # Plain lines get positional "#<index>" sessions; those don't survive an
+    # edit of the query file, so they are matched by query text alone.
+    return (None if session is None or session.startswith("#") else session), query
+
+
+def compare(rows: List[Tuple[int, str, Result]], path: str) -> List[str]:
+    """Queries whose route or decision differs from an earlier output."""
+    with open(path, "r", encoding="utf-8") as f:
+        before = {}
+        for line in f:
+            if line.strip():
+                old = json.loads(line)
+                before[_compare_key(old.get("session"), old.get("query") or "")] = old
+    changes = []
+    for _, session, result in rows:
+        old = before.get(_compare_key(session, result.query))
+        if old is None:
+            changes.append(f"new: {result.query!r} -> {result.route}")
+        elif old.get("route") != result.route or old.get("decision") != result.decision:
+            changes.append(f"changed: {result.query!r}: {old.get('route')} {old.get('decision')} "
+                           f"-> {result.route} {result.decision}")
+    return changes
+
+
+def _arg(name: str, default: Optional[str] = None) -> Optional[str]:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def main() -> None:
+    args = [a for i, a in enumerate(sys.argv[1:], 1)
+            if not a.startswith("--") and sys.argv[i - 1] not in ("--out", "--concurrency", "--compare", "--latency")]
+    if not args:
+        raise SystemExit(__doc__)
+    source = args[0]
+
+    backends = StandInBackends(float(_arg("--latency", "0"))) if "--stand-in" in sys.argv else Backends()
+
+    if source == "-":
+        items = read_queries(sys.stdin)
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            items = read_queries(f)
+
+    start = time.perf_counter()
+    rows = run_batch(items, backends, int(_arg("--concurrency", str(CONCURRENCY))),
+                     writes="--no-writes" not in sys.argv)
+    elapsed = time.perf_counter() - start
+
+    out_path = _arg("--out")
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            write_results(rows, f)
+    else:
+        write_results(rows, sys.stdout)
+    print(summary(rows, elapsed), file=sys.stderr)
+
+    baseline = _arg("--compare")
+    if baseline:
+        changes = compare(rows, baseline)
+        for change in changes:
+            print(change, file=sys.stderr)
+        print(f"{len(changes)} routing change(s) against {baseline}", file=sys.stderr)
+        if changes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Full-text search over the conversation history.
+
+``Data/ChatLog.json`` only keeps what is sent to the model and is rewritten
+(or reset) as a whole, so finding "what did I ask about Bangladesh last
+week" meant scanning it. Every user/assistant turn is also appended to an
+SQLite FTS5 index in ``Data/ChatHistory.db``:
+
+- :func:`index_new_turns` is called after the chat log is written and
+  indexes only the turns appended since the last call;
+- :func:`search_history` returns BM25-ranked hits with a snippet;
+- :func:`answer_history_command` handles spoken/typed requests such as
+  "search my history for bangladesh" or "what did I ask about python
+  yesterday".
+
+Turns are time-stamped when they are indexed (the chat log has no times).
+
+    python -m Backend.ChatHistory "bangladesh"
+    python -m Backend.ChatHistory --bench [messages]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+DB_PATH = os.path.join("Data", "ChatHistory.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_ts ON turns(ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    content, content='turns', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_vocab USING fts5vocab(turns_fts, 'row');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Ranking a term means scoring every turn that contains it. When all query
+# terms are in more than COMMON_TERM_DOCS turns, only the newest
+# COMMON_TERM_WINDOW turns are ranked so the cost stays bounded.
+COMMON_TERM_DOCS = 20_000
+COMMON_TERM_WINDOW = 20_000
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class Hit:
+    id: int
+    role: str
+    content: str
+    ts: float
+    score: float  # BM25, lower is better
+    snippet: str
+
+
+def _fingerprint(message: dict) -> str:
+    text = f"{message.get('role')}\x00{message.get('content')}"
+    return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+
+# Words that occur in most turns: matching them means ranking a large share
+# of the index, for no gain in relevance.
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could did do does for from had has have how i in is it its "
+    "me my of on or so than that the their them then there these they this to was we were what "
+    "when where which who why will with would you your".split()
+)
+
+
+def query_terms(text: str) -> List[str]:
+    """Search words of `text`; stopwords are dropped unless nothing else is left."""
+    words = _WORD.findall((text or "").lower())
+    return [w for w in words if w not in STOPWORDS] or words
+
+
+def to_match_query(terms: Sequence[str], any_term: bool = False) -> str:
+    """Terms -> FTS5 MATCH expression with every word quoted.
+
+    Quoting keeps user input from being parsed as FTS syntax (AND, NEAR, *).
+    """
+    return (" OR " if any_term else " ").join('"%s"' % t for t in terms)
+
+
+class HistoryIndex:
+    """Append-only FTS5 index of chat turns."""
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM turns").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    # -- writing ----------------------------------------------------------
+
+    def add_many(self, rows: Iterable[Tuple[str, str, Optional[float]]]) -> int:
+        """Index (role, content, ts) rows in one transaction; ts None = now."""
+        now = time.time()
+        data = [(role, content, now if ts is None else ts) for role, content, ts in rows if content]
+        with self._lock, self._db:
+            self._db.executemany("INSERT INTO turns (role, content, ts) VALUES (?, ?, ?)", data)
+        return len(data)
+
+    def add(self, role: str, content: str, ts: Optional[float] = None) -> None:
+        self.add_many([(role, content, ts)])
+
+    def sync(self, messages: Sequence[dict]) -> int:
+        """Index the turns of a chat log appended since the previous sync.
+
+        The log's position and the fingerprint of its last indexed turn are
+        kept in the database; if the log was reset or rewritten in between,
+        it is indexed from the start again. Returns the number of new turns.
+        """
+        with self._lock:
+            meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        position = int(meta.get("log_position") or 0)
+        if position > len(messages) or (
+            position and _fingerprint(messages[position - 1]) != meta.get("log_last")
+        ):
+            position = 0  # log was reset or rewritten
+
+        new = messages[position:]
+        rows = [(str(m.get("role") or ""), str(m.get("content") or ""), None) for m in new]
+        added = self.add_many(rows) if rows else 0
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("log_position", str(len(messages))),
+                 ("log_last", _fingerprint(messages[-1]) if messages else "")],
+            )
+        return added
+
+    # -- searching --------------------------------------------------------
+
+    def search(
+        self,
+        text: str,
+        limit: int = 10,
+        role: Optional[str] = None,
+        since: Optional[float] = None,
+    ) -> List[Hit]:
+        """BM25-ranked turns matching all words of `text` (any word if none match all)."""
+        terms = query_terms(text)
+        if not terms:
+            return []
+        with self._lock:
+            docs = [
+                (self._db.execute("SELECT doc FROM turns_vocab WHERE term = ?", (t,)).fetchone() or (0,))[0]
+                for t in terms
+            ]
+            newest = self._db.execute("SELECT max(id) FROM turns").fetchone()[0] or 0
+
+        for any_term in (False, True):
+            match = to_match_query(terms, any_term)
+            sql = (
+                "SELECT t.id, t.role, t.content, t.ts, bm25(turns_fts),"
+                " snippet(turns_fts, 0, '[', ']', '...', 12)"
+                " FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid"
+                " WHERE turns_fts MATCH ?"
+            )
+            args: list = [match]
+            if (sum(docs) if any_term else min(docs)) > COMMON_TERM_DOCS:
+                sql += " AND turns_fts.rowid > ?"
+                args.append(newest - COMMON_TERM_WINDOW)
+            if role:
+                sql += " AND t.role = ?"
+                args.append(role)
+            if since is not None:
+                sql += " AND t.ts >= ?"
+                args.append(since)
+            sql += " ORDER BY bm25(turns_fts) LIMIT ?"
+            args.append(limit)
+            with self._lock:
+                rows = self._db.execute(sql, args).fetchall()
+            if rows or len(terms) < 2:
+                return [Hit(*row) for row in rows]
+        return []
+
+
+_index: Optional[HistoryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> HistoryIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = HistoryIndex()
+        return _index
+
+
+def index_new_turns(messages: Sequence[dict]) -> int:
+    """Call after writing the chat log; never raises (search is best effort)."""
+    try:
+        return get_index().sync(messages)
+    except Exception as e:
+        print(f"Chat history index error: {e!r}")
+        return 0
+
+
+def search_history(text: str, limit: int = 10, role: Optional[str] = None,
+                   since: Optional[float] = None) -> List[Hit]:
+    return get_index().search(text, limit=limit, role=role, since=since)
+
+
+# -----------------------------
+# Voice / typed command
+# -----------------------------
+
+_COMMAND = re.compile(
+    r"^(?:please\s+)?(?:"
+    r"search (?:my |the )?(?:chat |conversation )?history (?:for|about)"
+    r"|find (?:in )?(?:my |the )?(?:chat |conversation )?history"
+    r"|what did (?P<me>i) (?:ask|say|tell you)(?: you)? about"
+    r"|what did (?P<you>you) (?:say|tell me) about"
+    r"|when did (?:i|we) (?:ask|talk|speak) about"
+    r")\s+(?P<topic>.+)$",
+    re.I,
+)
+_WINDOWS = [
+    (re.compile(r"\b(?:today)\b", re.I), lambda now: now.replace(hour=0, minute=0, second=0, microsecond=0)),
+    (re.compile(r"\byesterday\b", re.I),
+     lambda now: now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)),
+    (re.compile(r"\b(?:last|this|past) week\b", re.I), lambda now: now - timedelta(days=7)),
+    (re.compile(r"\b(?:last|this|past) month\b", re.I), lambda now: now - timedelta(days=31)),
+    (re.compile(r"\b(?:last|this|past) year\b", re.I), lambda now: now - timedelta(days=366)),
+]
+_TOPIC_FILLER = re.compile(r"\b(?:the|a|an|my|me|of|on|in|about)\b|[?.!,]", re.I)
+
+
+def parse_history_command(text: str, now: Optional[datetime] = None) -> Optional[Tuple[str, Optional[str], Optional[float]]]:
+    """'what did I ask about bangladesh last week' -> ('bangladesh', 'user', <ts a week ago>)"""
+    m = _COMMAND.match((text or "").strip())
+    if not m:
+        return None
+    now = now or datetime.now()
+    topic, since = m.group("topic"), None
+    for pattern, start in _WINDOWS:
+        if pattern.search(topic):
+            topic = pattern.sub(" ", topic)
+            since = start(now).timestamp()
+            break
+    topic = re.sub(r"\s+", " ", _TOPIC_FILLER.sub(" ", topic)).strip()
+    if not topic:
+        return None
+    role = "user" if m.group("me") else "assistant" if m.group("you") else None
+    return topic, role, since
+
+
+def answer_history_command(text: str, limit: int = 5) -> Optional[str]:
+    """Answer a history-search command, or None if `text` isn't one."""
+    parsed = parse_history_command(text)
+    if not parsed:
+        return None
+    topic, role, since = parsed
+    hits = search_history(topic, limit=limit, role=role, since=since)
+    if not hits:
+        return f"I couldn't find anything about {topic} in our conversation history."
+    lines = [f"Found {len(hits)} match{'es' if len(hits) > 1 else ''} for {topic}:"]
+    for hit in hits:
+        who = "You" if hit.role == "user" else "Me"
+        when = datetime.fromtimestamp(hit.ts).strftime("%d %b %H:%M")
+        lines.append(f"- {when} {who}: {hit.snippet}")
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def benchmark(n: int = 1_000_000, batch: int = 50_000) -> None:
+    import itertools
+    import random
+    import tempfile
+
+    rng = random.Random(7)
+    # Zipf-ish vocabulary: a few very common words, a long tail of rare ones.
+    vocab = [f"w{i}" for i in range(50_000)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocab))))
+    topics = ["bangladesh", "python", "weather", "currency", "football", "recipe", "mars", "email"]
+
+    def sentence() -> str:
+        words = rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(6, 30))
+        if rng.random() < 0.01:
+            words.insert(rng.randrange(len(words)), rng.choice(topics))
+        return " ".join(words)
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = HistoryIndex(os.path.join(folder, "bench.db"))
+        start = time.perf_counter()
+        now = time.time()
+        for base in range(0, n, batch):
+            rows = [("user" if i % 2 == 0 else "assistant", sentence(), now - (n - i) * 2.0)
+                    for i in range(base, min(n, base + batch))]
+            index.add_many(rows)
+        build = time.perf_counter() - start
+        size_mb = os.path.getsize(index.db_path) / 1e6
+        print(f"indexed {n:,} messages in {build:.1f} s ({n / build:,.0f}/s), db {size_mb:.0f} MB")
+
+        def timed(label: str, **kw) -> None:
+            samples = []
+            for _ in range(20):
+                t = time.perf_counter()
+                hits = index.search(limit=10, **kw)
+                samples.append(time.perf_counter() - t)
+            samples.sort()
+            print(f"  {label:<38} p50 {samples[10] * 1000:7.2f} ms  max {samples[-1] * 1000:7.2f} ms  hits {len(hits)}")
+
+        print("search (top 10):")
+        timed("rare topic 'bangladesh'", text="bangladesh")
+        timed("rare topic, user only, last week", text="bangladesh", role="user", since=now - 7 * 86400)
+        timed("two terms 'python w3'", text="python w3")
+        timed("mid-frequency 'w500'", text="w500")
+        timed("very common 'w0'", text="w0")
+
+        samples = []
+        for i in range(200):
+            t = time.perf_counter()
+            index.add("user", sentence())
+            samples.append(time.perf_counter() - t)
+        samples.sort()
+        print(f"incremental add (one turn): p50 {samples[100] * 1000:.2f} ms  max {samples[-1] * 1000:.2f} ms")
+        index.close()
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        rest = [a for a in sys.argv[1:] if a != "--bench"]
+        benchmark(int(rest[0]) if rest else 1_000_000)
+    else:
+        for hit in search_history(" ".join(sys.argv[1:])):
+            print(f"{hit.score:8.3f}  {hit.role:<9}  {hit.snippet}")
@@ -1,23 +1,35 @@
-from groq import Groq #Importing the Groq library to use its API.
 from json import load, dump # Importing functions to read and write JSON files.
 import datetime # Importing the datetime module for real-time date and time information.
-from dotenv import dotenv_values # Importing dotenv_values to read environment variables from a .env file.
 import os
+from Backend.Config import get_env # Cached .env settings shared by all backends.
+from Backend.ChatHistory import index_new_turns # Full-text index of every turn.
 
 # Load environment variables from the .env file.
-env_vars=dotenv_values(".env")
+env_vars=get_env()
 
 # Retrieve specific environment variables for username, assistant name, and API key.
 Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-#Initialize the Groq client using the provided API key.
-client = Groq(api_key=GroqAPIKey)
+# The Groq client is created on first use (the SDK is slow to import).
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        from groq import Groq #Importing the Groq library to use its API.
+        client = Groq(api_key=GroqAPIKey)
+    return client
 
 # Path to chat log
 CHATLOG_PATH = os.path.join("Data", "ChatLog.json")
 
+# Context sent with each query: the last few turns verbatim, plus the most
+# relevant older exchanges recalled from local memory (Backend.Memory).
+RECENT_TURNS = 6
+MEMORY_TOP_K = 4
+
 # Initialize an empty list to store chat messages.
 messages = []
 
@@ -67,6 +79,74 @@ def AnswerModifier(Answer):
     return modified_answer
 
 
+#Function to build the conversation context for a query (recent turns + recalled memory).
+def BuildContext(Query, messages):
+    from Backend.Memory import recall, remember_new_turns # Imported here: NumPy is slow to import.
+    remember_new_turns(messages) # Catch memory up with the log (only new exchanges are embedded).
+    recent = messages[-RECENT_TURNS:]
+    recalled = recall(Query, k=MEMORY_TOP_K, exclude_last=RECENT_TURNS // 2)
+    if not recalled:
+        return recent
+    notes = "\n\n".join(f"User: {u}\nAssistant: {a}" for u, a in recalled)
+    memory = {"role": "system", "content": f"Relevant earlier conversation:\n{notes}"}
+    return [memory] + recent
+
+
+#Function to record an exchange answered without calling the model (e.g. from the answer cache).
+def LogExchange(Query, Answer):
+    try:
+        with open(CHATLOG_PATH, "r") as f:
+            messages = load(f)
+    except (FileNotFoundError, ValueError):
+        messages = []
+    messages.append({"role": "user", "content": f"{Query}"})
+    messages.append({"role": "assistant", "content": Answer})
+    with open(CHATLOG_PATH, "w") as f:
+        dump(messages, f, indent=4)
+    index_new_turns(messages)
+
+
+#Function to get the model's answer to a query given the conversation so far (no files touched).
+#Setting `cancel` (a threading.Event) stops the stream early; `usage` (a dict) receives
+#prompt_tokens/completion_tokens, from Groq when it reports them, else estimated.
+def ChatReply(Query, messages, use_memory=True, cancel=None, usage=None):
+    # Only the relevant part of the history is sent, not the whole log.
+    context = BuildContext(Query, messages) if use_memory else messages[-RECENT_TURNS:]
+    request = SystemChatBot + [{"role": "system", "content": RealtimeInformation()}] + context + [{"role": "user", "content": f"{Query}"}]
+
+    # Make a request to the Groq API for a response.
+    completion = get_client().chat.completions.create(
+        model="llama-3.1-8b-instant",  # Updated model ID
+        messages=request,
+        max_tokens=512,
+        temperature=0.7,
+        top_p=1,
+        stream=True,
+        stop=None
+    )
+
+    Answer = "" # Initialize an empty string to store the AI's response.
+
+    # Process the streamed response chunks.
+    for chunk in completion:
+        if cancel is not None and cancel.is_set():
+            completion.close() # Closing the stream stops the generation.
+            break
+        if chunk.choices and chunk.choices[0].delta.content: # Check if there's content in the current chunk. # Append the content to the answer.
+            Answer += chunk.choices[0].delta.content
+        reported = getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if usage is not None and reported is not None:
+            usage["prompt_tokens"] = reported.prompt_tokens
+            usage["completion_tokens"] = reported.completion_tokens
+
+    if usage is not None:
+        # Roughly four characters per token when Groq didn't report usage (e.g. cancelled).
+        usage.setdefault("prompt_tokens", sum(len(m["content"]) for m in request) // 4)
+        usage.setdefault("completion_tokens", len(Answer) // 4)
+
+    return Answer.replace("</s>", "") # Clean up any unwanted tokens from the response.
+
+
 # Main chatbot function to handle user queries.
 def ChatBot (Query):
     """ This function sends the user's query to the chatbot and returns the AI's response."""
@@ -74,36 +154,18 @@ def ChatBot (Query):
         # Load the existing chat log from the JSON file.
         with open(CHATLOG_PATH, "r") as f:
             messages = load(f)
-            
-        # Append the user's query to the messages list.
+
+        Answer = ChatReply(Query, messages)
+
+        # Append the user's query and the chatbot's response to the messages list.
         messages.append({"role": "user", "content": f"{Query}"})
-        
-        # Make a request to the Groq API for a response.
-        completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # Updated model ID
-            messages=SystemChatBot + [{"role": "system", "content": RealtimeInformation()}] + messages,
-            max_tokens=512,
-            temperature=0.7,
-            top_p=1,
-            stream=True,
-            stop=None
-)
-        
-        Answer = "" # Initialize an empty string to store the AI's response.
-        
-        # Process the streamed response chunks.
-        for chunk in completion:
-            if chunk.choices[0].delta.content: # Check if there's content in the current chunk. # Append the content to the answer.
-                Answer += chunk.choices[0].delta.content
-                
-        Answer = Answer.replace("</s>", "") # Clean up any unwanted tokens from the response.
-
-        # Append the chatbot's response to the messages list.
         messages.append({"role": "assistant", "content": Answer})
         
         # Save the updated chat log to the JSON file.
         with open(CHATLOG_PATH, "w") as f:
             dump(messages, f, indent=4)
+        # Add the new turns to the full-text history index.
+        index_new_turns(messages)
             
         #Return the formatted response.
         return AnswerModifier(Answer=Answer)
@@ -0,0 +1,40 @@
+"""Central, cached access to the project's .env settings.
+
+Every backend used to call ``dotenv_values(".env")`` on import, parsing the
+same file over and over (and relative to whatever the working directory
+happened to be). Import :func:`get_env` instead; the file is read once per
+process from the project root.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Optional
+
+from dotenv import dotenv_values
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_PATH = os.path.join(BASE_DIR, ".env")
+
+_env: Optional[Dict[str, Optional[str]]] = None
+
+
+def get_env() -> Dict[str, Optional[str]]:
+    """Return the parsed .env as a dict (parsed on first call only)."""
+    global _env
+    if _env is None:
+        _env = dict(dotenv_values(ENV_PATH))
+    return _env
+
+
+def env(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Single setting; empty values count as missing."""
+    value = get_env().get(key)
+    return value if value not in (None, "") else default
+
+
+def reload_env() -> Dict[str, Optional[str]]:
+    """Drop the cache and re-read .env (e.g. after the user edits it)."""
+    global _env
+    _env = None
+    return get_env()
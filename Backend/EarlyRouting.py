@@ -0,0 +1,186 @@
+"""Start routing on a stable prefix of what the user is saying.
+
+Speech recognition declares the end of an utterance only after
+``SILENCE_STOP_SECONDS`` without new words, so by the time the final
+transcript arrives it has usually been sitting unchanged for a while. Once
+the transcript has not changed for ``STABLE_PREFIX_SECONDS`` it is published
+as *stable* (see :mod:`Backend.SpeechToText`), and :class:`EarlyRouter`
+uses the rest of the silence: it turns the text into the query that would be
+returned (translating it if needed; the translation is provisional, so it
+is only cached and counted if the final utterance is the same text) and
+asks the decision model about it in the background.
+
+``Main._process_query`` calls :func:`take_decision` with the final query.
+If that is the prefix that was prepared, the decision is taken from the
+early call, waiting for it if it is still running, instead of asking the
+model again. If the user kept talking, the early call is wasted; the
+counts are in :meth:`EarlyRouter.stats`.
+
+Queries that are routed without the decision model (automation, email,
+reminders, images, currency/weather) are not prepared.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from Backend.EventBus import TRANSCRIPT, subscribe
+from Backend.Pipeline import EXIT_WORDS, _local_only, _norm_cmd
+
+MAX_PENDING = 3        # older early calls are dropped (and counted as wasted)
+TAKE_TIMEOUT = 20.0    # seconds to wait for a still-running early call
+CONVERT_WAIT = 3.0     # seconds to wait for prefixes still being translated
+
+
+def _to_query(text: str) -> str:
+    from Backend.SpeechToText import TranscriptToQuery
+    return TranscriptToQuery(text, Provisional=True)
+
+
+def _decide(query: str) -> List[str]:
+    from Backend.Model import FirstLayerDMM
+    decision = FirstLayerDMM(query)
+    return decision if isinstance(decision, list) else []
+
+
+def _needs_decision(query: str) -> bool:
+    q_norm = _norm_cmd(query)
+    if not q_norm or q_norm in EXIT_WORDS or _local_only(q_norm):
+        return False
+    try:
+        from Backend.RealtimeAPIs import is_realtime_tool_query
+        return not is_realtime_tool_query(query)
+    except Exception:
+        return True
+
+
+class _Job:
+    def __init__(self, future: Future):
+        self.future = future
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+
+class EarlyRouter:
+    """Decision model calls started on stable transcript prefixes."""
+
+    def __init__(self, to_query: Callable[[str], str] = _to_query,
+                 decide: Callable[[str], List[str]] = _decide):
+        self._to_query = to_query
+        self._decide = decide
+        self._lock = threading.Lock()
+        self._converted = threading.Condition(self._lock)
+        self._converting = 0                                  # prefixes not yet turned into queries
+        self._jobs: "OrderedDict[str, _Job]" = OrderedDict()  # normalised query -> job
+        self._texts: Set[str] = set()                         # transcripts already prepared
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="early-route")
+        self.prepared = self.used = self.wasted = self.skipped = 0
+        self.saved_seconds = 0.0
+
+    def prepare(self, text: str) -> None:
+        """Start routing the transcript `text` in the background."""
+        text = (text or "").strip()
+        with self._lock:
+            if not text or text in self._texts:
+                return
+            self._texts.add(text)
+            self._converting += 1
+        self._pool.submit(self._prepare, text)
+
+    def _prepare(self, text: str) -> None:
+        try:
+            query = self._to_query(text)
+            needed = _needs_decision(query)
+        except Exception:
+            query, needed = "", False
+        key = _norm_cmd(query)
+        with self._converted:
+            self._converting -= 1
+            self._converted.notify_all()
+            if not needed:
+                self.skipped += bool(query)
+                return
+            if key in self._jobs:
+                return
+            job = _Job(Future())
+            self._jobs[key] = job
+            self.prepared += 1
+            while len(self._jobs) > MAX_PENDING:
+                self._jobs.popitem(last=False)
+                self.wasted += 1
+        try:
+            job.future.set_result(self._decide(query))
+        except Exception as e:
+            job.future.set_exception(e)
+        job.finished = time.monotonic()
+
+    def take(self, query: str) -> Optional[List[str]]:
+        """The early decision for `query`, or None if there is none (or it failed).
+
+        All other prepared prefixes are discarded: the utterance is over.
+        """
+        key = _norm_cmd(query)
+        now = time.monotonic()
+        with self._converted:
+            if key not in self._jobs:
+                self._converted.wait_for(lambda: self._converting == 0, timeout=CONVERT_WAIT)
+            job = self._jobs.pop(key, None)
+            self.wasted += len(self._jobs)
+            self._jobs.clear()
+            self._texts.clear()
+        if job is None:
+            return None
+        try:
+            decision = job.future.result(timeout=TAKE_TIMEOUT)
+        except Exception:
+            return None
+        with self._lock:
+            self.used += 1
+            # the part of the call that overlapped the end-of-utterance wait
+            self.saved_seconds += max(0.0, min(job.finished or now, now) - job.started)
+        return list(decision)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "prepared": self.prepared,
+                "used": self.used,
+                "wasted": self.wasted,
+                "skipped": self.skipped,
+                "saved_seconds": round(self.saved_seconds, 2),
+            }
+
+
+_router: Optional[EarlyRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> EarlyRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = EarlyRouter()
+        return _router
+
+
+def _on_transcript(topic: str, payload) -> None:
+    if isinstance(payload, dict) and payload.get("stable") and not payload.get("final"):
+        get_router().prepare(payload.get("text") or "")
+
+
+_unsubscribe: Optional[Callable[[], None]] = None
+
+
+def start() -> None:
+    """Prepare decisions for stable transcripts published on the bus."""
+    global _unsubscribe
+    if _unsubscribe is None:
+        _unsubscribe = subscribe(TRANSCRIPT, _on_transcript)
+
+
+def take_decision(query: str) -> Optional[List[str]]:
+    return get_router().take(query) if _router is not None else None
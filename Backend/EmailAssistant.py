@@ -4,25 +4,39 @@ This project uses voice + GUI, but the email helpers should stay independent
 from UI. The UI layer (Main.py / GUI) can:
 
 1) Ask for recipient email(s) + subject.
-2) Call :func:`draft_email_body` to generate a structured email body.
-3) Send using SMTP (see Backend/Automation.SendEmailSMTP).
+2) Call :func:`draft_email_body` (or :func:`start_draft` as soon as the subject
+   is known) to generate a structured email body.
+3) Queue it for delivery (see Backend/EmailSpool.enqueue).
 """
 
 from __future__ import annotations
 
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Optional
 
-from dotenv import dotenv_values
+from Backend.Config import get_env
 
-try:
-    from groq import Groq
-except Exception:  # pragma: no cover
-    Groq = None  # type: ignore
+_ENV = get_env()
+_GROQ_KEY = _ENV.get("GroqAPIKey")
 
+# One Groq client (and its HTTP connection pool) shared by every draft.
+_client = None
+_client_lock = threading.Lock()
 
-_ENV = dotenv_values(".env")
-_GROQ_KEY = _ENV.get("GroqAPIKey")
+# Background drafting, so the voice flow can keep talking/listening meanwhile.
+_draft_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="EmailDraft")
+DRAFT_TIMEOUT = 30.0  # seconds to wait for a draft once the body is needed
+
+
+def _get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from groq import Groq  # heavy; only imported when a draft is written
+            _client = Groq(api_key=_GROQ_KEY)
+        return _client
 
 
 EMAIL_SYSTEM_PROMPT = (
@@ -135,11 +149,11 @@ def draft_email_body(
         ]
         return "\n".join(lines)
 
-    if not _GROQ_KEY or Groq is None:
+    if not _GROQ_KEY:
         return _fallback()
 
     try:
-        client = Groq(api_key=_GROQ_KEY)
+        client = _get_client()
         prompt = (
             f"Subject: {subject}\n"
             f"Tone: {tone}\n"
@@ -165,3 +179,13 @@ def draft_email_body(
         return body
     except Exception:
         return _fallback()
+
+
+def start_draft(subject: str, about: str = "", **kwargs) -> "Future[str]":
+    """Start :func:`draft_email_body` in the background and return its Future.
+
+    Call ``.result(timeout=DRAFT_TIMEOUT)`` when the body is actually needed;
+    by then the draft is usually finished. The draft itself never raises
+    (drafting falls back to a template), but the model call can hang.
+    """
+    return _draft_pool.submit(draft_email_body, subject, about, **kwargs)
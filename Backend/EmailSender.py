@@ -0,0 +1,212 @@
+"""Pooled SMTP sending.
+
+Opening an SMTP session costs a TCP connect, EHLO, STARTTLS, a second EHLO
+and AUTH before a single byte of mail is sent. When one command sends to
+several recipients we want to pay that once, so :class:`SMTPSender` keeps a
+single authenticated session open for the whole batch and re-connects if the
+server drops it (idle timeouts, 421 "closing channel") before the message
+body went out. A connection lost after DATA started is reported, not retried:
+the server may already have accepted the message, and sending it again could
+deliver it twice.
+
+Typical use::
+
+    results = send_emails(["a@x.com", "b@y.com"], "Subject", "Body")
+    # {"a@x.com": True, "b@y.com": "Email failed: ..."}
+"""
+
+from __future__ import annotations
+
+import smtplib
+from email.message import EmailMessage
+from typing import Dict, Iterable, List, Optional, Union
+
+from Backend.Config import get_env
+
+_ENV = get_env()
+
+SendResult = Union[bool, str]  # True on success, otherwise an error message
+
+NOT_CONFIGURED = (
+    "SMTP is not configured. Please set SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_FROM in .env"
+)
+
+# Prefix of the result when the connection died mid-transaction; such a message
+# must not be sent again automatically.
+MAYBE_SENT = "Email failed: connection lost while sending, it may have been delivered"
+
+# Errors that mean "the session is gone". Retried only if DATA had not started.
+_DROPPED = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def split_addresses(value: str) -> List[str]:
+    """'a@x.com, b@y.com' -> ['a@x.com', 'b@y.com']"""
+    return [x.strip() for x in (value or "").split(",") if x.strip()]
+
+
+def build_message(from_addr: str, to_email: str, subject: str, body: str, cc: str = "") -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = from_addr
+    msg["To"] = to_email
+    if cc:
+        msg["Cc"] = cc
+    msg["Subject"] = subject
+    msg.set_content(body)
+    return msg
+
+
+class _SMTP(smtplib.SMTP):
+    """smtplib.SMTP that remembers whether the current message reached DATA."""
+
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class SMTPSender:
+    """One authenticated SMTP session, reused for every message of a batch.
+
+    Use as a context manager; the connection is opened lazily on the first
+    send and closed on exit. ``handshakes`` counts how many sessions were
+    opened, which is handy to verify pooling.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        from_addr: Optional[str] = None,
+        use_tls: bool = True,
+        timeout: float = 20.0,
+        max_reconnects: int = 2,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.from_addr = from_addr or user
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_reconnects = max_reconnects
+        self.handshakes = 0
+        self._server: Optional[_SMTP] = None
+
+    @classmethod
+    def from_env(cls, env: Optional[dict] = None) -> Optional["SMTPSender"]:
+        """Build a sender from SMTP_* settings, or None if they are incomplete."""
+        env = _ENV if env is None else env
+        host = env.get("SMTP_HOST")
+        port = env.get("SMTP_PORT") or "587"
+        user = env.get("SMTP_USER")
+        password = env.get("SMTP_PASS")
+        use_tls = str(env.get("SMTP_USE_TLS", "true")).lower() in ("1", "true", "yes", "y", "on")
+        from_addr = env.get("SMTP_FROM") or user
+
+        if not all([host, port, user, password, from_addr]):
+            return None
+        return cls(host, int(port), user, password, from_addr=from_addr, use_tls=use_tls)
+
+    # -- connection -------------------------------------------------------
+
+    def connect(self) -> None:
+        self.close()
+        server = _SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls()
+                server.ehlo()
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self.handshakes += 1
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+    def __enter__(self) -> "SMTPSender":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- sending ----------------------------------------------------------
+
+    def send(self, to_email: str, subject: str, body: str, cc: str = "", bcc: str = "") -> SendResult:
+        """Send one message over the shared session. Returns True or an error string."""
+        msg = build_message(self.from_addr, to_email, subject, body, cc)
+        recipients = [to_email] + split_addresses(cc) + split_addresses(bcc)
+        return self.send_message(msg, recipients)
+
+    def send_message(self, msg: EmailMessage, recipients: List[str]) -> SendResult:
+        last_error: Optional[Exception] = None
+        for _ in range(self.max_reconnects + 1):
+            server = None
+            try:
+                if self._server is None:
+                    self.connect()
+                server = self._server
+                server.data_started = False
+                refused = server.send_message(msg, from_addr=self.from_addr, to_addrs=recipients)
+                if refused:
+                    return "Email failed: refused " + ", ".join(f"{r} ({c[0]})" for r, c in refused.items())
+                return True
+            except _DROPPED as e:
+                self.close()
+                if server is not None and server.data_started:
+                    # The server may already have accepted the message: a retry could
+                    # deliver it twice. Report it and let the caller decide.
+                    return f"{MAYBE_SENT} ({e})"
+                # Hung up before the message went out (idle timeout, restart). Retry.
+                last_error = e
+            except smtplib.SMTPResponseException as e:
+                # A 421 reply is an explicit refusal, so the message was not accepted.
+                if e.smtp_code == 421:  # service closing transmission channel
+                    last_error = e
+                    self.close()
+                    continue
+                self._reset()
+                return f"Email failed: {e}"
+            except smtplib.SMTPRecipientsRefused as e:
+                self._reset()
+                return "Email failed: refused " + ", ".join(e.recipients)
+            except Exception as e:
+                self.close()
+                return f"Email failed: {e}"
+        return f"Email failed: {last_error}"
+
+    def send_many(self, recipients: Iterable[str], subject: str, body: str) -> Dict[str, SendResult]:
+        """Send the same message to each recipient separately, reporting per recipient."""
+        return {to_addr: self.send(to_addr, subject, body) for to_addr in recipients}
+
+    def _reset(self) -> None:
+        """Clear a half-finished transaction so the session stays usable."""
+        try:
+            if self._server is not None:
+                self._server.rset()
+        except Exception:
+            self.close()
+
+
+def send_emails(recipients: Iterable[str], subject: str, body: str) -> Dict[str, SendResult]:
+    """Send one message per recipient over a single pooled session."""
+    recipients = list(recipients)
+    sender = SMTPSender.from_env()
+    if sender is None:
+        return {r: NOT_CONFIGURED for r in recipients}
+    with sender:
+        return sender.send_many(recipients, subject, body)
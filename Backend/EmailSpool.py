@@ -0,0 +1,249 @@
+"""Persistent outbound email queue with a background sender.
+
+Sending over SMTP can take seconds per recipient and a transient failure
+used to be lost. Callers now :func:`enqueue` a job and return immediately;
+a single background thread delivers it over one pooled session (see
+:mod:`Backend.EmailSender`) and retries failed recipients with exponential
+backoff. A recipient whose connection died mid-transaction is marked
+"unconfirmed" and never retried, since the server may already have the mail.
+
+Every job is a small JSON file in ``Data/Outbox`` written atomically, so a
+crash or restart never loses mail: jobs caught mid-send are simply queued
+again on the next start. When a job finishes (sent or given up) every
+registered listener is called with the job dict, which lets the assistant
+announce the result.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from Backend.EmailSender import MAYBE_SENT, NOT_CONFIGURED, SMTPSender
+
+SPOOL_DIR = os.path.join("Data", "Outbox")
+FAILED_DIR = os.path.join(SPOOL_DIR, "failed")
+
+MAX_ATTEMPTS = 6        # per job; roughly 30 minutes of retrying in total
+RETRY_BASE = 15.0       # seconds before the first retry, doubled each time
+RETRY_MAX = 15 * 60.0   # cap on a single backoff
+
+Listener = Callable[[dict], None]
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_listeners: List[Listener] = []
+_finished: Dict[str, dict] = {}   # recent final jobs, for job_status()
+_worker: Optional[threading.Thread] = None
+
+
+# -----------------------------
+# Job files
+# -----------------------------
+
+def _job_path(job_id: str, folder: str = SPOOL_DIR) -> str:
+    return os.path.join(folder, f"{job_id}.json")
+
+
+def _write_job(job: dict, folder: str = SPOOL_DIR) -> None:
+    """Write atomically so a crash never leaves a half-written job."""
+    os.makedirs(folder, exist_ok=True)
+    path = _job_path(job["id"], folder)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _load_jobs() -> List[dict]:
+    jobs = []
+    if not os.path.isdir(SPOOL_DIR):
+        return jobs
+    for name in os.listdir(SPOOL_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(SPOOL_DIR, name), "r", encoding="utf-8") as f:
+                jobs.append(json.load(f))
+        except Exception as e:
+            print(f"Skipping unreadable outbox job {name}: {e}")
+    jobs.sort(key=lambda j: j.get("created", 0))
+    return jobs
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+
+def enqueue(
+    recipients: Iterable[str],
+    subject: str,
+    body: str,
+    cc: str = "",
+    bcc: str = "",
+) -> str:
+    """Queue one message per recipient and return the job id right away."""
+    now = time.time()
+    job = {
+        "id": uuid.uuid4().hex[:12],
+        "to": [r for r in recipients if r],
+        "subject": subject,
+        "body": body,
+        "cc": cc,
+        "bcc": bcc,
+        "status": "queued",
+        "attempts": 0,
+        "created": now,
+        "next_attempt": now,
+        "sent": [],
+        "errors": {},
+    }
+    with _lock:
+        _write_job(job)
+    start()
+    _wake.set()
+    return job["id"]
+
+
+def add_listener(fn: Listener) -> None:
+    """Call `fn(job)` whenever a job is delivered or finally fails."""
+    if fn not in _listeners:
+        _listeners.append(fn)
+
+
+def job_status(job_id: str) -> Optional[dict]:
+    """Return the job dict (pending or recently finished), or None."""
+    if job_id in _finished:
+        return _finished[job_id]
+    try:
+        with open(_job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def pending_jobs() -> List[dict]:
+    return [j for j in _load_jobs() if j.get("status") in ("queued", "sending")]
+
+
+def describe(job: dict) -> str:
+    """Short human sentence for announcing a finished job."""
+    sent = job.get("sent") or []
+    if job.get("status") == "sent":
+        return f"Email \"{job.get('subject', '')}\" delivered to {', '.join(sent)}."
+    failed = [t for t in job.get("to", []) if t not in sent]
+    last = next(iter((job.get("errors") or {}).values()), "unknown error")
+    msg = f"I couldn't deliver the email \"{job.get('subject', '')}\" to {', '.join(failed)}: {last}"
+    if sent:
+        msg += f" It did reach {', '.join(sent)}."
+    return msg
+
+
+def start() -> None:
+    """Start the background sender (idempotent). Recovers interrupted jobs."""
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        for job in _load_jobs():
+            if job.get("status") == "sending":  # we crashed mid-send
+                job["status"] = "queued"
+                job["next_attempt"] = time.time()
+                _write_job(job)
+        _worker = threading.Thread(target=_run, name="EmailSpool", daemon=True)
+        _worker.start()
+
+
+# -----------------------------
+# Background sender
+# -----------------------------
+
+def _backoff(attempts: int) -> float:
+    return min(RETRY_BASE * 2 ** max(attempts - 1, 0), RETRY_MAX)
+
+
+def _finish(job: dict, status: str) -> None:
+    job["status"] = status
+    job["finished"] = time.time()
+    with _lock:
+        if status == "failed":
+            _write_job(job, FAILED_DIR)
+        try:
+            os.remove(_job_path(job["id"]))
+        except FileNotFoundError:
+            pass
+        _finished[job["id"]] = job
+    for fn in list(_listeners):
+        try:
+            fn(job)
+        except Exception as e:
+            print(f"Outbox listener error: {e}")
+
+
+def _deliver(job: dict, sender: SMTPSender) -> None:
+    job["status"] = "sending"
+    job["attempts"] += 1
+    with _lock:
+        _write_job(job)
+
+    unconfirmed = job.setdefault("unconfirmed", [])
+    for to_addr in job["to"]:
+        if to_addr in job["sent"] or to_addr in unconfirmed:
+            continue
+        res = sender.send(to_addr, job["subject"], job["body"], job.get("cc", ""), job.get("bcc", ""))
+        if res is True:
+            job["sent"].append(to_addr)
+            job["errors"].pop(to_addr, None)
+        else:
+            job["errors"][to_addr] = str(res)
+            if str(res).startswith(MAYBE_SENT):
+                unconfirmed.append(to_addr)  # a retry could deliver it twice
+        with _lock:
+            _write_job(job)  # progress survives a crash: sent recipients are never resent
+
+    if len(job["sent"]) == len(job["to"]):
+        _finish(job, "sent")
+    elif len(job["sent"]) + len(unconfirmed) == len(job["to"]):
+        _finish(job, "failed")
+    elif job["attempts"] >= MAX_ATTEMPTS:
+        _finish(job, "failed")
+    else:
+        job["status"] = "queued"
+        job["next_attempt"] = time.time() + _backoff(job["attempts"])
+        with _lock:
+            _write_job(job)
+
+
+def _run() -> None:
+    while True:
+        _wake.clear()
+        now = time.time()
+        jobs = [j for j in _load_jobs() if j.get("status") == "queued"]
+        due = [j for j in jobs if j.get("next_attempt", 0) <= now]
+
+        if due:
+            sender = SMTPSender.from_env()
+            if sender is None:
+                for job in due:
+                    job["errors"] = {t: NOT_CONFIGURED for t in job["to"] if t not in job["sent"]}
+                    _finish(job, "failed")
+                continue
+            with sender:  # one session for everything that is due
+                for job in due:
+                    try:
+                        _deliver(job, sender)
+                    except Exception as e:
+                        print(f"Outbox job {job.get('id')} crashed: {e}")
+                        job["status"] = "queued"
+                        job["next_attempt"] = time.time() + _backoff(job["attempts"])
+                        with _lock:
+                            _write_job(job)
+            continue
+
+        # Sleep until the next retry is due, or until enqueue() wakes us.
+        timeout = min((j.get("next_attempt", now) for j in jobs), default=None)
+        _wake.wait(None if timeout is None else max(timeout - now, 0.05))
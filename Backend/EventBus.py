@@ -0,0 +1,309 @@
+"""In-process publish/subscribe for assistant state.
+
+Components used to share state by rewriting small files in
+``Frontend/Files`` (``Status.data``, ``Mic.data``, ``ImageGeneration.data``,
+``LastLang.data``) that others had to poll. Publish on the bus instead::
+
+    from Backend.EventBus import STATUS, publish, subscribe
+
+    unsubscribe = subscribe(STATUS, lambda topic, value: print(value))
+    publish(STATUS, "Translating...")
+
+Subscribers are called synchronously in the publisher's thread, so delivery
+costs a function call. The last value of every topic is retained and
+available via :func:`last`. Subscribers that must run elsewhere (e.g. on
+the Eel loop) hand the event over themselves.
+
+Worker processes (image generation) reach the bus through a localhost
+socket bridge: :func:`start_bridge` in the main process exports
+``JARVIS_BUS_PORT``/``JARVIS_BUS_TOKEN`` to child processes, which call
+:func:`connect` and publish/subscribe as if they were local. Messages are
+one JSON object per line.
+
+    python -m Backend.EventBus --bench
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Topics
+STATUS = "status"        # short status line, e.g. "Listening ..."
+MIC = "mic"              # True while the microphone is listening
+LANGUAGE = "language"    # input language of the last recognised utterance
+IMAGE = "image"          # image job updates: {"prompt", "state", "paths"?}
+ANNOUNCE = "announce"    # text the assistant should say (email results, reminders)
+WAKE = "wake"            # the always-on listener heard the wake word (or speech)
+TRANSCRIPT = "transcript"  # speech so far: {"text", "stable", "final"}
+
+ALL = "*"
+
+PORT_ENV = "JARVIS_BUS_PORT"
+TOKEN_ENV = "JARVIS_BUS_TOKEN"
+
+Handler = Callable[[str, Any], None]
+
+
+class EventBus:
+    """Thread-safe topic -> subscribers map with retained last values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Handler]] = {}
+        self._last: Dict[str, Any] = {}
+
+    def subscribe(self, topic: str, fn: Handler) -> Callable[[], None]:
+        """Call ``fn(topic, payload)`` for every event on `topic` (or ``ALL``).
+
+        Returns a function that removes the subscription.
+        """
+        with self._lock:
+            # Copy-on-write so publish() can iterate without holding the lock.
+            self._subscribers[topic] = self._subscribers.get(topic, []) + [fn]
+
+        def unsubscribe() -> None:
+            with self._lock:
+                subs = [f for f in self._subscribers.get(topic, []) if f is not fn]
+                if subs:
+                    self._subscribers[topic] = subs
+                else:
+                    self._subscribers.pop(topic, None)
+
+        return unsubscribe
+
+    def publish(self, topic: str, payload: Any = None) -> int:
+        """Deliver an event; returns the number of subscribers called."""
+        with self._lock:
+            self._last[topic] = payload
+            subs = self._subscribers.get(topic, []) + self._subscribers.get(ALL, [])
+        for fn in subs:
+            try:
+                fn(topic, payload)
+            except Exception as e:
+                print(f"EventBus subscriber error on {topic!r}: {e!r}")
+        return len(subs)
+
+    def last(self, topic: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._last.get(topic, default)
+
+
+bus = EventBus()
+subscribe = bus.subscribe
+publish = bus.publish
+last = bus.last
+
+
+# -----------------------------
+# Socket bridge (main process)
+# -----------------------------
+
+def _send_line(sock: socket.socket, lock: threading.Lock, message: dict) -> None:
+    data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+    with lock:
+        sock.sendall(data)
+
+
+class _BridgeHandler(socketserver.StreamRequestHandler):
+    """One worker connection: ``pub`` messages are published on the local
+    bus, ``sub`` messages forward local events on that topic to the worker."""
+
+    def handle(self) -> None:
+        server: _BridgeServer = self.server  # type: ignore[assignment]
+        if self.rfile.readline().decode("utf-8", "replace").strip() != server.token:
+            return
+
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        write_lock = threading.Lock()
+        unsubscribes: List[Callable[[], None]] = []
+        forwarding = threading.local()
+
+        def forward(topic: str, payload: Any) -> None:
+            if getattr(forwarding, "from_peer", False):
+                return  # don't echo the worker's own events back to it
+            try:
+                _send_line(self.request, write_lock, {"topic": topic, "payload": payload})
+            except OSError:
+                pass
+
+        try:
+            for raw in self.rfile:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                op, topic = message.get("op"), message.get("topic")
+                if not isinstance(topic, str):
+                    continue
+                if op == "pub":
+                    forwarding.from_peer = True
+                    try:
+                        server.bus.publish(topic, message.get("payload"))
+                    finally:
+                        forwarding.from_peer = False
+                elif op == "sub":
+                    unsubscribes.append(server.bus.subscribe(topic, forward))
+        finally:
+            for unsubscribe in unsubscribes:
+                unsubscribe()
+
+
+class _BridgeServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], target: EventBus, token: str):
+        super().__init__(address, _BridgeHandler)
+        self.bus = target
+        self.token = token
+
+
+_bridge: Optional[_BridgeServer] = None
+
+
+def start_bridge(target: EventBus = bus, port: int = 0) -> int:
+    """Serve `target` on 127.0.0.1 and export its address to child processes.
+
+    Idempotent; returns the port.
+    """
+    global _bridge
+    if _bridge is None:
+        token = secrets.token_hex(16)
+        _bridge = _BridgeServer(("127.0.0.1", port), target, token)
+        threading.Thread(target=_bridge.serve_forever, name="EventBusBridge", daemon=True).start()
+        os.environ[PORT_ENV] = str(_bridge.server_address[1])
+        os.environ[TOKEN_ENV] = token
+    return _bridge.server_address[1]
+
+
+def stop_bridge() -> None:
+    global _bridge
+    if _bridge is not None:
+        _bridge.shutdown()
+        _bridge.server_close()
+        _bridge = None
+
+
+# -----------------------------
+# Socket bridge (worker process)
+# -----------------------------
+
+class BridgeClient:
+    """Publish/subscribe on the main process's bus from a worker process."""
+
+    def __init__(self, port: int, token: str, timeout: float = 5.0):
+        self._sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+        self._sock.settimeout(None)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._lock = threading.Lock()
+        self._local = EventBus()
+        self._reader: Optional[threading.Thread] = None
+        with self._lock:
+            self._sock.sendall((token + "\n").encode("utf-8"))
+
+    def publish(self, topic: str, payload: Any = None) -> None:
+        _send_line(self._sock, self._lock, {"op": "pub", "topic": topic, "payload": payload})
+
+    def subscribe(self, topic: str, fn: Handler) -> Callable[[], None]:
+        if self._reader is None:
+            self._reader = threading.Thread(target=self._read, name="EventBusClient", daemon=True)
+            self._reader.start()
+        unsubscribe = self._local.subscribe(topic, fn)
+        _send_line(self._sock, self._lock, {"op": "sub", "topic": topic})
+        return unsubscribe
+
+    def _read(self) -> None:
+        with self._sock.makefile("rb") as stream:
+            for raw in stream:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                self._local.publish(message.get("topic"), message.get("payload"))
+
+    def close(self) -> None:
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def __enter__(self) -> "BridgeClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def connect() -> Optional[BridgeClient]:
+    """Connect to the parent's bridge, or None when not started by one."""
+    port, token = os.environ.get(PORT_ENV), os.environ.get(TOKEN_ENV)
+    if not port or not token:
+        return None
+    try:
+        return BridgeClient(int(port), token)
+    except (OSError, ValueError) as e:
+        print(f"EventBus bridge unavailable: {e!r}")
+        return None
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def _percentiles(samples: List[float]) -> str:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6  # noqa: E731
+    return f"p50 {pick(0.5):7.1f} us   p99 {pick(0.99):7.1f} us"
+
+
+def benchmark(n: int = 2000) -> None:
+    local = EventBus()
+    seen: List[float] = []
+    local.subscribe(STATUS, lambda topic, sent: seen.append(time.perf_counter() - sent))
+    for _ in range(n):
+        local.publish(STATUS, time.perf_counter())
+    print(f"in-process publish -> subscriber:  {_percentiles(seen)}")
+
+    # Worker publishes over the bridge; the main-process subscriber sees it.
+    target = EventBus()
+    arrived = threading.Semaphore(0)
+    remote: List[float] = []
+
+    def on_remote(topic: str, sent: float) -> None:
+        remote.append(time.perf_counter() - sent)
+        arrived.release()
+
+    target.subscribe(IMAGE, on_remote)
+    port = start_bridge(target)
+    with connect() as client:
+        for _ in range(n):
+            client.publish(IMAGE, time.perf_counter())
+            arrived.acquire()
+    stop_bridge()
+    print(f"bridge worker -> main subscriber:   {_percentiles(remote)}  (port {port})")
+
+    # For comparison: the old approach, one small file write per status change.
+    import tempfile
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "Status.data")
+        writes: List[float] = []
+        for _ in range(n):
+            start = time.perf_counter()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("Listening ...")
+            writes.append(time.perf_counter() - start)
+    print(f"Status.data write (old IPC):        {_percentiles(writes)}  + poll interval")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -1,65 +1,118 @@
 import asyncio
 from random import randint
 from PIL import Image
-import requests
-from dotenv import load_dotenv, get_key
 import os
-from time import sleep
-from huggingface_hub import InferenceClient
+import sys
+import tempfile
+from time import sleep, perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional
 import io
+from Backend.Config import env, get_env
+from Backend.EventBus import IMAGE, connect
 
 # ======================
 # CONFIG & CONSTANTS
 # ======================
 
-load_dotenv()
-
-HF_TOKEN = get_key('.env', 'HuggingFaceAPIKey')
-if not HF_TOKEN:
-    raise RuntimeError("HuggingFaceAPIKey not found in .env")
+_ENV = get_env()
 
 # Choose a model that supports Inference Providers for text-to-image
 # See HF docs: FLUX.1-dev / FLUX.1-Krea-dev, etc. 
 MODEL_ID = "black-forest-labs/FLUX.1-dev"
 
-# Let HF choose/route providers for you (or set provider="hf-inference" / "fal-ai")
-client = InferenceClient(
-    api_key=HF_TOKEN,
-    provider="auto",   # or "hf-inference", "fal-ai", etc.
-)
+# Let HF choose/route providers for you (or set IMAGE_PROVIDER=hf-inference / fal-ai in .env)
+PROVIDER = _ENV.get("IMAGE_PROVIDER") or "auto"
+
+# How many text-to-image calls may be in flight at once, per provider.
+# Free tiers throttle hard, so the conservative default is 2.
+# IMAGE_CONCURRENCY in .env overrides the value for the active provider.
+PROVIDER_CONCURRENCY = {
+    "auto": 2,
+    "hf-inference": 1,
+    "fal-ai": 4,
+    "replicate": 4,
+    "together": 4,
+}
+
+IMAGE_COUNT = int(_ENV.get("IMAGE_COUNT") or 2)        # images per prompt
+IMAGE_RETRIES = int(_ENV.get("IMAGE_RETRIES") or 2)    # extra attempts per failed slot
+RETRY_DELAY = 1.0                                       # seconds, doubled on each retry
 
 DATA_FOLDER = "Data"
 IMAGE_GEN_FILE = os.path.join("Frontend", "Files", "ImageGeneration.data")
 
+_client = None
+
+
+def get_client():
+    """Create the HF client on first use (the benchmark never needs it)."""
+    global _client
+    if _client is None:
+        from huggingface_hub import InferenceClient
+
+        hf_token = env('HuggingFaceAPIKey')
+        if not hf_token:
+            raise RuntimeError("HuggingFaceAPIKey not found in .env")
+        _client = InferenceClient(
+            api_key=hf_token,
+            provider=PROVIDER,   # or "hf-inference", "fal-ai", etc.
+        )
+    return _client
+
+
+def concurrency_for(provider: str = PROVIDER) -> int:
+    """Concurrency cap for `provider` (IMAGE_CONCURRENCY wins when set)."""
+    override = _ENV.get("IMAGE_CONCURRENCY")
+    if override:
+        try:
+            return max(1, int(override))
+        except ValueError:
+            print(f"Ignoring invalid IMAGE_CONCURRENCY={override!r}")
+    return PROVIDER_CONCURRENCY.get(provider, 2)
+
+
+def split_prompts(text: str) -> List[str]:
+    """'tiger; red car' -> ['tiger', 'red car']"""
+    return [p.strip() for p in (text or "").split(";") if p.strip()]
+
 
 # ======================
 # IMAGE DISPLAY
 # ======================
 
-def open_images(prompt: str):
-    """Open up to 4 images based on the prompt name."""
+def open_image(image_path: str) -> bool:
+    """Open a single generated image in the default viewer."""
+    if not os.path.exists(image_path):
+        print(f"File does not exist: {image_path}")
+        return False
+    try:
+        img = Image.open(image_path)
+        print(f"Opening image: {image_path}")
+        img.show()
+        sleep(1)
+        return True
+    except IOError:
+        print(f"Unable to open {image_path}")
+        return False
+
+
+def open_images(prompt: str, count: int = 4):
+    """Open up to `count` images based on the prompt name."""
     folder_path = DATA_FOLDER
     safe_prompt = prompt.replace(" ", "_")
-    files = [f"{safe_prompt}{i}.jpg" for i in range(1, 5)]
+    files = [f"{safe_prompt}{i}.jpg" for i in range(1, count + 1)]
 
     for jpg_file in files:
-        image_path = os.path.join(folder_path, jpg_file)
-        if not os.path.exists(image_path):
-            print(f"File does not exist: {image_path}")
-            continue
-        try:
-            img = Image.open(image_path)
-            print(f"Opening image: {image_path}")
-            img.show()
-            sleep(1)
-        except IOError:
-            print(f"Unable to open {image_path}")
+        open_image(os.path.join(folder_path, jpg_file))
 
 
 # ======================
 # HUGGING FACE REQUEST
 # ======================
 
+Render = Callable[[str], Awaitable[bytes]]
+
+
 async def query(prompt: str) -> bytes:
     """
     Run text-to-image for a single prompt and return raw image bytes.
@@ -67,7 +120,7 @@ async def query(prompt: str) -> bytes:
     """
     def _run():
         # output is a PIL.Image object according to HF docs 
-        img = client.text_to_image(
+        img = get_client().text_to_image(
             prompt,
             model=MODEL_ID,
             # You can also pass extra params:
@@ -82,47 +135,192 @@ async def query(prompt: str) -> bytes:
     return await asyncio.to_thread(_run)
 
 
-async def generate_images(prompt: str) -> bool:
-    tasks = []
-    safe_prompt = prompt.replace(" ", "_")
+def _full_prompt(prompt: str) -> str:
+    return (
+        f"{prompt}, quality 4K, sharpness maximum, Ultra High details, high resolution, "
+        f"seed {randint(0, 1_000_000)}"
+    )
 
-    os.makedirs(DATA_FOLDER, exist_ok=True)
 
-    for _ in range(2):  # Generate 2 images
-        full_prompt = (
-            f"{prompt}, quality 4K, sharpness maximum, Ultra High details, high resolution, "
-            f"seed {randint(0, 1_000_000)}"
-        )
-        tasks.append(asyncio.create_task(query(full_prompt)))
+async def _generate_slot(
+    prompt: str,
+    index: int,
+    sem: asyncio.Semaphore,
+    render: Render,
+    retries: int,
+    folder: str,
+    on_ready: Optional[Callable[[str], object]],
+) -> Optional[str]:
+    """Generate image #index for `prompt`, retrying only this slot on failure.
 
-    try:
-        image_bytes_list = await asyncio.gather(*tasks)
-    except Exception as e:
-        print("Failed to generate images:", repr(e))
-        return False
+    The semaphore is held just for the provider call, so saving/opening the
+    image never keeps another slot waiting.
+    """
+    safe_prompt = prompt.replace(" ", "_")
+
+    for attempt in range(1, retries + 2):
+        try:
+            async with sem:
+                image_bytes = await render(_full_prompt(prompt))  # fresh seed per attempt
+        except Exception as e:
+            print(f"Image {index} for {prompt!r} failed (attempt {attempt}/{retries + 1}):", repr(e))
+            if attempt <= retries:
+                await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+            continue
 
-    for i, image_bytes in enumerate(image_bytes_list, start=1):
-        filename = os.path.join(DATA_FOLDER, f"{safe_prompt}{i}.jpg")
+        filename = os.path.join(folder, f"{safe_prompt}{index}.jpg")
         with open(filename, "wb") as f:
             f.write(image_bytes)
+        print(f"Saved: {filename}")
 
-    print("Images generated and saved.")
-    return True
+        if on_ready is not None:
+            await asyncio.to_thread(on_ready, filename)
+        return filename
+
+    return None
+
+
+async def generate_batch(
+    prompts: List[str],
+    count: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+    render: Render = query,
+    folder: str = DATA_FOLDER,
+    on_ready: Optional[Callable[[str], object]] = open_image,
+) -> Dict[str, List[str]]:
+    """Generate `count` images for every prompt, at most `concurrency` at a time.
+
+    Each image is saved (and handed to `on_ready`) as soon as it finishes.
+    Returns {prompt: [saved paths]}; failed slots are simply missing.
+    """
+    count = IMAGE_COUNT if count is None else count
+    retries = IMAGE_RETRIES if retries is None else retries
+    sem = asyncio.Semaphore(concurrency or concurrency_for())
+
+    os.makedirs(folder, exist_ok=True)
+
+    jobs = []
+    for prompt in prompts:
+        for i in range(1, count + 1):
+            jobs.append((prompt, _generate_slot(prompt, i, sem, render, retries, folder, on_ready)))
+
+    paths = await asyncio.gather(*(job for _, job in jobs))
+
+    results: Dict[str, List[str]] = {p: [] for p in prompts}
+    for (prompt, _), path in zip(jobs, paths):
+        if path:
+            results[prompt].append(path)
+
+    done = sum(len(v) for v in results.values())
+    print(f"Images generated and saved: {done}/{len(jobs)}")
+    return results
+
+
+async def generate_images(prompt: str, count: Optional[int] = None, **kwargs) -> bool:
+    """Generate images for one prompt (or several separated by ';').
+
+    Returns True if at least one image was produced.
+    """
+    results = await generate_batch(split_prompts(prompt) or [prompt], count=count, **kwargs)
+    return any(results.values())
 
 
 # --------- THIS is the wrapper you were missing ---------
-def generate_and_open(prompt: str):
-    """Sync wrapper: run the async generator, then open images."""
-    success = asyncio.run(generate_images(prompt))
-    if success:
-        open_images(prompt)
-    else:
-        print("Skipping opening images because generation failed.")
+def generate_and_open(prompt: str, count: Optional[int] = None):
+    """Sync wrapper: run the async generator; images open as they finish."""
+    success = asyncio.run(generate_images(prompt, count=count))
+    if not success:
+        print("No images to open because generation failed.")
+    return success
 # --------------------------------------------------------
 
 
 # ======================
-# MAIN LOOP
+# BENCHMARK
+# ======================
+
+def _stand_in_provider(latency: float, fail_every: int = 0) -> Render:
+    """Local fake provider: sleeps `latency` seconds, fails every Nth call."""
+    calls = 0
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="PNG")
+    payload = buf.getvalue()
+
+    async def _render(prompt: str) -> bytes:
+        nonlocal calls
+        calls += 1
+        n = calls
+        await asyncio.sleep(latency)
+        if fail_every and n % fail_every == 0:
+            raise RuntimeError("stand-in provider error")
+        return payload
+
+    return _render
+
+
+def benchmark(
+    prompts: int = 2,
+    count: int = 4,
+    latency: float = 0.25,
+    concurrencies=(1, 2, 4, 8),
+    fail_every: int = 0,
+):
+    """Print throughput of generate_batch against the stand-in provider."""
+    global RETRY_DELAY
+    RETRY_DELAY = 0.0
+    names = [f"bench prompt {i}" for i in range(prompts)]
+    total = prompts * count
+
+    print(f"{total} images, {latency:.2f}s simulated latency, fail_every={fail_every}")
+    print(f"{'concurrency':>11} | {'seconds':>8} | {'images/s':>8} | ok")
+    with tempfile.TemporaryDirectory() as folder:
+        for c in concurrencies:
+            render = _stand_in_provider(latency, fail_every)
+            start = perf_counter()
+            results = asyncio.run(
+                generate_batch(names, count=count, concurrency=c, render=render,
+                               folder=folder, on_ready=None)
+            )
+            elapsed = perf_counter() - start
+            ok = sum(len(v) for v in results.values())
+            print(f"{c:>11} | {elapsed:>8.2f} | {ok / elapsed:>8.2f} | {ok}/{total}")
+
+
+# ======================
+# JOB (worker process)
+# ======================
+
+def run_job(prompt: str, count: Optional[int] = None) -> bool:
+    """Generate and open images for `prompt` ("a; b" for several).
+
+    Progress goes to the parent's event bus (topic IMAGE) when this process
+    was started by the assistant, otherwise it is printed.
+    """
+    bridge = connect()
+    report = bridge.publish if bridge else (lambda topic, payload: print(payload))
+    saved: List[str] = []
+
+    def ready(path: str) -> None:
+        saved.append(path)
+        open_image(path)
+        report(IMAGE, {"prompt": prompt, "state": "ready", "path": path})
+
+    report(IMAGE, {"prompt": prompt, "state": "started"})
+    result = {"prompt": prompt, "paths": saved}
+    try:
+        asyncio.run(generate_batch(split_prompts(prompt) or [prompt], count=count, on_ready=ready))
+    except Exception as e:
+        result["error"] = str(e)
+    result["state"] = "done" if saved else "failed"
+    report(IMAGE, result)
+    if bridge:
+        bridge.close()
+    return bool(saved)
+
+
+# ======================
+# MAIN LOOP (standalone, file based)
 # ======================
 
 def main_loop():
@@ -138,7 +336,7 @@ def main_loop():
                 continue
 
             try:
-                prompt, status = [x.strip() for x in data.split(",", 1)]
+                prompt, status = [x.strip() for x in data.rsplit(",", 1)]
             except ValueError:
                 print(f"Invalid data format in {IMAGE_GEN_FILE}: {data!r}")
                 sleep(1)
@@ -170,4 +368,10 @@ def main_loop():
 
 
 if __name__ == "__main__":
-    main_loop()
+    if "--bench" in sys.argv:
+        benchmark()
+        benchmark(fail_every=3, concurrencies=(4,))
+    elif len(sys.argv) > 1:
+        run_job(" ".join(sys.argv[1:]))
+    else:
+        main_loop()
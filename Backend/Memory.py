@@ -0,0 +1,326 @@
+"""Local embedding memory of past exchanges for ChatBot.
+
+ChatBot used to send the whole chat log with every request. Instead it now
+sends the last few turns plus the past exchanges most similar to the new
+query, found here without any network call:
+
+- :func:`embed` is a hashed feature vectorizer (character trigrams plus
+  words, signed hashing into ``DIM`` buckets, L2-normalised), so it needs
+  no model download and runs in microseconds;
+- vectors live in a memory-mapped float32 matrix
+  (``Data/Memory/vectors.f32``) and cosine top-k is a single NumPy
+  matrix-vector product plus ``argpartition``;
+- :func:`remember_new_turns` is called after the chat log is written and
+  appends only the new user/assistant exchanges.
+
+    python -m Backend.Memory "what did we say about python"
+    python -m Backend.Memory --bench [exchanges]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MEMORY_DIR = os.path.join("Data", "Memory")
+DIM = 128                # power of two; 100k exchanges = 51 MB, ~3 ms per search
+WORD_WEIGHT = 2.0        # whole words count more than single trigrams
+MIN_SCORE = 0.25         # cosine below this is not worth sending
+MAX_CHARS = 600          # per recalled message, to bound the prompt
+GROW_ROWS = 4096
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_MULT = np.uint32(2654435761)  # Knuth multiplicative hash
+
+Exchange = Tuple[str, str]  # (user, assistant)
+
+
+def embed(text: str, dim: int = DIM) -> np.ndarray:
+    """Hashed trigram + word vector of `text`, unit length (zeros if empty)."""
+    words = _WORD.findall((text or "").lower())
+    vec = np.zeros(dim, dtype=np.float32)
+    if not words:
+        return vec
+
+    padded = (" " + " ".join(words) + " ").encode("utf-8")
+    b = np.frombuffer(padded, dtype=np.uint8).astype(np.uint32)
+    if len(b) >= 3:
+        h = ((b[:-2] << 16) ^ (b[1:-1] << 8) ^ b[2:]) * _MULT
+        idx = (h >> 16) & (dim - 1)
+        sign = ((h >> 8) & 1).astype(np.float32) * 2 - 1
+        vec += np.bincount(idx, weights=sign, minlength=dim).astype(np.float32)
+
+    for word in set(words):
+        hv = zlib.crc32(word.encode("utf-8"))
+        vec[hv & (dim - 1)] += WORD_WEIGHT if hv >> 31 else -WORD_WEIGHT
+
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def _fingerprint(message: dict) -> int:
+    return zlib.crc32(f"{message.get('role')}\x00{message.get('content')}".encode("utf-8", "replace"))
+
+
+class MemoryStore:
+    """Append-only exchange store: vectors in a memmap, texts in JSON lines."""
+
+    def __init__(self, folder: str = MEMORY_DIR, dim: int = DIM):
+        self.folder = folder
+        self.dim = dim
+        self._lock = threading.Lock()
+        # Lock order: _sync_lock (a whole sync) -> _lock (matrix, texts) -> _file_lock (sync.json).
+        self._sync_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._vectors_path = os.path.join(folder, "vectors.f32")
+        self._texts_path = os.path.join(folder, "exchanges.jsonl")
+        self._sync_path = os.path.join(folder, "sync.json")
+
+        # The texts file is the source of truth; vectors missing after a
+        # crash are recomputed.
+        self._texts: List[Exchange] = []
+        if os.path.exists(self._texts_path):
+            with open(self._texts_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        user, answer = json.loads(line)
+                    except ValueError:
+                        break  # torn last line
+                    self._texts.append((user, answer))
+
+        stored = os.path.getsize(self._vectors_path) // (4 * dim) if os.path.exists(self._vectors_path) else 0
+        self._matrix: Optional[np.memmap] = None
+        self._open(max(GROW_ROWS, stored, len(self._texts)))
+        valid = min(self._valid_rows(), len(self._texts))
+        for i in range(valid, len(self._texts)):
+            self._matrix[i] = embed(" ".join(self._texts[i]), dim)
+        self._write_valid(len(self._texts))
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    # -- storage ----------------------------------------------------------
+
+    def _open(self, rows: int) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        size = rows * self.dim * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def _valid_rows(self) -> int:
+        try:
+            with open(self._sync_path, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("rows", 0))
+        except (OSError, ValueError):
+            return 0
+
+    def _read_sync(self) -> dict:
+        try:
+            with open(self._sync_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_sync(self, **values) -> None:
+        with self._file_lock:
+            data = self._read_sync()
+            data.update(values)
+            tmp = self._sync_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self._sync_path)
+
+    def _write_valid(self, rows: int) -> None:
+        self._write_sync(rows=rows)
+
+    # -- writing ----------------------------------------------------------
+
+    def add_many(self, exchanges: Iterable[Exchange]) -> int:
+        exchanges = [(str(u), str(a)) for u, a in exchanges if u or a]
+        if not exchanges:
+            return 0
+        vectors = [embed(f"{u} {a}", self.dim) for u, a in exchanges]
+        with self._lock:
+            start = len(self._texts)
+            end = start + len(exchanges)
+            if end > self._matrix.shape[0]:
+                self._open(max(end, self._matrix.shape[0] * 2))
+            self._matrix[start:end] = vectors
+            self._matrix.flush()
+            with open(self._texts_path, "a", encoding="utf-8") as f:
+                for exchange in exchanges:
+                    f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+            self._texts.extend(exchanges)
+            self._write_valid(end)
+        return len(exchanges)
+
+    def add(self, user: str, answer: str) -> int:
+        return self.add_many([(user, answer)])
+
+    def sync(self, messages: Sequence[dict]) -> int:
+        """Remember the user/assistant exchanges appended to a chat log since the last sync.
+
+        Read, add and write happen under one lock: the main loop and a
+        speculative reply may sync the same log at once, and both would
+        otherwise add the same new exchanges.
+        """
+        with self._sync_lock:
+            return self._sync(messages)
+
+    def _sync(self, messages: Sequence[dict]) -> int:
+        state = self._read_sync()
+        position = int(state.get("log_position") or 0)
+        if position > len(messages) or (
+            position and _fingerprint(messages[position - 1]) != state.get("log_last")
+        ):
+            position = 0  # log was reset or rewritten
+
+        exchanges: List[Exchange] = []
+        i = position
+        while i + 1 < len(messages):
+            if messages[i].get("role") == "user" and messages[i + 1].get("role") == "assistant":
+                exchanges.append((messages[i].get("content") or "", messages[i + 1].get("content") or ""))
+                i += 2
+            else:
+                i += 1
+        added = self.add_many(exchanges)
+        if i > 0:
+            self._write_sync(log_position=i, log_last=_fingerprint(messages[i - 1]))
+        return added
+
+    # -- searching --------------------------------------------------------
+
+    def search(self, text: str, k: int = 4, min_score: float = MIN_SCORE,
+               exclude_last: int = 0) -> List[Tuple[float, Exchange]]:
+        """Top-k past exchanges by cosine similarity, best first.
+
+        `exclude_last` skips the newest exchanges (already sent verbatim).
+        """
+        query = embed(text, self.dim)
+        with self._lock:
+            n = len(self._texts) - exclude_last
+            if n <= 0 or not query.any():
+                return []
+            scores = self._matrix[:n] @ query
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[i]), self._texts[i]) for i in top if scores[i] >= min_score]
+
+
+_store: Optional[MemoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> MemoryStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+        return _store
+
+
+def remember_new_turns(messages: Sequence[dict]) -> int:
+    """Call after writing the chat log; never raises (memory is best effort)."""
+    try:
+        return get_store().sync(messages)
+    except Exception as e:
+        print(f"Memory update error: {e!r}")
+        return 0
+
+
+def recall(query: str, k: int = 4, exclude_last: int = 0) -> List[Exchange]:
+    """Past exchanges relevant to `query`, trimmed to MAX_CHARS per message."""
+    try:
+        hits = get_store().search(query, k=k, exclude_last=exclude_last)
+    except Exception as e:
+        print(f"Memory recall error: {e!r}")
+        return []
+    return [(u[:MAX_CHARS], a[:MAX_CHARS]) for _, (u, a) in hits]
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def benchmark(n: int = 100_000) -> None:
+    import itertools
+    import random
+    import tempfile
+    import time
+
+    rng = random.Random(3)
+    vocab = [f"word{i}" for i in range(20_000)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocab))))
+
+    def sentence(k: int) -> str:
+        return " ".join(rng.choices(vocab, cum_weights=cum_weights, k=k))
+
+    known = [
+        ("what is the python programming language", "Python is a high-level programming language."),
+        ("how far is mars from the earth", "Mars is about 225 million km from Earth on average."),
+        ("give me a recipe for chicken biryani", "Marinate the chicken, par-boil the rice, layer and steam."),
+    ]
+    probes = ["tell me about python programming", "distance between earth and mars", "biryani recipe"]
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = MemoryStore(folder)
+        start = time.perf_counter()
+        for base in range(0, n, 10_000):
+            batch = [(sentence(rng.randint(5, 15)), sentence(rng.randint(10, 40)))
+                     for _ in range(min(10_000, n - base))]
+            store.add_many(batch)
+        store.add_many(known)
+        build = time.perf_counter() - start
+        print(f"embedded + stored {len(store):,} exchanges in {build:.1f} s "
+              f"({len(store) / build:,.0f}/s), {os.path.getsize(store._vectors_path) / 1e6:.0f} MB memmap")
+
+        queries = [sentence(8) for _ in range(60)]
+        for q in queries[:10]:
+            store.search(q, k=4)  # warm the page cache
+        samples = []
+        for q in queries[10:]:
+            t = time.perf_counter()
+            store.search(q, k=4)
+            samples.append(time.perf_counter() - t)
+        samples.sort()
+        print(f"top-4 search: p50 {samples[25] * 1000:.2f} ms  p99 {samples[-1] * 1000:.2f} ms")
+
+        samples = []
+        for _ in range(200):
+            t = time.perf_counter()
+            store.add(sentence(10), sentence(20))
+            samples.append(time.perf_counter() - t)
+        samples.sort()
+        print(f"append one exchange: p50 {samples[100] * 1000:.2f} ms  max {samples[-1] * 1000:.2f} ms")
+
+        for probe, (user, _) in zip(probes, known):
+            hits = store.search(probe, k=1)
+            found = hits[0][1][0] if hits else None
+            print(f"  {probe!r:40} -> {'OK' if found == user else 'MISS'} ({hits[0][0]:.2f})" if hits
+                  else f"  {probe!r:40} -> MISS")
+
+        t = time.perf_counter()
+        reopened = MemoryStore(folder)
+        print(f"reopen {len(reopened):,} exchanges: {(time.perf_counter() - t) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        rest = [a for a in sys.argv[1:] if a != "--bench"]
+        benchmark(int(rest[0]) if rest else 100_000)
+    else:
+        for score, (user, answer) in get_store().search(" ".join(sys.argv[1:]), k=5, min_score=0):
+            print(f"{score:.2f}  {user}  ->  {answer[:80]}")
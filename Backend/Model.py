@@ -1,52 +1,28 @@
-import cohere
 from rich import print
-from dotenv import dotenv_values
-from Backend.Automation import SendEmailSMTP
+from Backend.Config import get_env
+from Backend.EmailSpool import enqueue
 import json
 import re
-import smtplib
-from email.message import EmailMessage
 
 # Load env variables
-env_vars = dotenv_values(".env")
+env_vars = get_env()
 api_key = env_vars.get("Cohere_API_KEY")
 
-if not api_key:
-    raise ValueError("❌ No API key found. Make sure .env has Cohere_API_KEY=your_key")
+# The Cohere SDK is heavy to import, so the client is created on first use.
+co = None
 
-# Initialize Cohere client
-co = cohere.Client(api_key=api_key)
 
-def SendEmailSMTP(to_email: str, subject: str, body: str):
-    host = env_vars.get("SMTP_HOST")
-    port = int(env_vars.get("SMTP_PORT", "587"))
-    user = env_vars.get("SMTP_USER")
-    password = env_vars.get("SMTP_PASS")
-    use_tls = str(env_vars.get("SMTP_USE_TLS", "true")).lower() in ("1", "true", "yes", "y", "on")
-    from_addr = env_vars.get("SMTP_FROM") or user
-
-    if not all([host, port, user, password, from_addr]):
-        return "SMTP not configured. Set SMTP_HOST/PORT/USER/PASS/FROM in .env"
-
-    msg = EmailMessage()
-    msg["From"] = from_addr
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.set_content(body)
-
-    try:
-        with smtplib.SMTP(host, port, timeout=20) as server:
-            server.ehlo()
-            if use_tls:
-                server.starttls()
-                server.ehlo()
-            server.login(user, password)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        return f"Email failed: {e}"
+def get_co():
+    global co
+    if co is None:
+        import cohere
 
+        if not api_key:
+            raise ValueError("❌ No API key found. Make sure .env has Cohere_API_KEY=your_key")
 
+        # Initialize Cohere client
+        co = cohere.Client(api_key=api_key)
+    return co
 
 
 funcs_more = [
@@ -82,6 +58,7 @@ funcs = [
     "exit", "general", "realtime", "open", "close", "play", "generate image",
     "system", "content", "google search", "youtube search", "reminder","send email"
 ]
+_FUNC_PREFIXES = tuple(funcs)
 
 messages = []
 
@@ -162,7 +139,17 @@ PREFERRED_MODEL = "command-a-03-2025"
 FALLBACK_MODELS = ["command", "command-light"]
 
 
+def FilterTasks(response: str) -> list:
+    """Keep the lines of a DMM response that start with a known task prefix."""
+    lines = [line.strip() for line in response.replace("\r", "").split("\n")]
+    # str.startswith(tuple) checks every prefix in one C call.
+    return [task for task in lines if task and task.startswith(_FUNC_PREFIXES)]
+
+
 def FirstLayerDMM(prompt: str = "test"):
+    import cohere
+
+    co = get_co()
     messages.append({"role": "user", "content": f"{prompt}"})
 
     try:
@@ -199,16 +186,7 @@ def FirstLayerDMM(prompt: str = "test"):
         if event.event_type == "text-generation":
             response += event.text
 
-    response = response.replace("\r", "")
-    response = [line.strip() for line in response.split("\n") if line.strip()]
-
-    temp = []
-    for task in response:
-        for func in funcs:
-            if task.startswith(func):
-                temp.append(task)
-
-    response = temp
+    response = FilterTasks(response)
 
     if "(query)" in response:
         newresponse = FirstLayerDMM(prompt=prompt)
@@ -220,7 +198,7 @@ def ContentWriterAI_Email(instruction: str) -> dict:
     """
     Returns {"subject": "...", "body": "..."} as dict.
     """
-    resp = co.chat(
+    resp = get_co().chat(
         model=PREFERRED_MODEL,
         message=instruction,
         temperature=0.6,
@@ -282,22 +260,8 @@ def DraftThenSendEmail(cmd: str):
     subject = draft["subject"]
     body = draft["body"]
 
-    results = []
-    for r in recipients:
-        res = SendEmailSMTP(r, subject, body)
-        results.append((r, res))
-
-    ok = [r for r, res in results if res is True]
-    bad = [(r, res) for r, res in results if res is not True]
-
-    out = []
-    if ok:
-        out.append(f"✅ Sent to: {', '.join(ok)}")
-    if bad:
-        out.append("❌ Failed:")
-        for r, err in bad:
-            out.append(f"  - {r}: {err}")
-    return "\n".join(out)
+    job_id = enqueue(recipients, subject, body)
+    return f"📤 Queued for delivery to: {', '.join(recipients)} (job {job_id})"
 
 def parse_send_email(cmd: str):
     cmd = cmd.strip()
@@ -0,0 +1,309 @@
+"""Routing and answering of one query without the UI, microphone or TTS.
+
+``Main._process_query`` drives the Eel window: it speaks, asks follow-up
+questions and runs automation. :func:`run_query` follows the same routing
+(the rules below are shared with Main) but only *answers*: it takes the
+conversation so far as a list of messages, returns a :class:`Result`, and
+never reads or writes the shared chat log or answer cache, which belong to
+the local user. Anything with a side effect on this
+machine (automation, email, reminders, images, the user's own history) is
+reported in ``Result.skipped`` instead of being run, which is what the
+headless server and batch modes need.
+
+The models are reached through a :class:`Backends` object;
+:class:`StandInBackends` answers instantly (or after a fixed delay) without
+any API keys, for load tests and offline runs.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+# ----------------------------
+# Routing rules (shared with Main)
+# ----------------------------
+
+# Commands that should be sent to Automation()
+AUTOMATION_PREFIXES = [
+    "open",
+    "close",
+    "play",
+    "system",
+    "content",
+    "google search",
+    "youtube search",
+]
+
+REMINDER_PREFIXES = re.compile(r"^(?:remind me|set (?:a |an )?(?:reminder|alarm)|reminder)\b")
+EXIT_WORDS = frozenset({"exit", "quit", "bye", "goodbye"})
+
+IMAGE_WORDS = re.compile(r"\b(image|photo|picture|wallpaper)\b")
+_IMAGE_FILLER = re.compile(r"\b(show me|give me|generate|create|make|an|a|the|of|please)\b")
+_TEXT_TOO = re.compile(r"\b(tell\s+me|describe|explain|about|details|information|specs?|history|compare)\b")
+_SPLIT_PARTS = re.compile(r"\b(?:and then|then|and)\b|[;,]+")
+
+_QUESTION_STARTS = (
+    "how", "what", "who", "where", "when", "why", "which", "whose", "whom", "can you", "could you",
+    "would you", "is", "are", "do", "does", "did", "will", "shall", "may", "might",
+)
+
+
+def AnswerModifier(answer: str) -> str:
+    lines = (answer or "").split("\n")
+    non_empty = [ln for ln in lines if ln.strip()]
+    return "\n".join(non_empty)
+
+
+def QueryModifier(query: str) -> str:
+    q = (query or "").strip()
+    if not q:
+        return ""
+
+    # Detect if it's a question (best-effort)
+    is_question = q.endswith("?") or q.lower().startswith(_QUESTION_STARTS)
+
+    # strip trailing punctuation
+    q = re.sub(r"[\s\.\?!]+$", "", q).strip()
+    if not q:
+        return ""
+
+    q = q[0].upper() + q[1:] if len(q) > 1 else q.upper()
+    return q + ("?" if is_question else ".")
+
+
+def _norm_cmd(text: str) -> str:
+    t = (text or "").strip().lower()
+    t = re.sub(r"[\s\.,;:!\?]+$", "", t)
+    return t
+
+
+def _image_request_prompt(q_norm: str) -> Optional[str]:
+    """Prompt for requests like "supercar image" ("" if no subject), None if not one."""
+    if q_norm.startswith("generate image") or not IMAGE_WORDS.search(q_norm):
+        return None
+    # remove common filler words to form a clean prompt
+    return IMAGE_WORDS.sub("", _IMAGE_FILLER.sub("", q_norm)).strip()
+
+
+def is_email_command(q_norm: str) -> bool:
+    return q_norm.startswith("send email") or q_norm.startswith("email ")
+
+
+def is_pure_automation(q_norm: str) -> bool:
+    """A single open/close/play/... command, run without the decision model."""
+    return any(q_norm.startswith(p) for p in AUTOMATION_PREFIXES) and " and " not in q_norm and "," not in q_norm
+
+
+def fallback_decision(q_norm: str) -> List[str]:
+    """Task list in the decision model's format, used when it is unavailable."""
+    decision = []
+    for part in (p.strip() for p in _SPLIT_PARTS.split(q_norm)):
+        if not part:
+            continue
+        if part in EXIT_WORDS:
+            decision.append("exit")
+        elif is_email_command(part) or part.startswith("generate image") or REMINDER_PREFIXES.match(part):
+            decision.append(part)
+        elif any(part.startswith(p) for p in AUTOMATION_PREFIXES):
+            decision.append(part)
+        else:
+            decision.append(f"general {part}")
+    # Several general parts are answered together, as Main does.
+    general = [t.removeprefix("general ") for t in decision if t.startswith("general ")]
+    tasks = [t for t in decision if not t.startswith("general ")]
+    return tasks + ([f"general {' '.join(general)}"] if general else [])
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+
+class Backends:
+    """The real models: Cohere decision model, Groq chat and search."""
+
+    def decide(self, query: str) -> List[str]:
+        from Backend.Model import FirstLayerDMM
+        decision = FirstLayerDMM(query)
+        return decision if isinstance(decision, list) else []
+
+    def chat(self, query: str, messages: Sequence[dict]) -> str:
+        from Backend.Chatbot import ChatReply
+        # Recalled memory is the local user's; sessions only get their own turns.
+        return ChatReply(query, list(messages), use_memory=False)
+
+    def search(self, query: str, messages: Sequence[dict]) -> str:
+        from Backend.RealtimeSearchEngine import SearchReply
+        answer = SearchReply(query, list(messages))
+        return answer if answer is not None else "I'm temporarily rate-limited. Please try again."
+
+    def realtime(self, query: str) -> Optional[str]:
+        from Backend.RealtimeAPIs import try_handle_realtime
+        return try_handle_realtime(query)
+
+
+class StandInBackends(Backends):
+    """Deterministic answers after a fixed delay; no network, no keys."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def decide(self, query: str) -> List[str]:
+        self._wait()
+        return fallback_decision(_norm_cmd(query))
+
+    def chat(self, query: str, messages: Sequence[dict]) -> str:
+        self._wait()
+        return f"(stand-in answer to: {query}) [{len(messages)} earlier messages]"
+
+    def search(self, query: str, messages: Sequence[dict]) -> str:
+        self._wait()
+        return f"(stand-in search result for: {query})"
+
+    def realtime(self, query: str) -> Optional[str]:
+        return None
+
+
+# ----------------------------
+# Running a query
+# ----------------------------
+
+@dataclass
+class Result:
+    query: str
+    route: str                      # exit, local, realtime-tool, general, realtime, tasks, error
+    answer: str = ""
+    decision: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)   # side-effect tasks not run headless
+    timings: Dict[str, float] = field(default_factory=dict)  # stage -> milliseconds
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "route": self.route,
+            "answer": self.answer,
+            "decision": self.decision,
+            "skipped": self.skipped,
+            "timings": self.timings,
+            "error": self.error,
+        }
+
+
+def _is_side_effect(task: str) -> bool:
+    return (
+        is_email_command(task)
+        or task.startswith("generate image")
+        or task.startswith("reminder")
+        or any(task.startswith(p) for p in AUTOMATION_PREFIXES)
+    )
+
+
+def _local_only(q_norm: str) -> Optional[str]:
+    """Description of a query that only makes sense on the user's machine."""
+    if is_email_command(q_norm):
+        return "email"
+    try:
+        from Backend.ChatHistory import parse_history_command
+        if parse_history_command(q_norm):
+            return "history search"
+    except Exception:
+        pass
+    if REMINDER_PREFIXES.match(q_norm):
+        return "reminder"
+    if _image_request_prompt(q_norm) is not None or q_norm.startswith("generate image"):
+        return "image generation"
+    if is_pure_automation(q_norm):
+        return "automation"
+    return None
+
+
+def run_query(query: str, messages: Sequence[dict] = (), backends: Optional[Backends] = None) -> Result:
+    """Route and answer `query` given the conversation so far (not modified)."""
+    backends = backends or Backends()
+    started = time.perf_counter()
+    result = Result(query=(query or "").strip(), route="")
+    timings = result.timings
+
+    def stage(name: str, since: float) -> float:
+        now = time.perf_counter()
+        timings[name] = round((now - since) * 1000, 3)
+        return now
+
+    try:
+        t = started
+        q_norm = _norm_cmd(result.query)
+        if not q_norm:
+            result.route = "empty"
+            return result
+
+        # Direct intents (no DMM)
+        if q_norm in EXIT_WORDS:
+            result.route, result.answer = "exit", "Okay, bye!"
+            return result
+        local = _local_only(q_norm)
+        t = stage("route", t)
+        if local:
+            result.route, result.skipped = "local", [q_norm]
+            result.answer = f"That needs the assistant on your computer ({local}); it isn't run here."
+            return result
+
+        # Accuracy-sensitive real-time tools (currency / weather)
+        tool_answer = backends.realtime(result.query)
+        t = stage("realtime_tools", t)
+        if tool_answer:
+            result.route, result.answer = "realtime-tool", AnswerModifier(tool_answer)
+            return result
+
+        # Decision model routing
+        try:
+            decision = backends.decide(result.query)
+        except Exception as e:
+            result.error = f"decision model unavailable: {e}"
+            decision = fallback_decision(q_norm)
+        result.decision = list(decision)
+        t = stage("decide", t)
+
+        result.skipped = [task for task in decision if _is_side_effect(task)]
+        answers = [task for task in decision if task.startswith(("general", "realtime"))]
+        if "exit" in decision:
+            result.route, result.answer = "exit", "Okay, bye!"
+            return result
+
+        # Image-only request: no chatbot answer on top (see Main).
+        if any(task.startswith("generate image") for task in decision) and not _TEXT_TOO.search(q_norm):
+            answers = []
+
+        G = any(task.startswith("general") for task in answers)
+        R = any(task.startswith("realtime") for task in answers)
+        if G and R:
+            merged = " and ".join(" ".join(task.split()[1:]).strip() for task in answers).strip()
+            result.route = "realtime"
+            result.answer = AnswerModifier(backends.search(QueryModifier(merged or result.query), messages))
+        elif G:
+            task = next(task for task in answers if task.startswith("general"))
+            q_final = task.removeprefix("general").strip() or result.query
+            result.route = "general"
+            result.answer = AnswerModifier(backends.chat(q_final, messages))
+        elif R:
+            result.route = "realtime"
+            result.answer = AnswerModifier(backends.search(result.query, messages))
+        elif result.skipped:
+            result.route = "tasks"
+            result.answer = "Those tasks need the assistant on your computer; they weren't run here."
+        else:
+            result.route = "general"
+            result.answer = AnswerModifier(backends.chat(result.query, messages))
+        stage("answer", t)
+    except Exception as e:
+        result.route, result.error = "error", repr(e)
+        result.answer = f"Sorry, something went wrong: {e}"
+    finally:
+        timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
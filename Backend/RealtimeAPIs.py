@@ -13,54 +13,119 @@ APIs used (no key required):
 from __future__ import annotations
 
 import re
-from typing import Optional, Tuple
+import time
+from typing import List, Optional, Tuple
 
-import requests
+# `requests` is imported inside the fetch helpers: every query passes through
+# the parsers below, but only currency/weather queries need the network.
 
 
 # -----------------------------
 # Currency
 # -----------------------------
 
-_CURRENCY_CODE_RE = re.compile(r"\b([A-Z]{3})\b")
+_CURRENCY_CODE_RE = re.compile(r"\b([A-Za-z]{3})\b|([$€£¥₹৳₩₽₺])")
+_AMOUNT_RE = re.compile(r"(?<![\w.])(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)(?![\w.])")
+_SEPARATOR_RE = re.compile(r"\s(?:TO|IN|INTO|AS)\s|=|->|→", re.I)
+
+# ISO 4217 codes the rate API knows. Anything else that looks like a
+# three-letter word ("HOW", "AND") is not a currency.
+CURRENCY_CODES = frozenset("""
+AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP BYN BZD
+CAD CDF CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD
+GNF GTQ GYD HKD HNL HRK HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD
+KZT LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK
+NPR NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SLL SOS
+SRD SSP STN SYP SZL THB TJS TMT TND TOP TRY TTD TVD TWD TZS UAH UGX USD UYU UZS VES VND VUV WST XAF
+XCD XOF XPF YER ZAR ZMW ZWL
+""".split())
+# Codes that are also everyday words only count when typed in capitals.
+_AMBIGUOUS_CODES = frozenset({"ALL", "TOP", "CUP", "MOP", "TRY", "BAM", "GEL", "PEN", "MAD", "SOS", "CAD", "LAK"})
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR", "৳": "BDT",
+                     "₩": "KRW", "₽": "RUB", "₺": "TRY"}
+_CURRENCY_WORDS_RE = re.compile(
+    r"\b(?:exchange|rates?|convert|conversion|currency|currencies|how much|worth|value|price)\b", re.I
+)
+
+
+def _currency_codes(text: str) -> List[Tuple[int, str, bool]]:
+    """(position, CODE, typed as capitals or a symbol) for every currency code in `text`."""
+    found = []
+    for m in _CURRENCY_CODE_RE.finditer(text):
+        word = m.group(1)
+        if word is None:
+            found.append((m.start(), _CURRENCY_SYMBOLS[m.group(2)], True))
+            continue
+        code = word.upper()
+        if code in CURRENCY_CODES and (code not in _AMBIGUOUS_CODES or word.isupper()):
+            found.append((m.start(), code, word.isupper()))
+    return found
+
+
+def _amounts(text: str) -> List[float]:
+    amounts = []
+    for m in _AMOUNT_RE.finditer(text):
+        try:
+            amounts.append(float(m.group(1).replace(",", "")))
+        except ValueError:
+            pass
+    return amounts
 
 
-def _parse_currency_query(prompt: str) -> Optional[Tuple[float, str, str]]:
-    """Return (amount, base, quote) if prompt looks like a currency conversion."""
+def _parse_currency_request(prompt: str) -> Optional[Tuple[List[float], str, List[str]]]:
+    """Return (amounts, base, targets) for a currency conversion request.
+
+    "convert 100 USD to EUR, GBP, JPY and BDT" -> ([100.0], "USD", ["EUR", "GBP", "JPY", "BDT"])
+    "100 and 250 usd in eur"                   -> ([100.0, 250.0], "USD", ["EUR"])
+    "usd to eur 100"                           -> ([100.0], "USD", ["EUR"])
+
+    Lower-case codes only count next to a currency word or an amount, so
+    "tell bob to call ron" is not BOB -> RON.
+    """
     text = (prompt or "").strip()
     if not text:
         return None
 
-    upper = text.upper()
-
-    # Amount (default 1)
-    amount = 1.0
-    m_amt = re.search(r"\b(\d+(?:\.\d+)?)\b", upper)
-    if m_amt:
-        try:
-            amount = float(m_amt.group(1))
-        except Exception:
-            amount = 1.0
-
-    # "USD to BDT" / "USD in BDT"
-    m = re.search(r"\b([A-Z]{3})\b\s*(?:TO|IN|=|->)\s*\b([A-Z]{3})\b", upper)
-    if m:
-        base, quote = m.group(1), m.group(2)
-        return amount, base, quote
+    codes = _currency_codes(text)
+    if len(codes) < 2:
+        return None
+    keyword = _CURRENCY_WORDS_RE.search(text)
+    if not (keyword or _AMOUNT_RE.search(text) or any(explicit for _, _, explicit in codes)):
+        return None
 
-    # If contains keywords: "exchange rate USD BDT"
-    codes = _CURRENCY_CODE_RE.findall(upper)
-    if len(codes) >= 2 and any(k in upper for k in ("EXCHANGE", "RATE", "CONVERT", "HOW MUCH", "VALUE", "PRICE")):
-        return amount, codes[0], codes[1]
+    sep = _SEPARATOR_RE.search(text)
+    if sep:
+        before = [c for pos, c, _ in codes if pos < sep.start()]
+        after = [c for pos, c, _ in codes if pos >= sep.end()]
+        if not before or not after:
+            return None
+        base, targets = before[-1], after
+        amounts = _amounts(text[:sep.start()]) or _amounts(text[sep.end():])  # "usd to eur 100"
+    else:
+        # "exchange rate USD BDT" / "USD BDT"
+        if not keyword and len(text.split()) > 4:
+            return None
+        base, targets = codes[0][1], [c for _, c, _ in codes[1:]]
+        amounts = _amounts(text)
+
+    targets = list(dict.fromkeys(t for t in targets if t != base))  # dedupe, keep order
+    if not targets:
+        return None
+    return (amounts or [1.0]), base, targets
 
-    # If user types "USD BDT" only
-    if len(codes) == 2 and len(upper.split()) <= 4:
-        return amount, codes[0], codes[1]
 
-    return None
+def _parse_currency_query(prompt: str) -> Optional[Tuple[float, str, str]]:
+    """Return (amount, base, quote) if prompt looks like a currency conversion."""
+    parsed = _parse_currency_request(prompt)
+    if not parsed:
+        return None
+    amounts, base, targets = parsed
+    return amounts[0], base, targets[0]
 
 
 def _get_rates(base: str, timeout: float = 10.0) -> dict:
+    import requests
+
     url = f"https://open.er-api.com/v6/latest/{base}"
     r = requests.get(url, timeout=timeout)
     r.raise_for_status()
@@ -79,35 +144,135 @@ def _get_rates(base: str, timeout: float = 10.0) -> dict:
     return data
 
 
+RATE_TABLE_MAX_AGE = 3600.0  # used when the API doesn't say when it updates next
+
+
+def _fetch_rate_table(base: str) -> Tuple[dict, float]:
+    """Fetcher for the snapshot store: (data, expires_at).
+
+    The API publishes once a day (time_next_update_unix); a table is fresh
+    until then.
+    """
+    data = _get_rates(base)
+    now = time.time()
+    expires = float(data.get("time_next_update_unix") or 0) or now + RATE_TABLE_MAX_AGE
+    return data, max(expires, now + 60)
+
+
+def _cross_table(data: dict, base: str) -> Optional[dict]:
+    """`data` re-based on `base` via cross rates, if it quotes `base`."""
+    rates = data["rates"]
+    pivot = float(rates.get(base) or 0)
+    if not pivot:
+        return None
+    derived = dict(data)
+    derived["base_code"] = base
+    derived["rates"] = {code: float(r) / pivot for code, r in rates.items()}
+    return derived
+
+
+def _rate_table(base: str) -> Tuple[dict, Optional[float]]:
+    """(rates for `base`, stale_age): a fresh snapshot for `base`, one derived
+    from another fresh table (cross rates), or the snapshot store's
+    stale-while-revalidate answer."""
+    from Backend.RealtimeSnapshots import OfflineError, cached_fetch, get_store
+
+    store = get_store()
+    snap = store.get("rates", base)
+    if snap is None or not snap.fresh():
+        for other, other_snap in store.items("rates"):
+            derived = _cross_table(other_snap.data, base) if other_snap.fresh() else None
+            if derived:
+                return derived, None
+
+    try:
+        return cached_fetch("rates", base, lambda: _fetch_rate_table(base))
+    except OfflineError:
+        # No table for `base` at all: the newest table that quotes it will do.
+        for other, other_snap in sorted(store.items("rates"), key=lambda kv: -kv[1].fetched_at):
+            derived = _cross_table(other_snap.data, base)
+            if derived:
+                return derived, other_snap.age()
+        raise
+
+
+def rates_expiry(base: str) -> Optional[float]:
+    """When the saved table for `base` goes stale (None if none is saved)."""
+    from Backend.RealtimeSnapshots import get_store
+
+    snap = get_store().get("rates", base)
+    return snap.expires_at if snap else None
+
+
+def refresh_rates(base: str) -> bool:
+    from Backend.RealtimeSnapshots import refresh
+
+    return refresh("rates", base, lambda: _fetch_rate_table(base)) is not None
+
+
+def _fmt(x: float) -> str:
+    if x == 0:
+        return "0"
+    if abs(x) >= 1:
+        return f"{x:,.4f}".rstrip("0").rstrip(".")
+    return f"{x:.8f}".rstrip("0").rstrip(".")
+
+
+def convert_all(amounts: List[float], targets: List[str], rates: dict):
+    """Every amount x every target in one vectorized pass.
+
+    Returns (matrix[len(targets), len(amounts)], unit rates, missing codes).
+    """
+    import numpy as np  # imported here: only conversions need it
+
+    known = [t for t in targets if t in rates]
+    missing = [t for t in targets if t not in rates]
+    unit = np.array([float(rates[t]) for t in known], dtype=np.float64)
+    matrix = np.outer(unit, np.asarray(amounts, dtype=np.float64))
+    return known, unit, matrix, missing
+
+
 def currency_answer(prompt: str) -> Optional[str]:
-    parsed = _parse_currency_query(prompt)
+    parsed = _parse_currency_request(prompt)
     if not parsed:
         return None
 
-    amount, base, quote = parsed
-    try:
-        data = _get_rates(base)
-        rates = data["rates"]
-        if quote not in rates:
-            return f"I can’t find a rate for {quote}. Use a valid 3-letter code (e.g., USD, EUR, BDT)."
+    from Backend.RealtimeSnapshots import OfflineError, stale_note
 
-        rate = float(rates[quote])
-        converted = amount * rate
+    from Backend.RealtimePrefetch import record
+
+    amounts, base, targets = parsed
+    record("rates", base)
+    try:
+        data, age = _rate_table(base)
+        known, unit, matrix, missing = convert_all(amounts, targets, data["rates"])
+        if not known:
+            return f"I can’t find a rate for {', '.join(missing)}. Use a valid 3-letter code (e.g., USD, EUR, BDT)."
 
         stamp = str(data.get("time_last_update_utc") or "").strip()
         stamp_line = f"\nLast update (UTC): {stamp}" if stamp else ""
-
-        def _fmt(x: float) -> str:
-            if x == 0:
-                return "0"
-            if abs(x) >= 1:
-                return f"{x:,.4f}".rstrip("0").rstrip(".")
-            return f"{x:.8f}".rstrip("0").rstrip(".")
-
-        return (
-            f"{_fmt(amount)} {base} = {_fmt(converted)} {quote}\n"
-            f"Rate: 1 {base} = {_fmt(rate)} {quote}{stamp_line}"
-        )
+        missing_line = f"\nNo rate for: {', '.join(missing)}" if missing else ""
+        footer = stamp_line + missing_line + stale_note(age)
+
+        # One pair: the familiar two-line answer.
+        if len(known) == 1 and len(amounts) == 1:
+            quote = known[0]
+            return (
+                f"{_fmt(amounts[0])} {base} = {_fmt(matrix[0, 0])} {quote}\n"
+                f"Rate: 1 {base} = {_fmt(unit[0])} {quote}{footer}"
+            )
+
+        # Several targets and/or amounts: a compact table, one row per target.
+        header = [base] + [_fmt(a) for a in amounts] + ["rate"]
+        rows = [[code] + [_fmt(v) for v in matrix[i]] + [_fmt(unit[i])] for i, code in enumerate(known)]
+        widths = [max(len(r[c]) for r in [header] + rows) for c in range(len(header))]
+        lines = [
+            "  ".join(cell.ljust(w) if c == 0 else cell.rjust(w) for c, (cell, w) in enumerate(zip(r, widths)))
+            for r in [header] + rows
+        ]
+        return "\n".join(lines) + footer
+    except OfflineError:
+        return f"I’m offline and have no saved exchange rates for {base}."
     except Exception as e:
         return f"Currency lookup failed: {e}"
 
@@ -170,7 +335,13 @@ _WEATHER_CODE = {
 }
 
 
+GEOCODE_MAX_AGE = 30 * 24 * 3600.0  # places don't move
+FORECAST_MAX_AGE = 15 * 60.0        # open-meteo's "current" values are 15-minutely
+
+
 def _geocode(place: str, timeout: float = 10.0) -> Optional[dict]:
+    import requests
+
     url = "https://geocoding-api.open-meteo.com/v1/search"
     params = {"name": place, "count": 1, "language": "en", "format": "json"}
     r = requests.get(url, params=params, timeout=timeout)
@@ -182,36 +353,99 @@ def _geocode(place: str, timeout: float = 10.0) -> Optional[dict]:
     return None
 
 
+def _get_forecast(lat: float, lon: float, timeout: float = 10.0) -> dict:
+    import requests
+
+    url = "https://api.open-meteo.com/v1/forecast"
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m",
+        "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code",
+        "forecast_days": 3,
+        "timezone": "auto",
+    }
+    r = requests.get(url, params=params, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+
+def _place_key(place: str) -> str:
+    return " ".join(place.lower().split())
+
+
+def _forecast_key(geo: dict) -> str:
+    return f"{float(geo['latitude']):.2f},{float(geo['longitude']):.2f}"
+
+
+def _weather_for(place: str) -> Tuple[Optional[dict], Optional[dict], Optional[float]]:
+    """(geocode, forecast, stale_age) through the snapshot store."""
+    from Backend.RealtimeSnapshots import cached_fetch
+
+    # A failed geocode is stored as {} so unknown places aren't retried every time.
+    geo, _ = cached_fetch("geo", _place_key(place),
+                          lambda: (_geocode(place) or {}, time.time() + GEOCODE_MAX_AGE))
+    if not geo:
+        return None, None, None
+
+    lat, lon = geo["latitude"], geo["longitude"]
+    data, age = cached_fetch("forecast", _forecast_key(geo),
+                             lambda: (_get_forecast(lat, lon), time.time() + FORECAST_MAX_AGE))
+    return geo, data, age
+
+
+def weather_expiry(place: str) -> Optional[float]:
+    """When the saved forecast for `place` goes stale (None if none is saved)."""
+    from Backend.RealtimeSnapshots import get_store
+
+    store = get_store()
+    geo = store.get("geo", _place_key(place))
+    if geo is None:
+        return None
+    if not geo.data:
+        return geo.expires_at  # unknown place: only worth retrying the geocode
+    forecast = store.get("forecast", _forecast_key(geo.data))
+    if forecast is None:
+        return None
+    return min(forecast.expires_at, geo.expires_at)
+
+
+def refresh_weather(place: str) -> bool:
+    from Backend.RealtimeSnapshots import get_store, refresh
+
+    store = get_store()
+    key = _place_key(place)
+    geo = store.get("geo", key)
+    if geo is None or not geo.fresh():
+        geo = refresh("geo", key, lambda: (_geocode(place) or {}, time.time() + GEOCODE_MAX_AGE))
+        if geo is None:
+            return False
+    if not geo.data:
+        return True  # unknown place; nothing to forecast
+    lat, lon = geo.data["latitude"], geo.data["longitude"]
+    return refresh("forecast", _forecast_key(geo.data),
+                   lambda: (_get_forecast(lat, lon), time.time() + FORECAST_MAX_AGE)) is not None
+
+
 def weather_answer(prompt: str) -> Optional[str]:
     place = _parse_weather_query(prompt)
     if not place:
         return None
 
+    from Backend.RealtimePrefetch import record
+    from Backend.RealtimeSnapshots import OfflineError, stale_note
+
+    record("weather", _place_key(place))
     try:
-        geo = _geocode(place)
+        geo, data, age = _weather_for(place)
         if not geo:
             return f"I couldn’t find a location called '{place}'. Try '{place}, Bangladesh'."
 
-        lat = geo["latitude"]
-        lon = geo["longitude"]
         name = geo.get("name") or place
         admin1 = geo.get("admin1")
         country = geo.get("country")
         label = ", ".join([p for p in [name, admin1, country] if p])
 
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m",
-            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code",
-            "forecast_days": 3,
-            "timezone": "auto",
-        }
-        r = requests.get(url, params=params, timeout=10.0)
-        r.raise_for_status()
-        data = r.json()
-
         cur = data.get("current") or {}
         temp = cur.get("temperature_2m")
         feels = cur.get("apparent_temperature")
@@ -260,7 +494,9 @@ def weather_answer(prompt: str) -> Optional[str]:
         if updated:
             out += updated
 
-        return out
+        return out + stale_note(age)
+    except OfflineError:
+        return f"I’m offline and have no saved weather for {place}."
     except Exception as e:
         return f"Weather lookup failed: {e}"
 
@@ -269,6 +505,11 @@ def weather_answer(prompt: str) -> Optional[str]:
 # Router
 # -----------------------------
 
+def is_realtime_tool_query(prompt: str) -> bool:
+    """Whether try_handle_realtime would answer `prompt` (parsing only, no network)."""
+    return _parse_currency_request(prompt) is not None or bool(_parse_weather_query(prompt))
+
+
 def try_handle_realtime(prompt: str) -> Optional[str]:
     """Return an answer if prompt is currency/weather, else None."""
     ans = currency_answer(prompt)
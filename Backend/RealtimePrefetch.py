@@ -0,0 +1,293 @@
+"""Keep the snapshots of the most asked-for currencies and places fresh.
+
+Nearly every realtime query is one of a few currency pairs or the weather
+at home or work. :func:`record` counts each currency base and place that
+:mod:`Backend.RealtimeAPIs` answers for (counts decay with a half-life of
+``HALF_LIFE`` so habits can change), seeded from the chat log on first
+run. A background thread then refreshes the top ``TOP_N`` of each ahead
+of need, on each API's own cadence:
+
+- a rate table right after the API publishes the next one
+  (``time_next_update_unix``), since fetching earlier returns the same table;
+- a forecast shortly before its snapshot goes stale (15-minute data).
+
+Common queries are then answered from memory with no network wait. The
+counts are stored in ``Data/RealtimePrefetch.json``.
+
+    python -m Backend.RealtimePrefetch        # show what would be prefetched and when
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+STATS_PATH = os.path.join("Data", "RealtimePrefetch.json")
+HALF_LIFE = 14 * 24 * 3600.0
+TOP_N = 3
+MIN_SCORE = 2.0           # asked about at least about twice recently
+RATES_PUBLISH_DELAY = 120.0   # after time_next_update_unix, for the new table to appear
+FORECAST_LEAD = 60.0          # before a forecast goes stale
+RETRY_SECONDS = 300.0
+SAVE_EVERY = 30.0
+
+KINDS = ("rates", "weather")
+
+
+class QueryStats:
+    """Exponentially decayed counts per (kind, key)."""
+
+    def __init__(self, path: Optional[str] = STATS_PATH, half_life: float = HALF_LIFE):
+        self.path = path
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._scores: Dict[str, Dict[str, Tuple[float, float]]] = {kind: {} for kind in KINDS}  # key -> (score, at)
+        self._saved_at = 0.0
+        self.loaded = self._load()
+
+    def _load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(raw, dict):
+            return False  # not a file this version wrote: start empty
+        for kind, entries in raw.items():
+            if not isinstance(entries, dict):
+                continue
+            scores = self._scores.setdefault(kind, {})
+            for key, value in entries.items():
+                try:
+                    s, at = value
+                    scores[key] = (float(s), float(at))
+                except (TypeError, ValueError):
+                    continue  # skip a bad entry, keep the rest
+        return True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            raw = {kind: {key: list(v) for key, v in entries.items()} for kind, entries in self._scores.items()}
+            self._saved_at = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _decayed(self, score: float, at: float, now: float) -> float:
+        return score * math.pow(0.5, max(0.0, now - at) / self.half_life)
+
+    def record(self, kind: str, key: str, now: Optional[float] = None, weight: float = 1.0) -> None:
+        now = now or time.time()
+        with self._lock:
+            entries = self._scores.setdefault(kind, {})
+            score, at = entries.get(key, (0.0, now))
+            entries[key] = (self._decayed(score, at, now) + weight, now)
+            due_save = now - self._saved_at >= SAVE_EVERY
+        if due_save:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"Prefetch stats not saved: {e!r}")
+
+    def top(self, kind: str, n: int = TOP_N, min_score: float = MIN_SCORE) -> List[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            scored = [(key, self._decayed(s, at, now)) for key, (s, at) in self._scores.get(kind, {}).items()]
+        scored = [(key, s) for key, s in scored if s >= min_score]
+        scored.sort(key=lambda ks: -ks[1])
+        return scored[:n]
+
+
+# kind -> (expires_at(key) or None if nothing saved, refresh(key) -> success, lead)
+Source = Tuple[Callable[[str], Optional[float]], Callable[[str], bool], float]
+
+
+def _sources() -> Dict[str, Source]:
+    from Backend import RealtimeAPIs
+
+    return {
+        "rates": (RealtimeAPIs.rates_expiry, RealtimeAPIs.refresh_rates, -RATES_PUBLISH_DELAY),
+        "weather": (RealtimeAPIs.weather_expiry, RealtimeAPIs.refresh_weather, FORECAST_LEAD),
+    }
+
+
+class Prefetcher:
+    """Refreshes the popular keys' snapshots when they are due."""
+
+    def __init__(self, stats: QueryStats, sources: Optional[Dict[str, Source]] = None,
+                 top_n: int = TOP_N, min_score: float = MIN_SCORE):
+        self.stats = stats
+        self.sources = sources
+        self.top_n = top_n
+        self.min_score = min_score
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._retry_at: Dict[Tuple[str, str], float] = {}
+        self.refreshes = self.failures = 0
+
+    def plan(self, now: Optional[float] = None) -> List[Tuple[float, str, str]]:
+        """(due, kind, key) for every popular key, soonest first."""
+        now = now or time.time()
+        sources = self.sources or {}
+        due = []
+        for kind, (expiry, _, lead) in sources.items():
+            for key, _ in self.stats.top(kind, self.top_n, self.min_score):
+                expires = expiry(key)
+                at = now if expires is None else expires - lead
+                due.append((max(at, self._retry_at.get((kind, key), 0.0)), kind, key))
+        due.sort()
+        return due
+
+    def run_due(self, now: Optional[float] = None) -> float:
+        """Refresh everything due; returns when the next key will be due."""
+        from Backend.RealtimeSnapshots import is_offline
+
+        now = now or time.time()
+        if is_offline():
+            return now + RETRY_SECONDS
+        for at, kind, key in self.plan(now):
+            if at > now:
+                return at
+            if self._stopped:
+                break
+            ok = False
+            try:
+                ok = self.sources[kind][1](key)
+            except Exception as e:
+                print(f"Prefetch of {kind}/{key} failed: {e!r}")
+            if ok:
+                self.refreshes += 1
+                self._retry_at.pop((kind, key), None)
+            else:
+                self.failures += 1
+                self._retry_at[(kind, key)] = time.time() + RETRY_SECONDS
+        plan = self.plan()
+        return plan[0][0] if plan else time.time() + RETRY_SECONDS
+
+    def _run(self) -> None:
+        if self.sources is None:
+            self.sources = _sources()
+        while True:
+            next_at = self.run_due()
+            with self._cond:
+                if self._stopped:
+                    return
+                self._cond.wait(timeout=max(1.0, next_at - time.time()))
+                if self._stopped:
+                    return
+
+    def wake(self) -> None:
+        """Re-plan now (e.g. after a new key became popular)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="realtime-prefetch")
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        try:
+            self.stats.save()
+        except OSError:
+            pass
+
+
+_stats: Optional[QueryStats] = None
+_prefetcher: Optional[Prefetcher] = None
+_lock = threading.Lock()
+_recording = True
+
+
+def get_stats() -> QueryStats:
+    global _stats
+    with _lock:
+        if _stats is None:
+            _stats = QueryStats()
+        return _stats
+
+
+def record(kind: str, key: str) -> None:
+    """Count a realtime query; never raises (prefetch is best effort)."""
+    if not _recording:
+        return
+    try:
+        stats = get_stats()
+        was_top = key in dict(stats.top(kind))
+        stats.record(kind, key)
+        if _prefetcher is not None and not was_top and key in dict(stats.top(kind)):
+            _prefetcher.wake()
+    except Exception as e:
+        print(f"Prefetch stats error: {e!r}")
+
+
+def set_recording(value: bool) -> None:
+    """Stop (or resume) counting queries, e.g. for batch runs."""
+    global _recording
+    _recording = bool(value)
+
+
+def learn_from_log(messages: Sequence[dict], stats: Optional[QueryStats] = None) -> int:
+    """Seed the counts from the user's past questions; returns how many counted."""
+    from Backend.RealtimeAPIs import _parse_currency_request, _parse_weather_query, _place_key
+
+    stats = stats or get_stats()
+    counted = 0
+    for message in messages:
+        if message.get("role") != "user":
+            continue
+        text = message.get("content") or ""
+        currency = _parse_currency_request(text)
+        if currency:
+            stats.record("rates", currency[1])
+            counted += 1
+            continue
+        place = _parse_weather_query(text)
+        if place:
+            stats.record("weather", _place_key(place))
+            counted += 1
+    return counted
+
+
+def start(messages: Sequence[dict] = ()) -> Prefetcher:
+    """Start the prefetch thread; `messages` (the chat log) seed a first run."""
+    global _prefetcher
+    stats = get_stats()
+    if not stats.loaded and messages:
+        learn_from_log(messages, stats)
+        stats.save()
+        stats.loaded = True
+    with _lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(stats)
+        _prefetcher.start()
+        return _prefetcher
+
+
+if __name__ == "__main__":
+    stats = get_stats()
+    prefetcher = Prefetcher(stats, _sources())
+    now = time.time()
+    for kind in KINDS:
+        for key, score in stats.top(kind, TOP_N, 0.0):
+            print(f"{kind:8} {key:24} score {score:5.1f}")
+    for at, kind, key in prefetcher.plan(now):
+        print(f"due in {max(0.0, at - now) / 60:7.1f} min: {kind}/{key}")
@@ -1,24 +1,29 @@
-from googlesearch import search
-from groq import Groq #Importing the Groq library to use its API.
 from json import load, dump #Importing functions to read and write JSON files.
 import datetime #Importing the datetime nodule for real-time date and time information.
-from dotenv import dotenv_values #Importing dotenv values to read environment variables from a env file.
-from groq import APIError
+from Backend.Config import get_env # Cached .env settings shared by all backends.
 import time
 import re
 import os
 from Backend.RealtimeAPIs import try_handle_realtime
+from Backend.ChatHistory import index_new_turns
 
 # Load environment variables from the .env file.
-env_vars = dotenv_values(".env")
+env_vars = get_env()
 
 #Retrieve environment variables for the chatbot configuration.
 Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
 GroqAPIKey = env_vars.get("GroqAPIKey")
 
-# Initialize the Groq client with the provided API key. Groq(api_key-GroqAPIKey)
-client = Groq(api_key=GroqAPIKey)
+# The Groq client is created on first use (the SDK is slow to import).
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        from groq import Groq #Importing the Groq library to use its API.
+        client = Groq(api_key=GroqAPIKey)
+    return client
 
 CHATLOG_PATH = os.path.join("Data", "ChatLog.json")
 
@@ -37,6 +42,7 @@ except:
     
 # Function to perform a Google search and format the results.
 def GoogleSearch(query):
+    from googlesearch import search
     results = list (search (query, advanced=True, num_results=5))
     Answer = f"The search results for '{query}' are:\n[start]\n"
     
@@ -79,29 +85,10 @@ def Information():
     data += f"Time: {hour} hours, {minute} minutes, {second} seconds.\n"
     return data
     
-#Function to handle real-time search and response generation.
-def RealtimeSearchEngine(prompt):
-    global SystemChatBot, messages
-    
-    # 1) Try accuracy-sensitive handlers FIRST (no LLM, no Google snippets)
-    tool_answer = try_handle_realtime(prompt)
-    if tool_answer:
-        # Persist to chat log so the UI history stays consistent
-        with open(CHATLOG_PATH, "r") as f:
-            messages = load(f)
-        messages.append({"role": "user", "content": f"{prompt}"})
-        messages.append({"role": "assistant", "content": tool_answer})
-        with open(CHATLOG_PATH, "w") as f:
-            dump(messages, f, indent=4)
-        return AnswerModifier(tool_answer)
-    
-    #Load the chat log from the JSON file.
-    with open(CHATLOG_PATH, "r") as f:
-        messages = load(f)
-    messages.append({"role": "user", "content": f"{prompt}"})
-    
-    #Add Google search results to the system chatbot messages.
-    SystemChatBot.append({"role": "system", "content": GoogleSearch(prompt)})
+#Function to answer a prompt from fresh search results given the conversation so far (no files touched).
+def SearchReply(prompt, messages):
+    # The search results go in a per-call copy so concurrent callers don't share them.
+    system = SystemChatBot + [{"role": "system", "content": GoogleSearch(prompt)}]
 
     # Generate a response using the brog client.
     def _retry_seconds(err: str) -> float:
@@ -112,10 +99,12 @@ def RealtimeSearchEngine(prompt):
         secs = float(m.group(3) or 0)
         return mins * 60 + secs
     
+    from groq import APIError
+
     try:
-        completion = client.chat.completions.create(
+        completion = get_client().chat.completions.create(
             model="groq/compound-mini",
-            messages=SystemChatBot + [{"role": "system", "content": Information()}] + messages,
+            messages=system + [{"role": "system", "content": Information()}] + messages + [{"role": "user", "content": f"{prompt}"}],
             temperature=0.7,
             max_tokens=512,
             top_p=1,
@@ -124,27 +113,52 @@ def RealtimeSearchEngine(prompt):
     except APIError as e:
         if "rate_limit" in str(e).lower():
             time.sleep(min(_retry_seconds(str(e)), 10))
-            return "I'm temporarily rate-limited. Please try again."
+            return None
         raise
 
     Answer = ""
-
-
     #Concatenate response chunks from the streaming output.
     for chunk in completion:
         if chunk.choices[0].delta.content:
             Answer +=chunk.choices[0].delta.content
         
     # Clean up the response.
-    Answer = Answer.strip().replace("</s>", "")
+    return Answer.strip().replace("</s>", "")
+
+#Function to handle real-time search and response generation.
+def RealtimeSearchEngine(prompt):
+    global messages
+    
+    # 1) Try accuracy-sensitive handlers FIRST (no LLM, no Google snippets)
+    tool_answer = try_handle_realtime(prompt)
+    if tool_answer:
+        # Persist to chat log so the UI history stays consistent
+        with open(CHATLOG_PATH, "r") as f:
+            messages = load(f)
+        messages.append({"role": "user", "content": f"{prompt}"})
+        messages.append({"role": "assistant", "content": tool_answer})
+        with open(CHATLOG_PATH, "w") as f:
+            dump(messages, f, indent=4)
+        index_new_turns(messages)
+        return AnswerModifier(tool_answer)
+    
+    #Load the chat log from the JSON file.
+    with open(CHATLOG_PATH, "r") as f:
+        messages = load(f)
+
+    Answer = SearchReply(prompt, messages)
+    if Answer is None:
+        return "I'm temporarily rate-limited. Please try again."
+
+    messages.append({"role": "user", "content": f"{prompt}"})
     messages.append({"role": "assistant", "content": Answer})
 
     # Save the updated chat log back to the JSON file.
     with open(CHATLOG_PATH, "w") as f:
         dump(messages, f, indent=4)
+    # Add the new turns to the full-text history index.
+    index_new_turns(messages)
             
-    # Remove the most recent system message from the chatbot conversation.
-    SystemChatBot.pop()
     return AnswerModifier(Answer=Answer)
 
 #main entry point of the program for interactive uerying.
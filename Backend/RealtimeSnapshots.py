@@ -0,0 +1,223 @@
+"""Last good responses of the realtime APIs (rate tables, forecasts, places).
+
+Currency and weather answers used to block for up to 10 s on a slow or
+dead network and then say "lookup failed". Every successful response is
+now kept here, in memory and in ``Data/RealtimeSnapshots.json``, and
+:func:`cached_fetch` serves it stale-while-revalidate:
+
+- a snapshot that hasn't expired is returned as is;
+- an expired one is returned immediately together with its age, while a
+  background thread fetches a new one (one refresh per key at a time);
+- only when there is no snapshot at all does the caller wait for the
+  network;
+- in offline mode (``OfflineMode=true`` in .env, or :func:`set_offline`)
+  the network is never touched and only snapshots are served;
+- with :func:`set_read_only` (batch runs) new snapshots are kept in memory
+  but the file is not written.
+
+    python -m Backend.RealtimeSnapshots     # list snapshots and their age
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+SNAPSHOT_PATH = os.path.join("Data", "RealtimeSnapshots.json")
+MAX_PER_KIND = 200
+
+Fetcher = Callable[[], Tuple[Any, float]]  # -> (data, expires_at)
+
+
+class Snapshot(NamedTuple):
+    data: Any
+    fetched_at: float
+    expires_at: float
+
+    def age(self, now: Optional[float] = None) -> float:
+        return max(0.0, (now or time.time()) - self.fetched_at)
+
+    def fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.expires_at
+
+
+class OfflineError(RuntimeError):
+    """Offline mode is on and there is no snapshot to serve."""
+
+
+class SnapshotStore:
+    """Snapshots by (kind, key), persisted as one JSON file."""
+
+    def __init__(self, path: Optional[str] = SNAPSHOT_PATH, max_per_kind: int = MAX_PER_KIND):
+        self.path = path
+        self.max_per_kind = max_per_kind
+        self.read_only = False
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, Dict[str, Snapshot]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        try:
+            kinds = {kind: {key: Snapshot(value[0], float(value[1]), float(value[2]))
+                            for key, value in entries.items()}
+                     for kind, entries in raw.items()}
+        except (AttributeError, TypeError, ValueError, LookupError):
+            return  # not a file this version wrote: start empty
+        self._kinds = kinds
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        raw = {kind: {key: list(snap) for key, snap in entries.items()} for kind, entries in self._kinds.items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def get(self, kind: str, key: str) -> Optional[Snapshot]:
+        with self._lock:
+            return self._kinds.get(kind, {}).get(key)
+
+    def items(self, kind: str) -> List[Tuple[str, Snapshot]]:
+        with self._lock:
+            return list(self._kinds.get(kind, {}).items())
+
+    def put(self, kind: str, key: str, data: Any, expires_at: float) -> Snapshot:
+        snap = Snapshot(data, time.time(), expires_at)
+        with self._lock:
+            entries = self._kinds.setdefault(kind, {})
+            entries[key] = snap
+            if len(entries) > self.max_per_kind:
+                oldest = min(entries, key=lambda k: entries[k].fetched_at)
+                del entries[oldest]
+            try:
+                if not self.read_only:
+                    self._save()
+            except OSError as e:
+                print(f"Realtime snapshot not saved: {e!r}")
+        return snap
+
+
+_store: Optional[SnapshotStore] = None
+_store_lock = threading.Lock()
+_offline: Optional[bool] = None
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+
+
+def get_store() -> SnapshotStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
+
+
+def is_offline() -> bool:
+    global _offline
+    if _offline is None:
+        from Backend.Config import env
+
+        _offline = (env("OfflineMode", "") or "").strip().lower() in ("1", "true", "yes", "on")
+    return _offline
+
+
+def set_offline(value: bool) -> None:
+    global _offline
+    _offline = bool(value)
+
+
+def set_read_only(value: bool) -> None:
+    """Stop (or resume) writing snapshots to disk."""
+    get_store().read_only = bool(value)
+
+
+def refresh(kind: str, key: str, fetch: Fetcher) -> Optional[Snapshot]:
+    """Fetch now and store the result; None if it failed or is already running."""
+    with _refreshing_lock:
+        if (kind, key) in _refreshing:
+            return None
+        _refreshing.add((kind, key))
+    try:
+        data, expires_at = fetch()
+        return get_store().put(kind, key, data, expires_at)
+    except Exception as e:
+        print(f"Realtime refresh failed for {kind}/{key}: {e!r}")
+        return None
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard((kind, key))
+
+
+def refresh_in_background(kind: str, key: str, fetch: Fetcher) -> None:
+    with _refreshing_lock:
+        if (kind, key) in _refreshing:
+            return
+    threading.Thread(target=refresh, args=(kind, key, fetch), daemon=True,
+                     name=f"refresh-{kind}-{key}").start()
+
+
+def cached_fetch(kind: str, key: str, fetch: Fetcher) -> Tuple[Any, Optional[float]]:
+    """(data, stale_age) where stale_age is None for fresh data.
+
+    Raises OfflineError when offline with nothing stored, or whatever
+    `fetch` raises when there is no snapshot to fall back on.
+    """
+    snap = get_store().get(kind, key)
+    if snap is not None and snap.fresh():
+        return snap.data, None
+
+    if is_offline():
+        if snap is None:
+            raise OfflineError(f"offline and no saved {kind} for {key}")
+        return snap.data, snap.age()
+
+    if snap is not None:
+        refresh_in_background(kind, key, fetch)
+        return snap.data, snap.age()
+
+    data, expires_at = fetch()
+    get_store().put(kind, key, data, expires_at)
+    return data, None
+
+
+def describe_age(seconds: float) -> str:
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "less than a minute"
+    if minutes < 60:
+        return f"{minutes} min"
+    hours = minutes // 60
+    if hours < 48:
+        return f"{hours} h {minutes % 60} min" if hours < 6 and minutes % 60 else f"{hours} h"
+    return f"{hours // 24} days"
+
+
+def stale_note(age: Optional[float]) -> str:
+    """Line appended to answers built from old data ("" for fresh data)."""
+    if age is None:
+        return ""
+    if is_offline():
+        return f"\n(Offline: saved data from {describe_age(age)} ago.)"
+    return f"\n(Saved data from {describe_age(age)} ago; refreshing in the background.)"
+
+
+if __name__ == "__main__":
+    store = get_store()
+    now = time.time()
+    for kind in sorted(store._kinds):
+        for key, snap in sorted(store.items(kind)):
+            state = "fresh" if snap.fresh(now) else "stale"
+            print(f"{kind:10} {key:30} {describe_age(snap.age(now)):>18} old  {state}")
+    print("mode:", "offline" if is_offline() else "online")
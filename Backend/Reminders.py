@@ -0,0 +1,387 @@
+"""Persistent reminders for the DMM "reminder ..." task.
+
+``FirstLayerDMM`` turns "set a reminder at 9:00pm on 25th june for my
+business meeting" into ``reminder 9:00pm 25th june business meeting``. This
+module
+
+- parses that text locally (no LLM) with :func:`parse_reminder`,
+- stores reminders in SQLite (``Data/Reminders.db``) so they survive restarts,
+- fires them from a single timer thread driven by a min-heap: the thread
+  sleeps on a condition variable until exactly the next due time, so there is
+  no polling, and adding or firing a reminder is O(log n).
+
+Reminders that came due while the assistant was not running fire when the
+first listener is registered with :func:`add_listener` (which starts the
+timer), so they are announced rather than lost. A reminder that comes due
+with no listener stays pending for the next start.
+
+    python -m Backend.Reminders "9:00pm 25th june business meeting"
+    python -m Backend.Reminders --bench
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+
+DB_PATH = os.path.join("Data", "Reminders.db")
+DEFAULT_HOUR = 9  # a date without a time means 9:00 that day
+
+Listener = Callable[[int, datetime, str], None]
+
+
+class ReminderInPast(ValueError):
+    """The reminder text names a date and time that has already passed."""
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+
+_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "fifteen": 15, "twenty": 20, "thirty": 30,
+    "forty five": 45, "half an": 0.5,
+}
+_UNIT_SECONDS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400, "week": 604800}
+
+_MONTH_RE = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_NUM_RE = r"\d+(?:\.\d+)?|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True))
+
+_RELATIVE = re.compile(rf"\bin\s+({_NUM_RE})\s+(second|sec|minute|min|hour|hr|day|week)s?\b", re.I)
+_TIME_12H = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*([ap])\.?\s?m\.?(?=\W|$)", re.I)
+_TIME_24H = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_TIME_WORD = re.compile(r"\b(noon|midday|midnight)\b", re.I)
+_DATE_DM = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH_RE})\b\.?(?:,?\s*(\d{{4}}))?", re.I)
+_DATE_MD = re.compile(rf"\b({_MONTH_RE})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s*(\d{{4}}))?", re.I)
+_DATE_ISO = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_DAY_WORD = re.compile(r"\b(today|tonight|tomorrow|day after tomorrow)\b", re.I)
+_WEEKDAY = re.compile(rf"\b(?:on\s+|next\s+|this\s+)?({'|'.join(_WEEKDAYS)})\b", re.I)
+
+_LEADING = re.compile(
+    r"^\s*(?:please\s+)?(?:reminder|remind me|set (?:a |an )?(?:reminder|alarm))\b\s*", re.I
+)
+_FILLER = re.compile(r"\b(?:at|on|for|to|that|about|by|of)\b", re.I)
+
+
+def _number(text: str) -> float:
+    text = text.lower()
+    return _NUMBER_WORDS[text] if text in _NUMBER_WORDS else float(text)
+
+
+def parse_reminder(text: str, now: Optional[datetime] = None) -> Optional[Tuple[datetime, str]]:
+    """Return (due, message) for a reminder phrase, or None if no time/date is found.
+
+    Handles "9:00pm 25th june meeting", "june 25 at 21:30 ...", "in 10 minutes
+    call mom", "tomorrow 7am gym", "friday 5pm ...". A time without a date is
+    today (or tomorrow if already past); a day/month without a year is this
+    year (or next year if already past).
+    """
+    now = now or datetime.now()
+    rest = _LEADING.sub("", text or "")
+    spans: List[Tuple[int, int]] = []
+
+    def _take(m: Optional[re.Match]) -> Optional[re.Match]:
+        if m:
+            spans.append(m.span())
+        return m
+
+    due: Optional[datetime] = None
+
+    rel = _take(_RELATIVE.search(rest))
+    if rel:
+        due = now + timedelta(seconds=_number(rel.group(1)) * _UNIT_SECONDS[rel.group(2).lower()])
+    else:
+        # Time of day
+        hour = minute = None
+        m = _take(_TIME_12H.search(rest))
+        if m:
+            if not 1 <= int(m.group(1)) <= 12:
+                return None  # "13pm"
+            hour, minute = int(m.group(1)) % 12, int(m.group(2) or 0)
+            if m.group(3).lower() == "p":
+                hour += 12
+        else:
+            m = _take(_TIME_24H.search(rest)) or _take(_TIME_WORD.search(rest))
+            if m and m.re is _TIME_24H:
+                hour, minute = int(m.group(1)), int(m.group(2))
+            elif m:
+                hour, minute = (0, 0) if m.group(1).lower() == "midnight" else (12, 0)
+
+        # Date
+        date = None
+        explicit_year = False
+        m = _take(_DATE_ISO.search(rest))
+        if m:
+            try:
+                date, explicit_year = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))).date(), True
+            except ValueError:
+                return None
+        else:
+            m = _take(_DATE_DM.search(rest))
+            if m:
+                day, month, year = int(m.group(1)), _MONTHS[m.group(2).lower()], m.group(3)
+            else:
+                m = _take(_DATE_MD.search(rest))
+                if m:
+                    month, day, year = _MONTHS[m.group(1).lower()], int(m.group(2)), m.group(3)
+            if m:
+                explicit_year = bool(year)
+                try:
+                    date = datetime(int(year) if year else now.year, month, day).date()
+                except ValueError:
+                    return None
+        if date is None:
+            m = _take(_DAY_WORD.search(rest))
+            if m:
+                word = m.group(1).lower()
+                offset = {"today": 0, "tonight": 0, "tomorrow": 1}.get(word, 2)
+                date = (now + timedelta(days=offset)).date()
+                if word == "tonight" and hour is None:
+                    hour, minute = 20, 0
+            else:
+                m = _take(_WEEKDAY.search(rest))
+                if m:
+                    ahead = (_WEEKDAYS.index(m.group(1).lower()) - now.weekday()) % 7
+                    date = (now + timedelta(days=ahead or 7)).date()
+
+        if hour is None and date is None:
+            return None
+        if hour is not None and not (0 <= hour <= 23 and 0 <= minute <= 59):
+            return None  # "9:75pm", "13pm"
+
+        if date is None:
+            due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if due <= now:
+                due += timedelta(days=1)
+        else:
+            if hour is None:
+                hour, minute = DEFAULT_HOUR, 0
+            due = datetime(date.year, date.month, date.day, hour, minute)
+            if due <= now and not explicit_year and date.year == now.year and m and m.re in (_DATE_DM, _DATE_MD):
+                due = due.replace(year=due.year + 1)
+
+    # Whatever is left (minus filler words) is the message.
+    for start, end in sorted(spans, reverse=True):
+        rest = rest[:start] + " " + rest[end:]
+    message = _FILLER.sub(" ", rest)
+    message = re.sub(r"\s+", " ", message).strip(" ,.-")
+    return due, (message or "Reminder")
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+
+class ReminderScheduler:
+    """SQLite-backed reminders fired by one heap-driven timer thread."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        db_path = db_path or DB_PATH
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reminders ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " due REAL NOT NULL,"
+            " message TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending')"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS reminders_pending ON reminders(status, due)")
+        self._db.commit()
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._cancelled: Set[int] = set()
+        self._listeners: List[Listener] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        rows = self._db.execute("SELECT due, id, message FROM reminders WHERE status = 'pending'").fetchall()
+        self._heap = [tuple(r) for r in rows]
+        heapq.heapify(self._heap)  # O(n) on start-up
+
+    def __len__(self) -> int:
+        return len(self._heap) - len(self._cancelled)
+
+    def add_listener(self, fn: Listener) -> None:
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def add(self, due: datetime, message: str) -> int:
+        ts = due.timestamp()
+        with self._cond:
+            cur = self._db.execute(
+                "INSERT INTO reminders (due, message, created) VALUES (?, ?, ?)", (ts, message, time.time())
+            )
+            self._db.commit()
+            rid = int(cur.lastrowid)
+            heapq.heappush(self._heap, (ts, rid, message))
+            if self._heap[0][1] == rid:
+                self._cond.notify()  # new earliest reminder: re-arm the timer
+        return rid
+
+    def cancel(self, rid: int) -> bool:
+        with self._cond:
+            cur = self._db.execute(
+                "UPDATE reminders SET status = 'cancelled' WHERE id = ? AND status = 'pending'", (rid,)
+            )
+            self._db.commit()
+            if cur.rowcount:
+                self._cancelled.add(rid)  # lazily dropped when it reaches the top of the heap
+                self._cond.notify()
+            return bool(cur.rowcount)
+
+    def pending(self, limit: int = 10) -> List[Tuple[int, datetime, str]]:
+        with self._cond:
+            rows = self._db.execute(
+                "SELECT id, due, message FROM reminders WHERE status = 'pending' ORDER BY due LIMIT ?", (limit,)
+            ).fetchall()
+        return [(rid, datetime.fromtimestamp(due), msg) for rid, due, msg in rows]
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="Reminders", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    while self._heap and self._heap[0][1] in self._cancelled:
+                        self._cancelled.discard(heapq.heappop(self._heap)[1])
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(timeout=delay)  # woken early by add()/cancel()/stop()
+                if self._stopping:
+                    return
+                due, rid, message = heapq.heappop(self._heap)
+                listeners = list(self._listeners)
+                if not listeners:
+                    continue  # nobody to tell: still pending in the database, fires after a restart
+                self._db.execute("UPDATE reminders SET status = 'fired' WHERE id = ?", (rid,))
+                self._db.commit()
+
+            for fn in listeners:
+                try:
+                    fn(rid, datetime.fromtimestamp(due), message)
+                except Exception as e:
+                    print(f"Reminder listener error: {e}")
+
+
+_scheduler: Optional[ReminderScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ReminderScheduler:
+    """Process-wide scheduler; its timer runs once a listener is registered."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ReminderScheduler()
+        return _scheduler
+
+
+def add_listener(fn: Listener) -> None:
+    """Register `fn`, then start the timer (overdue reminders fire now)."""
+    scheduler = get_scheduler()
+    scheduler.add_listener(fn)
+    scheduler.start()
+
+
+def add_reminder_from_text(text: str) -> Optional[Tuple[int, datetime, str]]:
+    """Parse and store a reminder. Returns (id, due, message) or None.
+
+    Raises ReminderInPast when the text names a time that has already
+    passed (e.g. "2020-01-05 9am ...").
+    """
+    now = datetime.now()
+    parsed = parse_reminder(text, now)
+    if not parsed:
+        return None
+    due, message = parsed
+    if due < now:
+        raise ReminderInPast(f"{describe_due(due, now)} has already passed")
+    return get_scheduler().add(due, message), due, message
+
+
+def describe_due(due: datetime, now: Optional[datetime] = None) -> str:
+    now = now or datetime.now()
+    clock = due.strftime("%I:%M %p").lstrip("0")
+    if due.date() == now.date():
+        return f"today at {clock}"
+    if due.date() == (now + timedelta(days=1)).date():
+        return f"tomorrow at {clock}"
+    return f"{due.strftime('%A, %d %B %Y')} at {clock}"
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def benchmark(n: int = 10_000) -> None:
+    import random
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as folder:
+        sched = ReminderScheduler(os.path.join(folder, "bench.db"))
+        now = time.time()
+        start = time.perf_counter()
+        for i in range(n):
+            sched.add(datetime.fromtimestamp(now + 3600 + random.random() * 86400 * 30), f"reminder {i}")
+        add_ms = (time.perf_counter() - start) * 1000
+        print(f"add {n} reminders: {add_ms:.0f} ms ({add_ms / n * 1000:.0f} us each, incl. SQLite commit)")
+
+        start = time.perf_counter()
+        reloaded = ReminderScheduler(sched.db_path)
+        print(f"reload {len(reloaded)} pending after 'restart': {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        fired: List[float] = []
+        reloaded.add_listener(lambda rid, due, msg: fired.append(time.time() - due.timestamp()))
+        reloaded.start()
+        for k in range(5):
+            reloaded.add(datetime.fromtimestamp(time.time() + 0.2 + k * 0.1), f"soon {k}")
+        time.sleep(1.0)
+        reloaded.stop()
+        late = ", ".join(f"{x * 1000:.1f}" for x in fired)
+        print(f"fired {len(fired)}/5 with {len(reloaded)} still pending; lateness ms: {late}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        for arg in sys.argv[1:]:
+            print(arg, "->", parse_reminder(arg))
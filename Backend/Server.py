@@ -0,0 +1,445 @@
+"""Headless multi-session server: the assistant's routing over HTTP/WebSocket.
+
+The Eel app serves one person through one window and one shared
+``Data/ChatLog.json``. This server runs :func:`Backend.Pipeline.run_query`
+for many concurrent sessions in one process:
+
+- every session has its own conversation, kept in memory and saved to
+  ``Data/Sessions/<id>.json`` (atomic replace, one writer per session);
+- queries of a session are answered in order by that session's worker;
+  the blocking model calls run on a shared thread pool of ``workers``;
+- backpressure: at most ``queue_limit`` queries wait per session and
+  ``max_pending`` in total, beyond that requests get HTTP 503;
+- a token bucket per session (``rate`` per minute, ``burst``) answers
+  HTTP 429 with ``Retry-After`` when exceeded;
+- sessions are created by their first query only, dropped from memory
+  after ``idle_seconds`` without one, and at most ``max_sessions`` are kept
+  (HTTP 503 beyond that);
+- side effects on this machine (automation, email, TTS ...) never run.
+
+Endpoints (JSON):
+    POST /sessions/{id}/query      {"query": "..."} -> Result
+    GET  /sessions/{id}/history    -> {"messages": [...]} (404 for unknown sessions)
+    GET  /sessions/{id}/ws         WebSocket: send {"query": "..."}, receive results
+    GET  /health                   -> counters
+
+    python -m Backend.Server [--host 127.0.0.1] [--port 8765] [--stand-in]
+    python -m Backend.Server --bench [clients]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from Backend.Pipeline import Backends, Result, StandInBackends, run_query
+
+SESSIONS_DIR = os.path.join("Data", "Sessions")
+HOST = "127.0.0.1"
+PORT = 8765
+WORKERS = 16             # concurrent model calls
+QUEUE_LIMIT = 8          # waiting queries per session
+MAX_PENDING = 512        # waiting queries over all sessions
+RATE_PER_MINUTE = 30.0
+BURST = 10
+MAX_MESSAGES = 200       # per session file; only recent turns are sent to the models
+IDLE_SECONDS = 600.0     # a session's worker and memory are released after this
+MAX_SESSIONS = 10_000    # sessions kept in memory at once
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Rejected(Exception):
+    """The query was not accepted; `status` is the HTTP status to answer."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.at = time.monotonic()
+
+    def take(self) -> float:
+        """0 if a token was taken, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.at) * self.rate)
+        self.at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate else float("inf")
+
+
+def _read_messages(path: Optional[str]) -> List[dict]:
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except (OSError, ValueError):
+        return []
+
+
+class Session:
+    """One conversation: its messages, its queue and its worker task."""
+
+    def __init__(self, sid: str, folder: str, rate: float, burst: int, queue_limit: int):
+        self.id = sid
+        self.path = os.path.join(folder, f"{sid}.json") if folder else None
+        self.messages: List[dict] = _read_messages(self.path)
+        self.queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue(maxsize=queue_limit)
+        self.bucket = TokenBucket(rate, burst)
+        self.worker: Optional[asyncio.Task] = None
+        self.last_used = time.monotonic()
+
+    def idle_for(self, now: float) -> float:
+        """Seconds since the last query, or 0 while the worker is running."""
+        if self.worker is not None and not self.worker.done():
+            return 0.0
+        return now - self.last_used
+
+    def save(self) -> None:
+        """Write the conversation (called from the thread pool)."""
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.messages, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def record(self, query: str, answer: str) -> None:
+        self.messages.append({"role": "user", "content": query})
+        self.messages.append({"role": "assistant", "content": answer})
+        del self.messages[:-MAX_MESSAGES]
+
+
+class AssistantServer:
+    def __init__(self, backends: Optional[Backends] = None, folder: Optional[str] = SESSIONS_DIR,
+                 workers: int = WORKERS, queue_limit: int = QUEUE_LIMIT, max_pending: int = MAX_PENDING,
+                 rate: float = RATE_PER_MINUTE, burst: int = BURST, idle_seconds: float = IDLE_SECONDS,
+                 max_sessions: int = MAX_SESSIONS):
+        self.backends = backends or Backends()
+        self.folder = folder
+        self.queue_limit = queue_limit
+        self.max_pending = max_pending
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._sweeper: Optional[asyncio.Task] = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assistant")
+        self._sessions: Dict[str, Session] = {}
+        self.pending = 0
+        self.stats = {"answered": 0, "errors": 0, "rate_limited": 0, "busy": 0}
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    # -- sessions ---------------------------------------------------------
+
+    @staticmethod
+    def _check_id(sid: str) -> None:
+        if not _SESSION_ID.match(sid or ""):
+            raise Rejected(400, "Session ids are 1-64 letters, digits, '-' or '_'.")
+
+    def session(self, sid: str) -> Session:
+        """The session `sid`, created (from its file, if any) when it isn't in memory."""
+        self._check_id(sid)
+        session = self._sessions.get(sid)
+        if session is None:
+            if len(self._sessions) >= self.max_sessions and not self.sweep():
+                self.stats["busy"] += 1
+                raise Rejected(503, "Too many sessions, try again later.", retry_after=60.0)
+            session = Session(sid, self.folder, self.rate, self.burst, self.queue_limit)
+            self._sessions[sid] = session
+        return session
+
+    def history(self, sid: str) -> List[dict]:
+        """The messages of session `sid`; read-only, no session is created."""
+        self._check_id(sid)
+        session = self._sessions.get(sid)
+        if session is not None:
+            return session.messages
+        path = os.path.join(self.folder, f"{sid}.json") if self.folder else None
+        if not path or not os.path.exists(path):
+            raise Rejected(404, "No such session.")
+        return _read_messages(path)
+
+    def sweep(self, idle_seconds: Optional[float] = None) -> int:
+        """Drop sessions without a query for `idle_seconds`; returns how many."""
+        limit = self.idle_seconds if idle_seconds is None else idle_seconds
+        now = time.monotonic()
+        idle = [sid for sid, session in self._sessions.items() if session.idle_for(now) >= limit]
+        if not idle and len(self._sessions) >= self.max_sessions:
+            # At the cap: make room from the longest idle sessions with no queries running.
+            waiting = sorted((session.idle_for(now), sid) for sid, session in self._sessions.items())
+            idle = [sid for seconds, sid in waiting[-max(1, self.max_sessions // 10):] if seconds > 0]
+        for sid in idle:
+            del self._sessions[sid]
+        return len(idle)
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 4))
+            self.sweep()
+
+    async def _work(self, session: Session) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                query, future = await asyncio.wait_for(session.queue.get(), timeout=self.idle_seconds)
+            except asyncio.TimeoutError:
+                if session.queue.empty():
+                    if self._sessions.get(session.id) is session:
+                        del self._sessions[session.id]
+                    return
+                continue
+            try:
+                history = list(session.messages)
+                result: Result = await loop.run_in_executor(self._pool, run_query, query, history, self.backends)
+                if result.answer and result.route not in ("empty", "error"):
+                    session.record(result.query, result.answer)
+                    await loop.run_in_executor(self._pool, session.save)
+                self.stats["errors" if result.error else "answered"] += 1
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                self.stats["errors"] += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.pending -= 1
+
+    async def submit(self, sid: str, query: str) -> Result:
+        """Queue `query` for session `sid` and wait for its result."""
+        if not (query or "").strip():
+            self._check_id(sid)
+            raise Rejected(400, "Empty query.")
+        session = self.session(sid)
+        session.last_used = time.monotonic()
+        wait = session.bucket.take()
+        if wait:
+            self.stats["rate_limited"] += 1
+            raise Rejected(429, "Too many queries for this session.", retry_after=wait)
+        if self.pending >= self.max_pending or session.queue.full():
+            self.stats["busy"] += 1
+            raise Rejected(503, "Busy, try again shortly.", retry_after=1.0)
+
+        future = asyncio.get_running_loop().create_future()
+        session.queue.put_nowait((query, future))
+        self.pending += 1
+        if session.worker is None or session.worker.done():
+            session.worker = asyncio.create_task(self._work(session))
+        return await future
+
+    def health(self) -> dict:
+        return {"sessions": len(self._sessions), "pending": self.pending, **self.stats}
+
+    def start(self) -> None:
+        """Start the periodic sweep of idle sessions (needs a running loop)."""
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for session in list(self._sessions.values()):
+            if session.worker:
+                session.worker.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # -- HTTP / WebSocket -------------------------------------------------
+
+    def app(self, token: Optional[str] = None):
+        from aiohttp import WSMsgType, web
+
+        def error(e: Rejected):
+            headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else None
+            return web.json_response({"error": str(e)}, status=e.status, headers=headers)
+
+        @web.middleware
+        async def auth(request, handler):
+            if token and request.headers.get("Authorization") != f"Bearer {token}":
+                return web.json_response({"error": "Unauthorized."}, status=401)
+            return await handler(request)
+
+        async def query(request):
+            try:
+                body = await request.json()
+            except ValueError:
+                return web.json_response({"error": "Body must be JSON."}, status=400)
+            try:
+                result = await self.submit(request.match_info["sid"], str(body.get("query") or ""))
+            except Rejected as e:
+                return error(e)
+            return web.json_response(result.to_dict())
+
+        async def history(request):
+            try:
+                messages = self.history(request.match_info["sid"])
+            except Rejected as e:
+                return error(e)
+            return web.json_response({"messages": messages})
+
+        async def websocket(request):
+            try:
+                self._check_id(request.match_info["sid"])
+            except Rejected as e:
+                return error(e)
+            ws = web.WebSocketResponse(heartbeat=30)
+            await ws.prepare(request)
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    if msg.type == WSMsgType.ERROR:
+                        break
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                    result = await self.submit(request.match_info["sid"], str(data.get("query") or ""))
+                    reply = {"type": "result", **result.to_dict()}
+                except Rejected as e:
+                    reply = {"type": "error", "status": e.status, "error": str(e), "retry_after": e.retry_after}
+                except (ValueError, AttributeError):
+                    reply = {"type": "error", "status": 400, "error": "Messages must be JSON objects."}
+                await ws.send_json(reply)  # waits while the client isn't reading
+            return ws
+
+        async def health(request):
+            return web.json_response(self.health())
+
+        async def on_startup(app):
+            self.start()
+
+        async def on_cleanup(app):
+            await self.close()
+
+        app = web.Application(middlewares=[auth], client_max_size=64 * 1024)
+        app.router.add_post("/sessions/{sid}/query", query)
+        app.router.add_get("/sessions/{sid}/history", history)
+        app.router.add_get("/sessions/{sid}/ws", websocket)
+        app.router.add_get("/health", health)
+        app.on_startup.append(on_startup)
+        app.on_cleanup.append(on_cleanup)
+        return app
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+BENCH_QUERIES = [
+    "how are you today",
+    "what is python programming language?",
+    "open chrome and tell me about python decorators",
+    "who is the prime minister of bangladesh",
+    "could you explain quantum computing in simple words",
+    "supercar image",
+]
+
+
+async def _bench(clients: int = 200, per_client: int = 10, latency: float = 0.05) -> None:
+    import aiohttp
+    import tempfile
+    from aiohttp import web
+
+    with tempfile.TemporaryDirectory() as folder:
+        server = AssistantServer(StandInBackends(latency=latency), folder, workers=64,
+                                 rate=6000, burst=per_client)
+        runner = web.AppRunner(server.app())
+        await runner.setup()
+        site = web.TCPSite(runner, HOST, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base = f"http://{HOST}:{port}"
+
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+
+        async def http_client(http, n: int) -> None:
+            for i in range(per_client):
+                t = time.perf_counter()
+                async with http.post(f"{base}/sessions/c{n}/query",
+                                     json={"query": BENCH_QUERIES[(n + i) % len(BENCH_QUERIES)]}) as r:
+                    await r.read()
+                    statuses[r.status] = statuses.get(r.status, 0) + 1
+                latencies.append(time.perf_counter() - t)
+
+        async def ws_client(http, n: int) -> None:
+            async with http.ws_connect(f"{base}/sessions/c{n}/ws") as ws:
+                for i in range(per_client):
+                    t = time.perf_counter()
+                    await ws.send_json({"query": BENCH_QUERIES[(n + i) % len(BENCH_QUERIES)]})
+                    reply = await ws.receive_json()
+                    status = 200 if reply.get("type") == "result" else reply.get("status", 0)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    latencies.append(time.perf_counter() - t)
+
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as http:
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                (ws_client if n % 2 else http_client)(http, n) for n in range(clients)
+            ))
+            elapsed = time.perf_counter() - start
+
+            # Backpressure and rate limits: one session flooded at once.
+            server.rate, server.burst = RATE_PER_MINUTE, BURST
+            flood = await asyncio.gather(*(
+                http.post(f"{base}/sessions/flood/query", json={"query": "how are you"}) for _ in range(50)
+            ))
+            flood_status: Dict[int, int] = {}
+            for r in flood:
+                flood_status[r.status] = flood_status.get(r.status, 0) + 1
+                r.release()
+
+        await runner.cleanup()
+
+        total = clients * per_client
+        latencies.sort()
+        files = len(os.listdir(folder))
+        print(f"{clients} clients x {per_client} queries (half HTTP, half WebSocket), "
+              f"stand-in model latency {latency * 1000:.0f} ms per call")
+        print(f"  {total / elapsed:,.0f} queries/s in {elapsed:.2f} s; "
+              f"latency p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.0f} ms")
+        print(f"  statuses {statuses}; {files} session files")
+        print(f"  one session flooded with 50 queries at once: {flood_status}")
+
+
+def _arg(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def main() -> None:
+    if "--bench" in sys.argv:
+        rest = [a for a in sys.argv[1:] if not a.startswith("--")]
+        asyncio.run(_bench(int(rest[0]) if rest else 200))
+        return
+
+    try:
+        from aiohttp import web
+    except ModuleNotFoundError as e:
+        raise SystemExit("Missing dependency 'aiohttp'. Install dependencies with: pip install -r Requirements.txt") from e
+    from Backend.Config import env
+
+    backends = StandInBackends() if "--stand-in" in sys.argv else Backends()
+    server = AssistantServer(backends)
+    host, port = _arg("--host", HOST), int(_arg("--port", str(PORT)))
+    print(f"Assistant server on http://{host}:{port} ({type(backends).__name__})")
+    web.run_app(server.app(token=env("ServerToken")), host=host, port=port, print=None)
+
+
+if __name__ == "__main__":
+    main()
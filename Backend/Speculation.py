@@ -0,0 +1,240 @@
+"""Speculative chatbot answers, started alongside the decision model.
+
+Most queries end up routed as ``general``, but the Groq answer used to
+start only after the Cohere decision had come back, so the two round trips
+added up. With ``SPECULATIVE_CHAT=true`` in .env, ``Main._process_query``
+starts the chatbot on the query (:meth:`Speculator.start`) at the same time
+as it asks the decision model, then:
+
+- :meth:`Speculator.commit` when the decision is a single ``general``
+  task: the answer is used (waiting for the rest of it if needed);
+- :meth:`Speculator.cancel` otherwise: the stream is closed, which stops
+  the generation, and the tokens already spent count as wasted.
+
+Queries whose heuristic routing already shows a task (``open ...``, "...
+and play ...") and questions with a cached answer are not speculated on.
+
+:meth:`Speculator.stats` compares the latency saved with the tokens
+wasted. ``--bench`` runs simulated calls with a given share of general
+queries:
+
+    python -m Backend.Speculation --bench --general 0.7 --dmm 0.6 --chat 0.9
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from Backend.Pipeline import _norm_cmd, fallback_decision
+
+COMMIT_TIMEOUT = 60.0  # seconds to wait for the rest of a committed answer
+
+# (query, cancel event, usage dict) -> answer
+ChatFn = Callable[[str, threading.Event, dict], str]
+
+
+def _chat(query: str, cancel: threading.Event, usage: dict) -> str:
+    from Backend.Chatbot import CHATLOG_PATH, ChatReply
+    try:
+        with open(CHATLOG_PATH, "r", encoding="utf-8") as f:
+            messages = json.load(f)
+    except (OSError, ValueError):
+        messages = []
+    return ChatReply(query, messages, cancel=cancel, usage=usage)
+
+
+def worth_speculating(query: str) -> bool:
+    """Whether `query` looks like a plain question (no tasks, no cached answer)."""
+    q_norm = _norm_cmd(query)
+    if not q_norm or not all(t.startswith("general ") for t in fallback_decision(q_norm)):
+        return False
+    try:
+        from Backend.AnswerCache import get_cache
+        return get_cache().get(query, count=False) is None
+    except Exception:
+        return True
+
+
+def is_plain_general(decision: Sequence[str]) -> bool:
+    """A decision the speculative answer is right for: one general task, nothing else."""
+    return len(decision) == 1 and decision[0].startswith("general")
+
+
+class Speculation:
+    """One chatbot call running in the background."""
+
+    def __init__(self, query: str, chat: ChatFn, on_done: Callable[["Speculation"], None]):
+        self.query = query
+        self.cancel_event = threading.Event()
+        self.usage: Dict[str, int] = {}
+        self.answer: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.accounted = False
+        self._chat = chat
+        self._on_done = on_done
+        self._done = threading.Event()
+        threading.Thread(target=self._run, daemon=True, name="speculative-chat").start()
+
+    def _run(self) -> None:
+        try:
+            self.answer = self._chat(self.query, self.cancel_event, self.usage)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.finished = time.monotonic()
+            self._done.set()
+            self._on_done(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def tokens(self) -> int:
+        return int(self.usage.get("prompt_tokens", 0)) + int(self.usage.get("completion_tokens", 0))
+
+
+class Speculator:
+    """Starts speculative calls and keeps the saved-vs-wasted account."""
+
+    def __init__(self, chat: ChatFn = _chat):
+        self._chat = chat
+        self._lock = threading.Lock()
+        self.started = self.committed = self.cancelled = self.failed = 0
+        self.used_tokens = self.wasted_tokens = 0
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0  # chatbot time spent on cancelled calls (not on the user's clock)
+
+    def start(self, query: str) -> Speculation:
+        with self._lock:
+            self.started += 1
+        return Speculation(query, self._chat, self._finished)
+
+    def _finished(self, spec: Speculation) -> None:
+        # Called by the call's thread when it ends, and by cancel(); counted once.
+        with self._lock:
+            if spec.cancel_event.is_set() and spec.finished is not None and not spec.accounted:
+                spec.accounted = True
+                self.wasted_tokens += spec.tokens
+                self.wasted_seconds += spec.finished - spec.started
+
+    def commit(self, spec: Speculation, timeout: float = COMMIT_TIMEOUT) -> Optional[str]:
+        """The speculative answer, or None if the call failed (answer normally then)."""
+        decided = time.monotonic()
+        spec.wait(timeout)
+        answer = spec.answer
+        if spec.error is not None or not answer or answer.startswith("An error occurred"):
+            with self._lock:
+                self.failed += 1
+                self.wasted_tokens += spec.tokens
+            return None
+        with self._lock:
+            self.committed += 1
+            self.used_tokens += spec.tokens
+            # How much of the call ran while the decision model was still deciding.
+            self.saved_seconds += min(spec.finished, decided) - spec.started
+        return answer
+
+    def cancel(self, spec: Speculation) -> None:
+        with self._lock:
+            self.cancelled += 1
+        spec.cancel_event.set()
+        self._finished(spec)  # if it had already finished, all of it was wasted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "started": self.started,
+                "committed": self.committed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "saved_seconds": round(self.saved_seconds, 2),
+                "avg_saved_ms": round(self.saved_seconds / self.committed * 1000) if self.committed else 0,
+                "used_tokens": self.used_tokens,
+                "wasted_tokens": self.wasted_tokens,
+                "wasted_share": round(self.wasted_tokens / (self.used_tokens + self.wasted_tokens), 3)
+                if self.used_tokens + self.wasted_tokens else 0.0,
+            }
+
+
+_speculator: Optional[Speculator] = None
+_speculator_lock = threading.Lock()
+
+
+def get_speculator() -> Speculator:
+    global _speculator
+    with _speculator_lock:
+        if _speculator is None:
+            _speculator = Speculator()
+        return _speculator
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def _arg(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def benchmark(n: int = 40) -> None:
+    """Sequential vs speculative latency with simulated model calls.
+
+    The simulated chatbot streams 40 tokens over `chat` seconds and stops at
+    the next token when cancelled.
+    """
+    general_share = float(_arg("--general", "0.7"))
+    dmm_seconds = float(_arg("--dmm", "0.6"))
+    chat_seconds = float(_arg("--chat", "0.9"))
+    prompt_tokens = 600
+    rng = random.Random(7)
+
+    def chat(query: str, cancel: threading.Event, usage: dict) -> str:
+        usage["prompt_tokens"] = prompt_tokens
+        produced = 0
+        step = chat_seconds / 40
+        for _ in range(40):
+            if cancel.is_set():
+                break
+            time.sleep(step)
+            produced += 1
+        usage["completion_tokens"] = produced
+        return "answer " * produced
+
+    speculator = Speculator(chat)
+    routes = ["general" if rng.random() < general_share else "realtime" for _ in range(n)]
+    sequential = speculative = 0.0
+    for route in routes:
+        decision: List[str] = [f"{route} some question"]
+        sequential += dmm_seconds + (chat_seconds if route == "general" else 0.0)
+
+        start = time.monotonic()
+        spec = speculator.start("some question")
+        time.sleep(dmm_seconds)  # the decision model
+        if is_plain_general(decision):
+            speculator.commit(spec)
+        else:
+            speculator.cancel(spec)
+        speculative += time.monotonic() - start
+    time.sleep(chat_seconds / 40 * 2)  # let cancelled calls account their tokens
+
+    stats = speculator.stats()
+    print(f"{n} queries, {general_share:.0%} general, decision {dmm_seconds * 1000:.0f} ms, "
+          f"chat {chat_seconds * 1000:.0f} ms")
+    print(f"  time to answer (decision + chat): sequential {sequential:.1f} s, speculative {speculative:.1f} s")
+    print(f"  saved {stats['saved_seconds']:.1f} s ({stats['avg_saved_ms']} ms per general query); "
+          f"wasted {stats['wasted_tokens']} tokens of {stats['used_tokens'] + stats['wasted_tokens']} "
+          f"({stats['wasted_share']:.0%}), about {stats['wasted_tokens'] / max(1, stats['cancelled']):.0f} per cancelled call")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        print(__doc__)
@@ -1,17 +1,24 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from dotenv import dotenv_values
+# selenium / webdriver_manager / mtranslate are imported lazily: Chrome is only
+# launched the first time speech recognition is actually used.
 import os
+import time
 from pathlib import Path
-import mtranslate as mt
+from Backend.Config import get_env
+from Backend.EventBus import LANGUAGE, STATUS, TRANSCRIPT, publish
 
 #Load environment variables from the .env file.
-env_vars= dotenv_values(".env")
+env_vars= get_env()
 #Get the input language setting from the environment variables.
-InputLanguage = env_vars.get("InputLanguage")
+InputLanguage = env_vars.get("InputLanguage") or "en"
+
+# End of utterance: this long without new words (interim or final) ends it.
+SILENCE_STOP_SECONDS = float(env_vars.get("SILENCE_STOP_SECONDS") or 1.2)
+# Words unchanged this long are published as a stable prefix (routing may start on it).
+STABLE_PREFIX_SECONDS = float(env_vars.get("STABLE_PREFIX_SECONDS") or 0.4)
+# Longest utterance, counted from the first recognised word.
+MAX_RECORD_SECONDS = float(env_vars.get("MAX_RECORD_SECONDS") or 30)
+# How often the page is read while listening.
+POLL_SECONDS = 0.05
 
 # Define the HTML code for the speech recognition interface.
 HtmlCode = '''<!DOCTYPE html>
@@ -26,24 +33,51 @@ HtmlCode = '''<!DOCTYPE html>
     <script>
         const output = document.getElementById('output');
         let recognition;
+        let finalText = "";
+        let interimText = "";
+        let lastChange = 0;
+        let listening = false;
 
         function startRecognition() {
             recognition = new webkitSpeechRecognition() || new SpeechRecognition();
             recognition.lang = '';
             recognition.continuous = true;
+            recognition.interimResults = true;
+            finalText = "";
+            interimText = "";
+            lastChange = 0;
+            listening = true;
 
             recognition.onresult = function(event) {
-                const transcript = event.results[event.results.length - 1][0].transcript;
-                output.textContent += transcript;
+                let interim = "";
+                for (let i = event.resultIndex; i < event.results.length; i++) {
+                    const result = event.results[i];
+                    if (result.isFinal) {
+                        finalText += result[0].transcript;
+                    } else {
+                        interim += result[0].transcript;
+                    }
+                }
+                interimText = interim;
+                lastChange = Date.now();
+                output.textContent = finalText + interimText;
             };
 
             recognition.onend = function() {
-                recognition.start();
+                if (listening) {
+                    recognition.start();
+                }
             };
             recognition.start();
         }
 
+        // [final text, interim text, ms since the last change or -1 before any speech]
+        function readTranscript() {
+            return [finalText, interimText, lastChange ? Date.now() - lastChange : -1];
+        }
+
         function stopRecognition() {
+            listening = false;
             recognition.stop();
             output.innerHTML = "";
         }
@@ -52,7 +86,7 @@ HtmlCode = '''<!DOCTYPE html>
 </html>'''
 
 #Replace the language setting in the HTML code with the input language from the environment variables.
-HtmlCode= str(HtmlCode).replace("recognition.lang = '';", "recognition.lang = '{InputLanguage}';")
+HtmlCode= str(HtmlCode).replace("recognition.lang = '';", f"recognition.lang = '{InputLanguage}';")
 
 #Get the current working directory.
 current_dir = os.getcwd()
@@ -64,24 +98,33 @@ VOICE_HTML_PATH.write_text(HtmlCode, encoding="utf-8")
 
 # File URI used by Selenium.
 Link = VOICE_HTML_PATH.resolve().as_uri()
-#Set Chrome options for the WebDriver.
-chrome_options= Options()
-user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.142.86 Safari/537.36"
-chrome_options.add_argument(f'user-agent={user_agent}')
-chrome_options.add_argument("--use-fake-ui-for-media-stream")
-chrome_options.add_argument("--use-fake-device-for-media-stream")
-chrome_options.add_argument("--headless=new")
-# Initialize the Chrome WebDriver using the ChromeDriverManager.
-service = Service (ChromeDriverManager().install())
-driver = webdriver.Chrome (service=service, options=chrome_options)
-
-# Define the path for temporary files.
-TempDirPath = os.path.join(current_dir, "Frontend", "Files")
-
-#Function to set the assistant's status by writing it to a file.
+
+# The Chrome WebDriver, created on first use by get_driver().
+driver = None
+
+def get_driver():
+    global driver
+    if driver is None:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        #Set Chrome options for the WebDriver.
+        chrome_options= Options()
+        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.142.86 Safari/537.36"
+        chrome_options.add_argument(f'user-agent={user_agent}')
+        chrome_options.add_argument("--use-fake-ui-for-media-stream")
+        chrome_options.add_argument("--use-fake-device-for-media-stream")
+        chrome_options.add_argument("--headless=new")
+        # Initialize the Chrome WebDriver using the ChromeDriverManager.
+        service = Service (ChromeDriverManager().install())
+        driver = webdriver.Chrome (service=service, options=chrome_options)
+    return driver
+
+#Function to set the assistant's status (pushed to the UI through the event bus).
 def SetAssistantStatus (Status):
-    with open(rf'{TempDirPath}/Status.data', "w", encoding='utf-8') as file:
-        file.write(Status)
+    publish(STATUS, Status)
         
 #Function to modify a query to ensure proper punctuation and formatting.
 def QueryModifier(Query):
@@ -104,38 +147,74 @@ def QueryModifier(Query):
             
     return new_query.capitalize()
 
-#Function to translate text into English useing the mtranslate library.
-def UniversalTranslator(Text):
-    english_translation = mt.translate(Text, "en", "auto")
+#Function to translate text into English: already-English text is kept, repeated
+#phrases come from the translation cache, the rest goes to mtranslate.
+#Provisional text (a prefix of an unfinished utterance) is not cached or counted.
+def UniversalTranslator(Text, Provisional=False):
+    from Backend.Translation import get_translator
+    english_translation = get_translator().to_english(Text, provisional=Provisional)
     return english_translation.capitalize()
 
+#Function to turn a transcript into the query that is returned: translated
+#to English unless it already is (detected locally), then punctuated.
+#Everything goes through the Translator so English utterances count as skipped.
+def TranscriptToQuery(Text, Announce=False, Provisional=False):
+    if InputLanguage.lower() == "en" or "en" in InputLanguage.lower():
+        return QueryModifier(Text)
+    if Announce:
+        from Backend.Translation import is_english
+        english = is_english(Text)
+        publish(LANGUAGE, "en" if english else InputLanguage)
+        if not english:
+            SetAssistantStatus("Translating...")
+    return QueryModifier(UniversalTranslator(Text, Provisional))
+
 #Function to perform speech recognition useing the webdriver.
+#Interim transcripts are published on the bus as they change; the utterance
+#ends after SILENCE_STOP_SECONDS without new words (or MAX_RECORD_SECONDS).
 def SpeechRecognition():
+    from selenium.webdriver.common.by import By
+    driver = get_driver()
     #open the HTML file in the browser.
     driver.get(Link)
     #Start speech recognition by clicking the start button.
     driver.find_element(by=By.ID, value="start").click()
-    
-    
+
+    LastText = ""
+    StableText = ""
+    FirstWordAt = None
+
     while True:
         try:
-            # Get the recognized text from the HTML output element.
-            Text = driver.find_element (by=By.ID, value="output").text
-            
-            if Text:
+            # Read the transcript so far and how long it has been unchanged.
+            Final, Interim, QuietMs = driver.execute_script("return readTranscript();")
+        except Exception:
+            time.sleep(POLL_SECONDS)
+            continue
+
+        Text = " ".join((Final + Interim).split())
+        if Text:
+            Now = time.monotonic()
+            FirstWordAt = FirstWordAt or Now
+            Quiet = QuietMs / 1000
+            if Text != LastText:
+                LastText = Text
+                publish(TRANSCRIPT, {"text": Text, "stable": False, "final": False})
+            elif Text != StableText and Quiet >= STABLE_PREFIX_SECONDS:
+                StableText = Text
+                publish(TRANSCRIPT, {"text": Text, "stable": True, "final": False})
+
+            if Quiet >= SILENCE_STOP_SECONDS or Now - FirstWordAt >= MAX_RECORD_SECONDS:
                 #Stop recognition by clicking the stop button.
-                driver.find_element (by=By.ID, value="end").click()
-    
-                # If the input language is English, return the modified query.
-                if InputLanguage.lower() == "en" or "en" in InputLanguage.lower():
-                    return QueryModifier(Text)
-                else:
-                    # If the input language is not English, translate the text and return it.     
-                    SetAssistantStatus("Translating...")
-                    return QueryModifier(UniversalTranslator(Text))
-        except Exception as e:
-            pass
-        
+                try:
+                    driver.find_element(by=By.ID, value="end").click()
+                except Exception:
+                    pass
+                publish(TRANSCRIPT, {"text": Text, "stable": True, "final": True})
+                return TranscriptToQuery(Text, Announce=True)
+
+        time.sleep(POLL_SECONDS)
+
 # Main excution block.
 if __name__ == "__main__":
     while True:
@@ -0,0 +1,334 @@
+"""Pluggable text-to-speech engines: edge-tts plus local CPU engines.
+
+``TextToSpeech`` used to call the edge-tts web service for every utterance,
+so speech waited on the network and stopped when it was down. An engine
+here turns text into an audio file that pygame can play:
+
+- ``EdgeEngine``   edge-tts (network), mp3;
+- ``PiperEngine``  Piper neural voices on the CPU, wav; the ONNX model is
+  loaded once per process (``piper`` package, else the ``piper`` binary);
+- ``EspeakEngine`` espeak-ng, wav; robotic but instant and tiny.
+
+``AssistantVoice`` in .env picks the primary engine:
+
+    AssistantVoice=en-US-AriaNeural                          edge-tts voice
+    AssistantVoice=piper:Data/Voices/en_US-amy-medium.onnx   Piper model
+    AssistantVoice=espeak-ng:en-us                           espeak-ng voice
+
+When the primary is edge-tts, a local engine stands by (``TTS_FALLBACK_VOICE``,
+else the first Piper model in ``Data/Voices``, else espeak-ng). It is used
+when edge-tts sends no audio within ``TTS_EDGE_TIMEOUT`` seconds (default
+2.5; long answers may take longer to finish, up to ``EDGE_FINISH_TIMEOUT``),
+fails, or realtime offline mode is on; after a slow or failed call the
+local engine is used directly for ``SLOW_COOLDOWN`` seconds.
+
+    python -m Backend.TTSEngines --bench        # time to first audio per engine
+"""
+
+from __future__ import annotations
+
+import abc
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from typing import Callable, List, Optional, Tuple
+
+from Backend.Config import BASE_DIR, env
+
+VOICES_DIR = os.path.join(BASE_DIR, "Data", "Voices")
+AUDIO_BASE = os.path.join(BASE_DIR, "Data", "speech")
+EDGE_TIMEOUT = float(env("TTS_EDGE_TIMEOUT", "2.5"))  # until the first audio chunk
+EDGE_FINISH_TIMEOUT = 60.0                             # until the whole answer is written
+SLOW_COOLDOWN = 300.0
+
+
+class TTSEngine(abc.ABC):
+    """Writes speech for `text` to an audio file."""
+
+    name = "engine"
+    ext = "wav"
+
+    def available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, path: str) -> None:
+        """Write the whole utterance to `path`."""
+
+    def first_audio(self, text: str, path: str) -> float:
+        """Seconds until the first audio is ready (the whole file, unless the
+        engine can stream)."""
+        start = time.perf_counter()
+        self.synthesize(text, path)
+        return time.perf_counter() - start
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class EdgeEngine(TTSEngine):
+    ext = "mp3"
+
+    def __init__(self, voice: str):
+        self.voice = voice
+        self.name = f"edge-tts:{voice}"
+
+    def available(self) -> bool:
+        try:
+            import edge_tts  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _communicate(self, text: str):
+        import edge_tts
+        return edge_tts.Communicate(text, self.voice, pitch="+5Hz", rate="+13%")
+
+    def stream_to(self, text: str, path: str, on_first_audio: Optional[Callable[[], None]] = None) -> None:
+        """Write the mp3 as it arrives; `on_first_audio` is called at the first chunk."""
+        import asyncio
+
+        async def run() -> None:
+            got_audio = False
+            with open(path, "wb") as f:
+                async for chunk in self._communicate(text).stream():
+                    if chunk["type"] == "audio":
+                        f.write(chunk["data"])
+                        if not got_audio:
+                            got_audio = True
+                            if on_first_audio is not None:
+                                on_first_audio()
+            if not got_audio:
+                raise RuntimeError("edge-tts returned no audio")
+
+        asyncio.run(run())
+
+    def synthesize(self, text: str, path: str) -> None:
+        self.stream_to(text, path)
+
+    def first_audio(self, text: str, path: str) -> float:
+        start = time.perf_counter()
+        first: List[float] = []
+        self.stream_to(text, path, lambda: first.append(time.perf_counter() - start))
+        return first[0]
+
+
+class EspeakEngine(TTSEngine):
+    def __init__(self, voice: str = "en-us"):
+        self.voice = voice or "en-us"
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        self.name = f"espeak-ng:{self.voice}"
+
+    def available(self) -> bool:
+        return self.binary is not None
+
+    def synthesize(self, text: str, path: str) -> None:
+        if not self.binary:
+            raise RuntimeError("espeak-ng is not installed")
+        subprocess.run([self.binary, "-v", self.voice, "-s", "175", "-w", path, "--", text],
+                       check=True, capture_output=True, timeout=30)
+
+
+class PiperEngine(TTSEngine):
+    _voices: dict = {}  # model path -> loaded PiperVoice, shared by all instances
+    _lock = threading.Lock()
+
+    def __init__(self, model: str):
+        self.model = model if os.path.isabs(model) else os.path.join(BASE_DIR, model)
+        self.name = f"piper:{os.path.basename(self.model)}"
+
+    def available(self) -> bool:
+        if not os.path.exists(self.model):
+            return False
+        try:
+            import piper  # noqa: F401
+            return True
+        except ImportError:
+            return shutil.which("piper") is not None
+
+    def _voice(self):
+        with self._lock:
+            voice = self._voices.get(self.model)
+            if voice is None:
+                from piper import PiperVoice
+                voice = self._voices[self.model] = PiperVoice.load(self.model)
+            return voice
+
+    def synthesize(self, text: str, path: str) -> None:
+        try:
+            voice = self._voice()
+        except ImportError:
+            subprocess.run(["piper", "--model", self.model, "--output_file", path],
+                           input=text.encode("utf-8"), check=True, capture_output=True, timeout=60)
+            return
+        with wave.open(path, "wb") as wav_file:
+            if hasattr(voice, "synthesize_wav"):  # piper-tts >= 1.3
+                voice.synthesize_wav(text, wav_file)
+            else:
+                voice.synthesize(text, wav_file)
+
+
+def engine_for(spec: str) -> TTSEngine:
+    """Engine for an AssistantVoice-style spec."""
+    spec = (spec or "").strip()
+    kind, _, arg = spec.partition(":")
+    kind = kind.lower()
+    if kind == "piper":
+        return PiperEngine(arg)
+    if kind in ("espeak", "espeak-ng"):
+        return EspeakEngine(arg)
+    return EdgeEngine(spec)
+
+
+def local_engine() -> Optional[TTSEngine]:
+    """The local engine used when edge-tts is slow or offline, if any."""
+    spec = env("TTS_FALLBACK_VOICE")
+    candidates: List[TTSEngine] = [engine_for(spec)] if spec else []
+    candidates += [PiperEngine(m) for m in sorted(glob.glob(os.path.join(VOICES_DIR, "*.onnx")))]
+    candidates.append(EspeakEngine())
+    return next((e for e in candidates if not isinstance(e, EdgeEngine) and e.available()), None)
+
+
+class Speaker:
+    """Primary engine plus local fallback; produces the file to play."""
+
+    def __init__(self, primary: TTSEngine, fallback: Optional[TTSEngine] = None,
+                 timeout: float = EDGE_TIMEOUT):
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self._slow_until = 0.0
+        self._turn = 0
+
+    def _path(self, engine: TTSEngine) -> str:
+        # A fresh name each time: an abandoned slow edge-tts call may still be
+        # writing its file, and pygame may still hold the previous one.
+        self._turn = (self._turn + 1) % 4
+        return f"{AUDIO_BASE}-{self._turn}.{engine.ext}"
+
+    def _offline(self) -> bool:
+        try:
+            from Backend.RealtimeSnapshots import is_offline
+            return is_offline()
+        except Exception:
+            return False
+
+    def synthesize(self, text: str) -> Tuple[str, TTSEngine]:
+        """(audio path, engine that produced it)."""
+        os.makedirs(os.path.dirname(AUDIO_BASE), exist_ok=True)
+        networked = isinstance(self.primary, EdgeEngine)
+        use_fallback = self.fallback is not None and networked and (
+            self._offline() or time.monotonic() < self._slow_until
+        )
+        if not use_fallback:
+            path = self._path(self.primary)
+            if not networked or self.fallback is None:
+                self.primary.synthesize(text, path)
+                return path, self.primary
+
+            started = threading.Event()  # first audio chunk, or the call ended
+            done = threading.Event()
+            error: List[BaseException] = []
+
+            def run() -> None:
+                try:
+                    self.primary.stream_to(text, path, started.set)
+                except BaseException as e:
+                    error.append(e)
+                finally:
+                    started.set()
+                    done.set()
+
+            threading.Thread(target=run, daemon=True, name="tts-edge").start()
+            # The timeout is for the first audio: a long answer that is
+            # streaming steadily is not abandoned halfway.
+            if started.wait(self.timeout) and done.wait(EDGE_FINISH_TIMEOUT) and not error:
+                return path, self.primary
+            if error:
+                reason = error[0]
+            elif not started.is_set():
+                reason = f"no audio after {self.timeout:.1f} s"
+            else:
+                reason = f"audio unfinished after {EDGE_FINISH_TIMEOUT:.0f} s"
+            print(f"TTS: {self.primary.name} unavailable ({reason!r}); using {self.fallback.name}")
+            self._slow_until = time.monotonic() + SLOW_COOLDOWN
+
+        path = self._path(self.fallback)
+        self.fallback.synthesize(text, path)
+        return path, self.fallback
+
+
+_speaker: Optional[Speaker] = None
+_speaker_lock = threading.Lock()
+
+
+def get_speaker() -> Speaker:
+    global _speaker
+    with _speaker_lock:
+        if _speaker is None:
+            primary = engine_for(env("AssistantVoice", "") or "")
+            _speaker = Speaker(primary, local_engine() if isinstance(primary, EdgeEngine) else None)
+        return _speaker
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+BENCH_TEXTS = [
+    "Okay.",
+    "Welcome back. I am doing well. How may I help you?",
+    "The weather in Dhaka is partly cloudy with a high of thirty one degrees and a forty percent chance of rain.",
+]
+
+
+def benchmark(rounds: int = 3) -> None:
+    import tempfile
+
+    voice = env("AssistantVoice", "") or "en-US-AriaNeural"
+    engines: List[TTSEngine] = [engine_for(voice)]
+    engines += [PiperEngine(m) for m in sorted(glob.glob(os.path.join(VOICES_DIR, "*.onnx")))]
+    engines.append(EspeakEngine())
+    if not isinstance(engines[0], EdgeEngine):
+        engines.append(EdgeEngine("en-US-AriaNeural"))
+
+    print(f"{'engine':<40} {'text':>5} {'first audio p50':>16} {'max':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for engine in engines:
+            if not engine.available():
+                print(f"{engine.name:<40} not available")
+                continue
+            path = os.path.join(folder, f"bench.{engine.ext}")
+            try:
+                if isinstance(engine, PiperEngine) and _has_piper():
+                    start = time.perf_counter()
+                    engine._voice()
+                    print(f"{engine.name:<40} model load {time.perf_counter() - start:.2f} s (once per process)")
+                for text in BENCH_TEXTS:
+                    samples = sorted(engine.first_audio(text, path) for _ in range(rounds))
+                    print(f"{engine.name:<40} {len(text):>5} {samples[len(samples) // 2] * 1000:>13.0f} ms"
+                          f" {samples[-1] * 1000:>6.0f} ms")
+            except Exception as e:
+                print(f"{engine.name:<40} failed: {e!r}")
+
+
+def _has_piper() -> bool:
+    try:
+        import piper  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        speaker = get_speaker()
+        path, used = speaker.synthesize(" ".join(sys.argv[1:]) or "Hello, how may I help you?")
+        print(f"{used.name}: {path}")
@@ -1,50 +1,32 @@
 import pygame
 import random
-import asyncio
-import edge_tts
-import os
-from dotenv import dotenv_values
+from Backend.Config import get_env
+from Backend.TTSEngines import get_speaker # edge-tts or a local engine, with fallback.
 
-# Base dir = project root (JARVIS AI)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # go up one level
-ENV_PATH = os.path.join(BASE_DIR, ".env")
-
-env_vars = dotenv_values(ENV_PATH)
+env_vars = get_env()
 AssistantVoice = env_vars.get("AssistantVoice")
 
 if not AssistantVoice:
     raise ValueError("AssistantVoice is missing from .env file.")
 
-# 🔹 Use an absolute path for the audio file
-AUDIO_PATH = os.path.join(BASE_DIR, "Data", "speech.mp3")
-print("AUDIO_PATH:", AUDIO_PATH)  # debug
-
-# Asynchronous function to convert text to an audio file 
-async def TextToAudioFile(text: str) -> None:
-    # Ensure folder exists
-    os.makedirs(os.path.dirname(AUDIO_PATH), exist_ok=True)
-
-    # Remove old file if present
-    if os.path.exists(AUDIO_PATH):
-        os.remove(AUDIO_PATH)
-
-    print("Saving TTS to:", AUDIO_PATH)  # debug
-
-    communicate = edge_tts.Communicate(text, AssistantVoice, pitch="+5Hz", rate="+13%")
-    await communicate.save(AUDIO_PATH)
+# Function to convert text to an audio file; returns its path.
+def TextToAudioFile(text: str) -> str:
+    path, engine = get_speaker().synthesize(text)
+    print(f"TTS ({engine.name}):", path)  # debug
+    return path
 
 # Function to manage Text-to-Speech (TTS) functionality 
 def TTS(text: str, func=lambda r=None: True):
     while True:
         try:
-            # Convert text to an audio file asynchronously 
-            asyncio.run(TextToAudioFile(text))
+            # Convert text to an audio file (edge-tts, or a local engine when it's slow/offline)
+            audio_path = TextToAudioFile(text)
             
             # Initialize pygame mixer for audio playback 
             pygame.mixer.init()
             
             # Load the generated speech file into pygame mixer 
-            pygame.mixer.music.load(AUDIO_PATH)
+            pygame.mixer.music.load(audio_path)
             pygame.mixer.music.play()
             
             # Loop until the audio is done playing or the function stops
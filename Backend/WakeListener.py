@@ -0,0 +1,514 @@
+"""Always-on listening: voice-activity detection and a wake word, in NumPy.
+
+Listening used to start only on a mic click or Cmd+J, and each time spun up
+a whole Chrome speech session. :class:`AlwaysListener` instead reads the
+microphone in ``BLOCK_MS`` blocks into a :class:`RingBuffer` and runs two
+cheap detectors on it; the expensive speech recognition starts only when
+they fire:
+
+- :class:`VoiceActivityDetector`: per-frame energy (dB over an adaptive
+  noise floor) and zero-crossing rate, computed for a whole block at once,
+  with onset and hangover frames;
+- :class:`WakeWordDetector`: MFCC features of each short speech segment
+  compared by DTW with a few recordings of the wake word in
+  ``Data/WakeWord/*.wav`` (record them with ``--enroll``). Without
+  recordings, any detected speech counts.
+
+Audio comes from a :class:`MicSource` (``sounddevice``) or, for tests and
+tuning, a :class:`WavSource`. The whole loop costs well under 1% of one core
+(see ``--bench``).
+
+    python -m Backend.WakeListener --enroll 3       # record the wake word 3 times
+    python -m Backend.WakeListener --wav clip.wav   # print what would trigger
+    python -m Backend.WakeListener                  # listen on the microphone
+    python -m Backend.WakeListener --bench
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from Backend.Config import BASE_DIR, env
+
+SAMPLE_RATE = int(env("SAMPLE_RATE", "16000"))
+FRAME_MS = 20
+BLOCK_MS = 100
+RING_SECONDS = 4.0
+WAKE_DIR = os.path.join(BASE_DIR, "Data", "WakeWord")
+
+# VAD tuning
+MARGIN_DB = float(env("VAD_MARGIN_DB", "12"))   # speech is this far above the noise floor
+MIN_SPEECH_DB = -55.0                          # never speech below this level
+MAX_SPEECH_ZCR = 0.35                          # hiss crosses zero far more often than voice
+ONSET_FRAMES = 3                               # 60 ms of speech to start a segment
+HANGOVER_FRAMES = 15                           # 300 ms of silence to end it
+
+# Wake word
+WAKE_MIN_SECONDS = 0.25
+WAKE_MAX_SECONDS = 1.6
+WAKE_THRESHOLD = float(env("WAKE_THRESHOLD", "0") or 0)  # 0: derived from the recordings
+N_MELS = 26
+N_MFCC = 13
+
+
+class RingBuffer:
+    """Fixed-size int16 sample buffer that keeps the newest samples."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._buf = np.zeros(size, dtype=np.int16)
+        self._pos = 0
+        self.total = 0  # samples ever written
+
+    def write(self, samples: np.ndarray) -> None:
+        n = len(samples)
+        if n >= self.size:
+            self._buf[:] = samples[-self.size:]
+            self._pos = 0
+        else:
+            end = self._pos + n
+            if end <= self.size:
+                self._buf[self._pos:end] = samples
+            else:
+                split = self.size - self._pos
+                self._buf[self._pos:] = samples[:split]
+                self._buf[:n - split] = samples[split:]
+            self._pos = end % self.size
+        self.total += n
+
+    def last(self, n: int) -> np.ndarray:
+        n = min(n, self.size, self.total)
+        start = (self._pos - n) % self.size
+        if start + n <= self.size:
+            return self._buf[start:start + n].copy()
+        return np.concatenate((self._buf[start:], self._buf[:self._pos]))
+
+
+def frame_features(samples: np.ndarray, frame: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(energy in dBFS, zero-crossing rate) of every whole frame in `samples`."""
+    n = len(samples) // frame
+    x = samples[:n * frame].reshape(n, frame).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(x * x, axis=1))
+    db = 20.0 * np.log10(rms + 1e-10)
+    signs = np.signbit(x)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+    return db, zcr
+
+
+class VoiceActivityDetector:
+    """Energy + zero-crossing VAD with an adaptive noise floor."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, margin_db: float = MARGIN_DB,
+                 onset: int = ONSET_FRAMES, hangover: int = HANGOVER_FRAMES):
+        self.frame = sample_rate * FRAME_MS // 1000
+        self.margin_db = margin_db
+        self.onset = onset
+        self.hangover = hangover
+        self.floor: Optional[float] = None
+        self.in_speech = False
+        self._run = 0        # consecutive speech frames (onset) or silent frames (hangover)
+        self._frames = 0     # frames seen
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def process(self, samples: np.ndarray) -> List[Tuple[str, int]]:
+        """Feed samples; returns ("start"|"end", sample index) events."""
+        data = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        n = len(data) // self.frame
+        self._pending = data[n * self.frame:]
+        if not n:
+            return []
+        db, zcr = frame_features(data, self.frame)
+
+        if self.floor is None:
+            self.floor = float(np.percentile(db, 20))
+        events = []
+        for i in range(n):
+            level = db[i]
+            threshold = max(self.floor + self.margin_db, MIN_SPEECH_DB)
+            speech = level > threshold and (zcr[i] < MAX_SPEECH_ZCR or level > threshold + 10)
+            if not speech:
+                # The floor follows the quiet frames: fast down, slowly up.
+                rate = 0.3 if level < self.floor else 0.02
+                self.floor += rate * (level - self.floor)
+
+            index = self._frames + i
+            if not self.in_speech:
+                self._run = self._run + 1 if speech else 0
+                if self._run >= self.onset:
+                    self.in_speech, self._run = True, 0
+                    events.append(("start", (index - self.onset + 1) * self.frame))
+            else:
+                self._run = 0 if speech else self._run + 1
+                if self._run >= self.hangover:
+                    self.in_speech, self._run = False, 0
+                    events.append(("end", (index - self.hangover + 1) * self.frame))
+        self._frames += n
+        return events
+
+
+# -----------------------------
+# Wake word
+# -----------------------------
+
+_MEL_CACHE: dict = {}
+
+
+def _mel_filters(sample_rate: int, nfft: int, n_mels: int = N_MELS) -> np.ndarray:
+    key = (sample_rate, nfft, n_mels)
+    if key not in _MEL_CACHE:
+        def hz_to_mel(f):
+            return 2595.0 * np.log10(1.0 + f / 700.0)
+
+        def mel_to_hz(m):
+            return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+        mels = np.linspace(hz_to_mel(60.0), hz_to_mel(sample_rate / 2), n_mels + 2)
+        bins = np.floor((nfft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+        filters = np.zeros((n_mels, nfft // 2 + 1), dtype=np.float32)
+        for m in range(1, n_mels + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                filters[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                filters[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+        dct = np.cos(np.pi / n_mels * (np.arange(n_mels) + 0.5)[None, :] * np.arange(N_MFCC)[:, None])
+        _MEL_CACHE[key] = (filters, dct.astype(np.float32))
+    return _MEL_CACHE[key]
+
+
+def mfcc(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """(frames, N_MFCC - 1) cepstra, 25 ms windows every 10 ms, mean-normalised."""
+    x = samples.astype(np.float32) / 32768.0
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+    win, hop, nfft = sample_rate * 25 // 1000, sample_rate // 100, 512
+    if len(x) < win:
+        x = np.pad(x, (0, win - len(x)))
+    n = 1 + (len(x) - win) // hop
+    idx = np.arange(win)[None, :] + hop * np.arange(n)[:, None]
+    frames = x[idx] * np.hamming(win).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, nfft)) ** 2 / nfft
+    filters, dct = _mel_filters(sample_rate, nfft)
+    logmel = np.log(power @ filters.T + 1e-10)
+    ceps = logmel @ dct.T
+    ceps = ceps[:, 1:]  # c0 is loudness
+    return ceps - ceps.mean(axis=0)
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Length-normalised DTW distance between two feature sequences."""
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+    n, m = cost.shape
+    acc = np.full((n + 1, m + 1), np.inf)
+    acc[0, 0] = 0.0
+    for i in range(1, n + 1):
+        # diagonal and vertical steps for the whole row at once, then the
+        # horizontal steps in one pass
+        row = cost[i - 1] + np.minimum(acc[i - 1, :-1], acc[i - 1, 1:])
+        prev = np.inf
+        out = acc[i]
+        for j in range(m):
+            prev = min(row[j], cost[i - 1, j] + prev)
+            out[j + 1] = prev
+    return float(acc[n, m] / (n + m))
+
+
+class WakeWordDetector:
+    """DTW template matching against a few recordings of the wake word."""
+
+    def __init__(self, templates: List[np.ndarray], threshold: float = WAKE_THRESHOLD,
+                 sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.templates = [mfcc(t, sample_rate) for t in templates]
+        self.threshold = threshold or self._derive_threshold()
+
+    def _derive_threshold(self) -> float:
+        """Somewhat above how far the recordings are from each other."""
+        pairs = [dtw_distance(a, b) for i, a in enumerate(self.templates) for b in self.templates[i + 1:]]
+        return 1.35 * max(pairs) if pairs else 6.0
+
+    @classmethod
+    def from_folder(cls, folder: str = WAKE_DIR, sample_rate: int = SAMPLE_RATE) -> Optional["WakeWordDetector"]:
+        paths = sorted(glob.glob(os.path.join(folder, "*.wav")))
+        if not paths:
+            return None
+        return cls([read_wav(p, sample_rate) for p in paths], sample_rate=sample_rate)
+
+    def distance(self, samples: np.ndarray) -> float:
+        features = mfcc(samples, self.sample_rate)
+        return min(dtw_distance(features, t) for t in self.templates)
+
+    def matches(self, samples: np.ndarray) -> bool:
+        return self.distance(samples) <= self.threshold
+
+
+# -----------------------------
+# Audio sources
+# -----------------------------
+
+def read_wav(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Mono int16 samples at `sample_rate` (mixed down / resampled if needed)."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate, channels = f.getframerate(), f.getnchannels()
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != sample_rate:
+        positions = np.arange(0, len(data), rate / sample_rate)
+        data = np.interp(positions, np.arange(len(data)), data).astype(np.int16)
+    return data
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+class WavSource:
+    """Blocks from a WAV file; `realtime` paces them like a microphone."""
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE, realtime: bool = False):
+        self.samples = read_wav(path, sample_rate)
+        self.block = sample_rate * BLOCK_MS // 1000
+        self.realtime = realtime
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for start in range(0, len(self.samples), self.block):
+            if self.realtime:
+                time.sleep(BLOCK_MS / 1000)
+            yield self.samples[start:start + self.block]
+
+
+class MicSource:
+    """Blocks from the default (or MIC_DEVICE) microphone via sounddevice."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, device: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.device = device if device is not None else env("MIC_DEVICE")
+        self.block = sample_rate * BLOCK_MS // 1000
+        self._blocks: "queue.Queue[np.ndarray]" = queue.Queue(maxsize=50)
+        self._closed = threading.Event()
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        import sounddevice as sd
+
+        def callback(indata, frames, time_info, status):
+            try:
+                self._blocks.put_nowait(indata[:, 0].copy())
+            except queue.Full:
+                pass  # the consumer is behind; drop rather than block the audio thread
+
+        device = int(self.device) if self.device and str(self.device).isdigit() else self.device
+        with sd.InputStream(samplerate=self.sample_rate, channels=1, dtype="int16",
+                            blocksize=self.block, device=device, callback=callback):
+            while not self._closed.is_set():
+                try:
+                    yield self._blocks.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+
+# -----------------------------
+# Listener
+# -----------------------------
+
+class AlwaysListener:
+    """Runs VAD (+ wake word) over an audio source and calls back on triggers.
+
+    With a wake word detector, `on_wake(segment)` fires when a short speech
+    segment matches it. Without one, `on_wake` fires at the start of any
+    speech. `is_paused()` (e.g. while the assistant listens or speaks)
+    makes the listener skip audio.
+    """
+
+    def __init__(self, on_wake: Callable[[np.ndarray], None], wake: Optional[WakeWordDetector] = None,
+                 sample_rate: int = SAMPLE_RATE, is_paused: Callable[[], bool] = lambda: False):
+        self.on_wake = on_wake
+        self.wake = wake
+        self.sample_rate = sample_rate
+        self.is_paused = is_paused
+        self.vad = VoiceActivityDetector(sample_rate)
+        self.ring = RingBuffer(int(RING_SECONDS * sample_rate))
+        self._start: Optional[int] = None
+        self._stopped = threading.Event()
+        self._source = None
+        self.segments = 0
+        self.triggers = 0
+
+    def feed(self, samples: np.ndarray) -> None:
+        if self.is_paused():
+            self._start = None
+            return
+        self.ring.write(samples)
+        # VAD sample indices count from the first sample fed, as ring.total does
+        for kind, position in self.vad.process(samples):
+            if kind == "start":
+                self._start = position
+                if self.wake is None:
+                    self._trigger(self.ring.last(self.ring.total - position))
+            elif self._start is not None:
+                self.segments += 1
+                length = position - self._start
+                if self.wake is not None and \
+                        WAKE_MIN_SECONDS * self.sample_rate <= length <= WAKE_MAX_SECONDS * self.sample_rate:
+                    segment = self.ring.last(self.ring.total - self._start)[:length]
+                    if self.wake.matches(segment):
+                        self._trigger(segment)
+                self._start = None
+
+    def _trigger(self, segment: np.ndarray) -> None:
+        self.triggers += 1
+        try:
+            self.on_wake(segment)
+        except Exception as e:
+            print(f"Wake handler error: {e!r}")
+
+    def run(self, source) -> None:
+        for block in source:
+            if self._stopped.is_set():
+                break
+            self.feed(block)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if isinstance(self._source, MicSource):
+            self._source.close()
+
+    def start(self, source=None) -> threading.Thread:
+        self._source = source or MicSource(self.sample_rate)
+        thread = threading.Thread(target=self.run, args=(self._source,), daemon=True, name="wake-listener")
+        thread.start()
+        return thread
+
+
+_listener: Optional[AlwaysListener] = None
+
+
+def start_listening(on_wake: Callable[[np.ndarray], None], is_paused: Callable[[], bool] = lambda: False) -> AlwaysListener:
+    """Start listening on the microphone (wake word if one is enrolled)."""
+    global _listener
+    if _listener is None:
+        _listener = AlwaysListener(on_wake, WakeWordDetector.from_folder(), is_paused=is_paused)
+        _listener.start()
+    return _listener
+
+
+def stop_listening() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# -----------------------------
+# Enrollment / benchmark
+# -----------------------------
+
+def enroll(count: int = 3) -> None:
+    os.makedirs(WAKE_DIR, exist_ok=True)
+    got: List[np.ndarray] = []
+    source = MicSource()
+    vad = VoiceActivityDetector()
+    ring = RingBuffer(int(RING_SECONDS * SAMPLE_RATE))
+    start = None
+    print(f"Say the wake word {count} times, pausing in between.")
+    for block in source:
+        ring.write(block)
+        for kind, index in vad.process(block):
+            if kind == "start":
+                start = index
+            elif start is not None:
+                length = index - start
+                if WAKE_MIN_SECONDS * SAMPLE_RATE <= length <= WAKE_MAX_SECONDS * SAMPLE_RATE:
+                    got.append(ring.last(ring.total - start)[:length])
+                    print(f"  got {len(got)}/{count} ({length / SAMPLE_RATE:.2f} s)")
+                start = None
+        if len(got) >= count:
+            source.close()
+    for i, samples in enumerate(got):
+        write_wav(os.path.join(WAKE_DIR, f"wake-{int(time.time())}-{i}.wav"), samples)
+    detector = WakeWordDetector(got)
+    print(f"Saved to {WAKE_DIR}; threshold {detector.threshold:.2f}")
+
+
+def synthetic_word(pattern: str, sample_rate: int = SAMPLE_RATE, seconds: float = 0.6,
+                   pitch: float = 1.0, level: float = 0.25, seed: int = 0) -> np.ndarray:
+    """A voiced, word-like sound whose formants glide by `pattern`
+    ("rise" or "fall"); used by the benchmark and the WAV fixture test."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    p = t / seconds
+    f0 = pitch * (120 + 60 * p)
+    f1 = 700 - 400 * p if pattern == "rise" else 300 + 400 * p
+    f2 = 1100 + 1200 * p if pattern == "rise" else 2300 - 1400 * p
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    out = np.zeros_like(t)
+    for k in range(1, 30):
+        fk = k * f0
+        gain = np.exp(-((fk - f1) / 180) ** 2) + 0.6 * np.exp(-((fk - f2) / 250) ** 2) + 0.02
+        out += gain * np.sin(k * phase)
+    envelope = np.minimum(1, np.minimum(t, seconds - t) / 0.04)
+    out = out / np.abs(out).max() * envelope * level + rng.normal(0, 0.002, len(t))
+    return (out * 32767).astype(np.int16)
+
+
+def benchmark(seconds: int = 120) -> None:
+    rng = np.random.default_rng(1)
+    sr = SAMPLE_RATE
+    parts = []
+    while sum(len(p) for p in parts) < seconds * sr:
+        parts.append((rng.normal(0, 0.003, int(rng.uniform(1, 4) * sr)) * 32767).astype(np.int16))
+        parts.append(synthetic_word("rise" if rng.random() < 0.5 else "fall", sr,
+                                    seconds=rng.uniform(0.5, 0.8), seed=len(parts)))
+    audio = np.concatenate(parts)
+    templates = [synthetic_word("rise", sr, seconds=s, pitch=p, seed=i)
+                 for i, (s, p) in enumerate([(0.55, 1.0), (0.65, 1.05), (0.6, 0.95)])]
+
+    for label, wake in (("VAD only", None), ("VAD + wake word", WakeWordDetector(templates))):
+        listener = AlwaysListener(lambda seg: None, wake)
+        block = sr * BLOCK_MS // 1000
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        for start in range(0, len(audio), block):
+            listener.feed(audio[start:start + block])
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        duration = len(audio) / sr
+        print(f"{label:<16} {duration:.0f} s of audio: {cpu * 1000:.0f} ms CPU "
+              f"({cpu / duration * 100:.2f}% of one core), {listener.segments} segments, "
+              f"{listener.triggers} triggers")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    elif "--enroll" in sys.argv:
+        rest = [a for a in sys.argv[1:] if not a.startswith("--")]
+        enroll(int(rest[0]) if rest else 3)
+    else:
+        wake = WakeWordDetector.from_folder()
+        print("wake word:", f"{len(wake.templates)} recordings, threshold {wake.threshold:.2f}" if wake else "none (any speech)")
+        if "--wav" in sys.argv:
+            path = sys.argv[sys.argv.index("--wav") + 1]
+            listener = AlwaysListener(lambda seg: print(f"  trigger ({len(seg) / SAMPLE_RATE:.2f} s)"), wake)
+            listener.run(WavSource(path))
+            print(f"{listener.segments} speech segments, {listener.triggers} triggers")
+        else:
+            listener = AlwaysListener(lambda seg: print(f"wake ({len(seg) / SAMPLE_RATE:.2f} s)"), wake)
+            listener.run(MicSource())
@@ -0,0 +1,99 @@
+"""Cold-start import-time budget for the backends.
+
+Run from the project root:
+    python -m Backend.importtime_test          # check against the budgets
+    python -m Backend.importtime_test -v       # also show the slowest imports
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+(best of RUNS), and the cumulative time is compared with its budget. Exits
+with status 1 if any module is over budget, so it can gate a release.
+
+Budgets are deliberately loose (a few times the measured value) so only
+real regressions trip them, e.g. a heavy SDK imported at module level again.
+"""
+
+import subprocess
+import sys
+
+RUNS = 3
+
+# module -> budget in milliseconds
+BUDGETS_MS = {
+    "Backend.Config": 40,
+    "Backend.RealtimeAPIs": 40,
+    "Backend.RealtimeSnapshots": 40,
+    "Backend.RealtimePrefetch": 40,
+    "Backend.Pipeline": 40,
+    "Backend.Server": 60,
+    "Backend.Batch": 40,
+    "Backend.TTSEngines": 40,
+    "Backend.WakeListener": 300,
+    "Backend.Translation": 40,
+    "Backend.EarlyRouting": 40,
+    "Backend.Speculation": 40,
+    "Backend.EmailAssistant": 50,
+    "Backend.EmailSender": 80,
+    "Backend.EmailSpool": 100,
+    "Backend.Reminders": 40,
+    "Backend.EventBus": 40,
+    "Backend.ChatHistory": 40,
+    "Backend.AnswerCache": 40,
+    "Backend.Chatbot": 50,
+    "Backend.SpeechToText": 50,
+    "Backend.Model": 100,
+    "Backend.Automation": 180,
+    "Backend.RealtimeSearchEngine": 60,
+    "Backend.ImageGeneration": 150,
+}
+
+
+def measure(module: str):
+    """Return (cumulative_ms, [(self_ms, name), ...]) for a cold import."""
+    best = None
+    for _ in range(RUNS):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+        total = 0.0
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            # "import time:       123 |        456 |   package.module"
+            self_us, cumulative_us, name = [x.strip() for x in line.split(":", 1)[1].split("|")]
+            rows.append((int(self_us) / 1000, name))
+            if name == module:
+                total = int(cumulative_us) / 1000
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+
+def main():
+    verbose = "-v" in sys.argv
+    failed = []
+
+    print(f"{'module':<30} {'ms':>8} {'budget':>8}")
+    for module, budget in BUDGETS_MS.items():
+        total, rows = measure(module)
+        mark = "OK" if total <= budget else "OVER"
+        print(f"{module:<30} {total:>8.1f} {budget:>8} {mark}")
+        if verbose:
+            for self_ms, name in sorted(rows, reverse=True)[:5]:
+                print(f"    {self_ms:>7.1f} ms  {name}")
+        if total > budget:
+            failed.append(module)
+
+    if failed:
+        print("Over budget:", ", ".join(failed))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
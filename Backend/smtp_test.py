@@ -0,0 +1,118 @@
+"""Check SMTPSender pooling against a local aiosmtpd stand-in.
+
+Run from the project root:
+    pip install aiosmtpd
+    python -m Backend.smtp_test
+
+The stand-in counts EHLO handshakes and drops the connection once in the
+middle of the batch, so the sender has to re-connect exactly one time. A
+second run hangs up right after accepting a message: the sender must report
+it as possibly delivered instead of sending it again.
+"""
+
+import time
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from Backend.EmailSender import MAYBE_SENT, SMTPSender
+
+HOST = "127.0.0.1"
+PORT = 8025
+RECIPIENTS = [f"user{i}@example.com" for i in range(10)]
+DROP_BEFORE_MESSAGE = 5  # hang up when the 5th MAIL FROM arrives
+
+
+class CountingHandler:
+    def __init__(self, drop_after_data: bool = False):
+        self.handshakes = 0
+        self.mails = 0
+        self.delivered = []
+        self.dropped = False
+        self.drop_after_data = drop_after_data
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        self.handshakes += 1
+        return responses
+
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):
+        self.mails += 1
+        if self.mails == DROP_BEFORE_MESSAGE and not self.dropped and not self.drop_after_data:
+            self.dropped = True
+            server.transport.close()  # simulate a server-side drop
+            return "421 closing connection"
+        envelope.mail_from = address
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        if self.drop_after_data and not self.dropped:
+            self.dropped = True
+            server.transport.close()  # accepted, but the reply never arrives
+        return "250 Message accepted for delivery"
+
+
+def _authenticator(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def _start(handler):
+    controller = Controller(
+        handler,
+        hostname=HOST,
+        port=PORT,
+        authenticator=_authenticator,
+        auth_require_tls=False,
+    )
+    controller.start()
+    return controller
+
+
+def check_drop_after_data():
+    handler = CountingHandler(drop_after_data=True)
+    controller = _start(handler)
+    try:
+        sender = SMTPSender(HOST, PORT, "user", "secret", from_addr="me@example.com", use_tls=False)
+        with sender:
+            results = sender.send_many(RECIPIENTS[:3], "Duplicate test", "Only once, please.")
+    finally:
+        controller.stop()
+
+    first = results[RECIPIENTS[0]]
+    print("Dropped after DATA:", first)
+    assert isinstance(first, str) and first.startswith(MAYBE_SENT), "a mid-transaction drop is not retried"
+    assert handler.delivered.count(RECIPIENTS[0]) == 1, "the server should receive that message once"
+    assert all(results[r] is True for r in RECIPIENTS[1:3]), "the batch goes on after the drop"
+
+
+def main():
+    handler = CountingHandler()
+    controller = _start(handler)
+    try:
+        sender = SMTPSender(HOST, PORT, "user", "secret", from_addr="me@example.com", use_tls=False)
+        start = time.perf_counter()
+        with sender:
+            results = sender.send_many(RECIPIENTS, "Pooling test", "Hello from the pool!")
+        elapsed = time.perf_counter() - start
+    finally:
+        controller.stop()
+
+    ok = [r for r, res in results.items() if res is True]
+    print(f"Sent {len(ok)}/{len(RECIPIENTS)} in {elapsed * 1000:.1f} ms")
+    print("Server EHLO handshakes:", handler.handshakes)
+    print("Client sessions opened:", sender.handshakes)
+    for r, res in results.items():
+        if res is not True:
+            print(f"  - {r}: {res}")
+
+    assert len(ok) == len(RECIPIENTS), "every recipient should be delivered"
+    assert sorted(handler.delivered) == sorted(RECIPIENTS), "server should receive each message once"
+    assert sender.handshakes == 2, "one session for the batch plus one re-connect after the drop"
+
+    check_drop_after_data()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
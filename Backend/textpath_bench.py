@@ -0,0 +1,188 @@
+"""Micro-benchmarks for the per-query text processing (routing overhead).
+
+Run from the project root:
+    python -m Backend.textpath_bench                # compare with the stored baseline
+    python -m Backend.textpath_bench --save         # record a new baseline
+    python -m Backend.textpath_bench --threshold 1.3
+
+Every case runs its function over a corpus of realistic commands and
+takes the best per-call time of several rounds. Results are compared
+with ``textpath_baseline.json``; a case slower than ``threshold`` x its
+baseline fails the run (exit status 1).
+
+Times are normalised by a fixed pure-Python calibration loop, so a baseline
+recorded on one machine stays meaningful on a faster or slower one. A single
+pass is too noisy for that (CPU frequency and background load move both
+numbers), so the whole suite runs ``REPEATS`` times, each pass normalised by
+its own calibration, and the median of the passes is compared. Re-record
+with --save after an intended change.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "textpath_baseline.json")
+THRESHOLD = 2.0          # median-of-REPEATS ratios stay within ~1.3x between runs
+ROUNDS = 7
+REPEATS = 5
+MIN_ROUND_SECONDS = 0.05
+
+COMMANDS = [
+    "open chrome",
+    "close notepad",
+    "play afsanay by ys",
+    "Open Visual Studio Code and tell me about python decorators",
+    "what is python programming language?",
+    "who is the prime minister of bangladesh",
+    "how are you today",
+    "generate image of a lion in the jungle",
+    "supercar image",
+    "show me a picture of the eiffel tower at night",
+    "car photo",
+    "set a reminder at 9:00pm on 25th june for my business meeting",
+    "remind me in 10 minutes to call mom",
+    "what's the weather in Dhaka today",
+    "temperature in new york",
+    "will it rain in london tomorrow?",
+    "convert 100 USD to BDT",
+    "exchange rate EUR JPY",
+    "USD BDT",
+    "how much is 50 GBP in INR",
+    "send email to john dot doe at gmail dot com about the meeting",
+    "email to alice@example.com | subject Hello | body See you at 5 | cc bob@example.com",
+    "google search latest iphone price",
+    "youtube search lofi music",
+    "system volume up",
+    "content write an application for sick leave",
+    "search my history for bangladesh",
+    "what did I ask about python last week",
+    "Tell me a joke.",
+    "could you explain quantum computing in simple words",
+    "bye",
+]
+
+SPOKEN_EMAILS = [
+    "john dot doe at gmail dot com",
+    "send it to Alice underscore Smith at example dot org please.",
+    "my email is bob(at)company(dot)co.uk and cc carol at mail dot com",
+    "no address in this sentence at all",
+    "reach me at dev.team@startup.io, or ops at startup dot io!",
+]
+
+DMM_RESPONSES = [
+    "general how are you",
+    "open chrome, open firefox\ngeneral tell me about python",
+    "reminder 9:00pm 25th june business meeting\ngeneral what is today's date",
+    "realtime who is the prime minister of bangladesh",
+    "generate image a lion\ngenerate image a tiger\nplay afsanay",
+    "system mute\r\ncontent application for leave\nsomething unexpected",
+    "send email to john@example.com about the meeting",
+    "exit",
+]
+
+
+def _calibrate() -> float:
+    """Seconds for a fixed pure-Python workload (best of ROUNDS)."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200_000):
+            total += i & 7
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _measure(fn, corpus) -> float:
+    """Best per-call time in nanoseconds of `fn` over `corpus`."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            for item in corpus:
+                fn(item)
+        if time.perf_counter() - start >= MIN_ROUND_SECONDS:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for item in corpus:
+                fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / (loops * len(corpus)) * 1e9
+
+
+def cases():
+    """name -> (function, corpus)"""
+    import Main
+    from Backend import Automation, EmailAssistant, Model, RealtimeAPIs
+
+    normalised = [Main._norm_cmd(c) for c in COMMANDS]
+    return {
+        "Main.QueryModifier": (Main.QueryModifier, COMMANDS),
+        "Main._norm_cmd": (Main._norm_cmd, COMMANDS),
+        "Main._image_request_prompt": (Main._image_request_prompt, normalised),
+        "EmailAssistant._normalize_spoken_email_text": (EmailAssistant._normalize_spoken_email_text, SPOKEN_EMAILS + COMMANDS),
+        "EmailAssistant.extract_emails": (EmailAssistant.extract_emails, SPOKEN_EMAILS + COMMANDS),
+        "RealtimeAPIs._parse_currency_query": (RealtimeAPIs._parse_currency_query, COMMANDS),
+        "RealtimeAPIs._parse_weather_query": (RealtimeAPIs._parse_weather_query, COMMANDS),
+        "Automation.parse_email_command": (Automation.parse_email_command, [c for c in COMMANDS if "email" in c]),
+        "Model.FilterTasks": (Model.FilterTasks, DMM_RESPONSES),
+    }
+
+
+def main() -> None:
+    save = "--save" in sys.argv
+    threshold = THRESHOLD
+    if "--threshold" in sys.argv:
+        threshold = float(sys.argv[sys.argv.index("--threshold") + 1])
+
+    suite = cases()
+    calibrations = []
+    passes = {name: [] for name in suite}
+    for _ in range(REPEATS):
+        calibration = _calibrate()
+        calibrations.append(calibration)
+        for name, (fn, corpus) in suite.items():
+            passes[name].append(_measure(fn, corpus) / calibration)
+    results = {name: statistics.median(values) for name, values in passes.items()}
+    calibration = statistics.median(calibrations)
+
+    if save:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({name: round(v, 2) for name, v in results.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failed = []
+    scale = calibration  # relative units -> ns on this machine
+    print(f"{'case':<46} {'ns/call':>9} {'baseline':>9} {'ratio':>6}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        ratio = value / base if base else None
+        mark = "" if ratio is None else ("OK" if ratio <= threshold else "SLOWER")
+        base_ns = f"{base * scale:9.0f}" if base else f"{'-':>9}"
+        ratio_s = f"{ratio:6.2f}" if ratio is not None else f"{'-':>6}"
+        print(f"{name:<46} {value * scale:9.0f} {base_ns} {ratio_s} {mark}")
+        if ratio is not None and ratio > threshold:
+            failed.append(name)
+
+    if failed:
+        print(f"Slower than {threshold}x baseline:", ", ".join(failed))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
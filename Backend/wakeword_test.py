@@ -0,0 +1,103 @@
+"""WAV-fixture check for the always-listening loop (no microphone needed).
+
+Run from the project root:
+    python -m Backend.wakeword_test
+    python -m Backend.wakeword_test path/to/fixtures   # keep the WAV files
+
+Writes wake word recordings and a clip of background noise with two wake
+words and two other words in it, plays the clip through
+:class:`Backend.WakeListener.AlwaysListener` from a ``WavSource``, and checks
+which segments the VAD finds and which trigger. Exits with status 1 on a
+mismatch.
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from Backend.WakeListener import (
+    SAMPLE_RATE,
+    AlwaysListener,
+    WakeWordDetector,
+    WavSource,
+    synthetic_word,
+    write_wav,
+)
+
+
+def _noise(seconds: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.normal(0, 0.003, int(seconds * SAMPLE_RATE)) * 32767).astype(np.int16)
+
+
+def make_fixtures(folder: str) -> str:
+    """Writes wake/*.wav and clip.wav; returns the clip path."""
+    wake_dir = os.path.join(folder, "wake")
+    os.makedirs(wake_dir, exist_ok=True)
+    for i, (seconds, pitch) in enumerate([(0.55, 1.0), (0.65, 1.05), (0.6, 0.95)]):
+        write_wav(os.path.join(wake_dir, f"wake-{i}.wav"), synthetic_word("rise", seconds=seconds, pitch=pitch, seed=i))
+
+    clip = [
+        _noise(1.5, 10),
+        synthetic_word("fall", seconds=0.6, seed=11),            # other word
+        _noise(1.0, 12),
+        synthetic_word("rise", seconds=0.7, pitch=0.9, seed=13),  # wake word
+        _noise(1.0, 14),
+        synthetic_word("fall", seconds=0.9, pitch=1.1, seed=15),  # other word
+        _noise(0.8, 16),
+        synthetic_word("rise", seconds=0.5, pitch=1.1, seed=17),  # wake word
+        _noise(1.0, 18),
+    ]
+    path = os.path.join(folder, "clip.wav")
+    write_wav(path, np.concatenate(clip))
+    return path
+
+
+def run(folder: str) -> int:
+    clip = make_fixtures(folder)
+    failures = 0
+
+    def check(label: str, got, want) -> None:
+        nonlocal failures
+        ok = got == want
+        failures += not ok
+        print(f"{label:<40} {got!s:>12}  {'OK' if ok else f'expected {want}'}")
+
+    wake = WakeWordDetector.from_folder(os.path.join(folder, "wake"))
+    hits = []
+    listener = AlwaysListener(lambda seg: hits.append(len(seg) / SAMPLE_RATE), wake)
+    listener.run(WavSource(clip))
+    check("speech segments", listener.segments, 4)
+    check("wake word triggers", listener.triggers, 2)
+    check("wake segments 0.4-0.8 s", all(0.4 <= h <= 0.8 for h in hits), True)
+
+    listener = AlwaysListener(lambda seg: None, None)
+    listener.run(WavSource(clip))
+    check("no wake word: triggers on any speech", listener.triggers, 4)
+
+    listener = AlwaysListener(lambda seg: None, wake, is_paused=lambda: True)
+    listener.run(WavSource(clip))
+    check("paused: no triggers", listener.triggers, 0)
+
+    silence = os.path.join(folder, "noise.wav")
+    write_wav(silence, _noise(5.0, 20))
+    listener = AlwaysListener(lambda seg: None, None)
+    listener.run(WavSource(silence))
+    check("background noise only: segments", listener.segments, 0)
+
+    print("OK" if not failures else f"{failures} check(s) failed")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        os.makedirs(sys.argv[1], exist_ok=True)
+        sys.exit(run(sys.argv[1]))
+    with tempfile.TemporaryDirectory() as folder:
+        sys.exit(run(folder))
+
+
+if __name__ == "__main__":
+    main()
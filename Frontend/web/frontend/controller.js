@@ -22,33 +22,200 @@ $(document).ready(function () {
     $("#SiriWave").attr("hidden", true);
   }
 
+  // Interim speech transcript: replaced in place as the user talks (no animation)
+  eel.expose(ShowTranscript);
+  function ShowTranscript(text) {
+    $(".siri-message").text(text);
+  }
+
+  // Same as pressing the mic button (used by the always-on wake word)
+  eel.expose(ShowSiriWave);
+  function ShowSiriWave() {
+    $("#Oval").attr("hidden", true);
+    $("#SiriWave").attr("hidden", false);
+  }
+
+  // ---------------------------------------------------------------------
+  // Chat log
+  //
+  // Every message lives in `chatMessages`; only a window of at most
+  // CHAT_WINDOW rows is in the DOM. New messages are queued and appended
+  // once per animation frame (a burst costs one layout, not one per
+  // message), rows are built with textContent (never parsed as HTML), and
+  // older/newer pages are swapped in as the user scrolls.
+  // ---------------------------------------------------------------------
+  var CHAT_WINDOW = 150; // max rows in the DOM
+  var CHAT_PAGE = 50; // rows added per scroll step / shown after a history load
+  var chatMessages = []; // [{ role: "user" | "assistant", text: "..." }]
+  var chatStart = 0; // index of the first rendered message
+  var chatEnd = 0; // one past the last rendered message
+  var chatFlushed = 0; // chatMessages.length at the last flush
+  var chatFlushPending = false;
+  var chatScrollPending = false;
+
+  var nextFrame =
+    window.requestAnimationFrame ||
+    function (fn) {
+      return setTimeout(fn, 16);
+    };
+
+  function chatBody() {
+    return document.getElementById("chat-canvas-body");
+  }
+
+  function buildChatRow(msg) {
+    var isUser = msg.role === "user";
+    var row = document.createElement("div");
+    row.className = "row mb-4 " + (isUser ? "justify-content-end" : "justify-content-start");
+    var wrap = document.createElement("div");
+    wrap.className = "width-size";
+    var bubble = document.createElement("div");
+    bubble.className = isUser ? "sender_message" : "receiver_message";
+    bubble.textContent = msg.text;
+    wrap.appendChild(bubble);
+    row.appendChild(wrap);
+    return row;
+  }
+
+  function renderRows(from, to) {
+    var frag = document.createDocumentFragment();
+    for (var i = from; i < to; i++) {
+      frag.appendChild(buildChatRow(chatMessages[i]));
+    }
+    return frag;
+  }
+
+  function nearBottom(box) {
+    return box.scrollHeight - box.scrollTop - box.clientHeight < 40;
+  }
+
+  // Drop rows from the top until the window fits, keeping the view steady.
+  function trimTop(box, keepScroll) {
+    var extra = chatEnd - chatStart - CHAT_WINDOW;
+    if (extra <= 0) return;
+    var before = box.scrollHeight;
+    for (var i = 0; i < extra; i++) box.removeChild(box.firstChild);
+    chatStart += extra;
+    if (keepScroll) box.scrollTop -= before - box.scrollHeight;
+  }
+
+  function trimBottom(box) {
+    var extra = chatEnd - chatStart - CHAT_WINDOW;
+    for (var i = 0; i < extra; i++) box.removeChild(box.lastChild);
+    if (extra > 0) chatEnd -= extra;
+  }
+
+  function flushChat() {
+    chatFlushPending = false;
+    var box = chatBody();
+    var atTail = chatEnd === chatFlushed;
+    chatFlushed = chatMessages.length;
+    // If the user is paging through older messages, new ones are rendered
+    // when they scroll back down.
+    if (!box || !atTail) return;
+
+    var follow = nearBottom(box);
+    box.appendChild(renderRows(chatEnd, chatMessages.length));
+    chatEnd = chatMessages.length;
+    trimTop(box, !follow);
+    if (follow) box.scrollTop = box.scrollHeight;
+  }
+
+  function addChatMessage(role, message) {
+    var text = message == null ? "" : String(message);
+    if (text.trim() === "") return;
+    chatMessages.push({ role: role, text: text });
+    if (!chatFlushPending) {
+      chatFlushPending = true;
+      nextFrame(flushChat);
+    }
+  }
+
+  function onChatScroll() {
+    chatScrollPending = false;
+    var box = chatBody();
+    if (!box) return;
+
+    if (box.scrollTop < 50 && chatStart > 0) {
+      // Page older messages in above, keeping the visible row in place.
+      var from = Math.max(0, chatStart - CHAT_PAGE);
+      var before = box.scrollHeight;
+      box.insertBefore(renderRows(from, chatStart), box.firstChild);
+      chatStart = from;
+      box.scrollTop += box.scrollHeight - before;
+      trimBottom(box);
+    } else if (nearBottom(box) && chatEnd < chatFlushed) {
+      var to = Math.min(chatFlushed, chatEnd + CHAT_PAGE);
+      box.appendChild(renderRows(chatEnd, to));
+      chatEnd = to;
+      trimTop(box, true);
+    }
+  }
+
+  var chatBox = chatBody();
+  if (chatBox) {
+    chatBox.addEventListener(
+      "scroll",
+      function () {
+        if (!chatScrollPending) {
+          chatScrollPending = true;
+          nextFrame(onChatScroll);
+        }
+      },
+      { passive: true }
+    );
+  }
+
+  // Opening the panel jumps to the newest messages.
+  $("#chatCanvas").on("shown.bs.offcanvas", function () {
+    var box = chatBody();
+    if (!box) return;
+    if (chatEnd < chatFlushed) {
+      loadChatHistory(null);
+    } else {
+      box.scrollTop = box.scrollHeight;
+    }
+  });
+
   eel.expose(senderText);
   function senderText(message) {
-    var chatBox = document.getElementById("chat-canvas-body");
-    if (message.trim() !== "") {
-      chatBox.innerHTML += `<div class="row justify-content-end mb-4">
-          <div class = "width-size">
-          <div class="sender_message">${message}</div>
-      </div>`;
-
-      chatBox.scrollTop = chatBox.scrollHeight;
-    }
+    addChatMessage("user", message);
   }
 
   eel.expose(receiverText);
   function receiverText(message) {
-    var chatBox = document.getElementById("chat-canvas-body");
-    if (message.trim() !== "") {
-      chatBox.innerHTML += `<div class="row justify-content-start mb-4">
-          <div class = "width-size">
-          <div class="receiver_message">${message}</div>
-          </div>
-      </div>`;
-
-      // Scroll to the bottom of the chat box
-      chatBox.scrollTop = chatBox.scrollHeight;
+    addChatMessage("assistant", message);
+  }
+
+  // Replace the chat with `items` in one call: [[role, text], ...] or
+  // [{role, content}, ...]. Only the newest CHAT_PAGE rows are rendered;
+  // older ones are paged in on scroll. `null` re-renders the current log.
+  eel.expose(loadChatHistory);
+  function loadChatHistory(items) {
+    try {
+      if (items) {
+        chatMessages = [];
+        for (var i = 0; i < items.length; i++) {
+          var it = items[i];
+          var role = Array.isArray(it) ? it[0] : it.role;
+          var text = Array.isArray(it) ? it[1] : it.content;
+          if (text == null || String(text).trim() === "") continue;
+          chatMessages.push({ role: role === "user" ? "user" : "assistant", text: String(text) });
+        }
+      }
+      chatFlushed = chatEnd = chatMessages.length;
+      chatStart = Math.max(0, chatEnd - CHAT_PAGE);
+
+      var box = chatBody();
+      if (!box) return;
+      box.textContent = "";
+      box.appendChild(renderRows(chatStart, chatEnd));
+      box.scrollTop = box.scrollHeight;
+    } catch (e) {
+      console.log("loadChatHistory error:", e);
     }
   }
+
   eel.expose(hideLoader);
   function hideLoader() {
     $("#Loader").attr("hidden", true);
@@ -16,13 +16,15 @@ from __future__ import annotations
 
 import json
 import os
+import queue
 import re
 import subprocess
 import sys
+import threading
 import traceback
 from asyncio import run as asyncio_run
 from time import sleep
-from typing import List, Optional, Tuple
+from typing import List, Optional
 
 try:
     import eel  # type: ignore
@@ -31,7 +33,21 @@ except ModuleNotFoundError as e:
         "Missing dependency 'eel'. Install dependencies with: pip install -r Requirements.txt"
     ) from e
 
-from dotenv import dotenv_values
+from Backend.Config import get_env
+from Backend.EventBus import ALL, ANNOUNCE, IMAGE, MIC, STATUS, TRANSCRIPT, WAKE, last, publish, start_bridge, subscribe
+# Routing rules are shared with the headless modes (server, batch).
+from Backend.Pipeline import (
+    AUTOMATION_PREFIXES,
+    EXIT_WORDS,
+    REMINDER_PREFIXES,
+    AnswerModifier,
+    QueryModifier,
+    _image_request_prompt,
+    _norm_cmd,
+    fallback_decision,
+    is_email_command,
+    is_pure_automation,
+)
 
 # ----------------------------
 # Paths / environment
@@ -40,37 +56,26 @@ from dotenv import dotenv_values
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 os.chdir(BASE_DIR)
 
-ENV_VARS = dotenv_values(os.path.join(BASE_DIR, ".env"))
+ENV_VARS = get_env()
 
 USERNAME = ENV_VARS.get("Username") or ENV_VARS.get("username") or "User"
 ASSISTANT_NAME = ENV_VARS.get("Assistantname") or ENV_VARS.get("AssistantName") or "Jarvis"
 
 DATA_DIR = os.path.join(BASE_DIR, "Data")
 CHATLOG_PATH = os.path.join(DATA_DIR, "ChatLog.json")
+CHAT_HISTORY_LIMIT = 5000  # messages sent to the UI on start-up
+ALWAYS_LISTEN = (ENV_VARS.get("ALWAYS_LISTEN") or "").strip().lower() in ("1", "true", "yes", "on")
+SPECULATIVE_CHAT = (ENV_VARS.get("SPECULATIVE_CHAT") or "").strip().lower() in ("1", "true", "yes", "on")
 
 FRONTEND_DIR = os.path.join(BASE_DIR, "Frontend")
-FRONTEND_FILES_DIR = os.path.join(FRONTEND_DIR, "Files")
 WEB_DIR = os.path.join(FRONTEND_DIR, "web")  # contains: WEB_DIR/frontend/index.html
 WEB_START_PAGE = "frontend/index.html"
 
-IMAGE_GEN_FILE = os.path.join(FRONTEND_FILES_DIR, "ImageGeneration.data")
-
 DEFAULT_MESSAGE = (
     f"{USERNAME} : Hello {ASSISTANT_NAME}, How are you?\n"
     f"{ASSISTANT_NAME} : Welcome {USERNAME}. I am doing well. How may I help you?"
 )
 
-# Commands that should be sent to Automation()
-AUTOMATION_PREFIXES = [
-    "open",
-    "close",
-    "play",
-    "system",
-    "content",
-    "google search",
-    "youtube search",
-]
-
 # Keep track of spawned subprocesses (e.g., image generation)
 _SUBPROCESSES: List[subprocess.Popen] = []
 
@@ -89,84 +94,14 @@ def _eel_safe(fn_name: str, *args):
         pass
 
 
-def AnswerModifier(answer: str) -> str:
-    lines = (answer or "").split("\n")
-    non_empty = [ln for ln in lines if ln.strip()]
-    return "\n".join(non_empty)
-
-
-def QueryModifier(query: str) -> str:
-    q = (query or "").strip()
-    if not q:
-        return ""
-
-    # Detect if it's a question (best-effort)
-    is_question = q.endswith("?") or q.lower().startswith(
-        (
-            "how",
-            "what",
-            "who",
-            "where",
-            "when",
-            "why",
-            "which",
-            "whose",
-            "whom",
-            "can you",
-            "could you",
-            "would you",
-            "is",
-            "are",
-            "do",
-            "does",
-            "did",
-            "will",
-            "shall",
-            "may",
-            "might",
-        )
-    )
-
-    # strip trailing punctuation
-    q = re.sub(r"[\s\.\?!]+$", "", q).strip()
-    if not q:
-        return ""
-
-    q = q[0].upper() + q[1:] if len(q) > 1 else q.upper()
-    return q + ("?" if is_question else ".")
-
-
-def _norm_cmd(text: str) -> str:
-    t = (text or "").strip().lower()
-    t = re.sub(r"[\s\.,;:!\?]+$", "", t)
-    return t
-
-
 def _ensure_dirs_and_files() -> None:
     os.makedirs(DATA_DIR, exist_ok=True)
-    os.makedirs(FRONTEND_FILES_DIR, exist_ok=True)
 
     # chat log
     if not os.path.exists(CHATLOG_PATH):
         with open(CHATLOG_PATH, "w", encoding="utf-8") as f:
             json.dump([], f, indent=2)
 
-    # core frontend files used by backend scripts
-    for fname, default in [
-        ("Database.data", ""),
-        ("Responses.data", ""),
-        ("Status.data", "Available..."),
-        ("Mic.data", "False"),
-        ("LastRaw.data", ""),
-        ("LastLang.data", ""),
-        ("LastEnglish.data", ""),
-        ("ImageGeneration.data", ""),
-    ]:
-        fpath = os.path.join(FRONTEND_FILES_DIR, fname)
-        if not os.path.exists(fpath):
-            with open(fpath, "w", encoding="utf-8") as f:
-                f.write(default)
-
 
 def _load_chatlog() -> list:
     try:
@@ -197,8 +132,8 @@ def _seed_default_chat_if_empty() -> None:
 
 
 def _ui_status(status: str) -> None:
-    # short status line (top / siri message area)
-    _eel_safe("DisplayMessage", status)
+    # short status line (top / siri message area), shown by _dispatch_ui_event
+    publish(STATUS, status)
 
 
 def _ui_user(message: str) -> None:
@@ -209,27 +144,44 @@ def _ui_assistant(message: str) -> None:
     _eel_safe("receiverText", message)
 
 
+def _ui_history(items: List[dict]) -> None:
+    rows = []
+    for item in items:
+        content = str(item.get("content") or "")
+        if content.strip():
+            role = "user" if (item.get("role") or "").lower() == "user" else "assistant"
+            rows.append([role, content])
+    _eel_safe("loadChatHistory", rows)
+
+
 def _ui_idle() -> None:
     _eel_safe("ShowHood")
     _ui_status("Available...")
 
 
 def _speech_recognition() -> str:
+    publish(MIC, True)
     try:
         from Backend.SpeechToText import SpeechRecognition
         return SpeechRecognition() or ""
     except Exception as e:
         _ui_assistant(f"Speech recognition error: {e}")
         return ""
+    finally:
+        publish(MIC, False)
 
 
 def _speak(text: str) -> None:
+    global _busy
+    _busy += 1
     try:
         from Backend.TextToSpeech import TextToSpeech
         TextToSpeech(text)
     except Exception:
         # TTS failure shouldn't crash the assistant
         pass
+    finally:
+        _busy -= 1
 
 
 # ----------------------------
@@ -258,18 +210,37 @@ def SendEmailFlow(initial_command: str = "") -> bool:
 
     Triggered when the user says "send email" or when the DMM outputs a send-email task.
     """
-    from Backend.Automation import SendEmailSMTP
+    from concurrent.futures import TimeoutError as DraftTimeout
+    from Backend.EmailSpool import enqueue
     from Backend.EmailAssistant import (
+        DRAFT_TIMEOUT,
         extract_emails,
         clean_subject,
         maybe_extract_subject,
         maybe_extract_about,
-        draft_email_body,
+        start_draft,
     )
 
     cmd = initial_command or ""
+    about = maybe_extract_about(cmd)
+    body_match = re.search(r"\bbody\b\s+(.*)$", cmd, flags=re.I)
+    provided_body = (body_match.group(1).strip() if body_match else "")
 
-    # 1) Recipient(s)
+    # 1) Subject first: once it is known the draft is written in the background
+    #    while we are still talking/listening for the recipient.
+    subject = maybe_extract_subject(cmd)
+    asked_subject = False  # asked once at most
+    if not subject and not extract_emails(cmd):
+        subject = _ask_user("What should the email subject be?")
+        asked_subject = True
+    subject = clean_subject(subject)
+    if asked_subject and not subject:
+        _assistant_say("I didn't catch a subject. Cancelling the email.")
+        return False
+
+    draft = start_draft(subject=subject, about=about) if subject and not provided_body else None
+
+    # 2) Recipient(s)
     recipients = extract_emails(cmd)
     if not recipients:
         r_text = _ask_user("Please tell me the recipient email address.")
@@ -280,27 +251,33 @@ def SendEmailFlow(initial_command: str = "") -> bool:
         recipients = extract_emails(r_text)
 
     if not recipients:
+        if draft is not None:
+            draft.cancel()
         _assistant_say("Sorry, I still couldn't detect a valid email address, so I cancelled sending the email.")
         return False
 
-    # 2) Subject
-    subject = maybe_extract_subject(cmd)
+    # Recipient came with the command but the subject did not: ask now.
     if not subject:
-        subject = _ask_user("What should the email subject be?")
-    subject = clean_subject(subject)
+        subject = clean_subject(_ask_user("What should the email subject be?"))
+        if subject and not provided_body:
+            draft = start_draft(subject=subject, about=about)
 
     if not subject:
         _assistant_say("I didn't catch a subject. Cancelling the email.")
         return False
 
-    about = maybe_extract_about(cmd)
-
     # 3) Draft email body (or use provided body)
-    body_match = re.search(r"\bbody\b\s+(.*)$", cmd, flags=re.I)
-    provided_body = (body_match.group(1).strip() if body_match else "")
-
     _ui_status("Writing email...")
-    body = provided_body or draft_email_body(subject=subject, about=about)
+    body = provided_body
+    if not body:
+        try:
+            body = draft.result(timeout=DRAFT_TIMEOUT)
+        except DraftTimeout:
+            draft.cancel()
+            body = _ask_user("Writing the draft is taking too long. Please tell me the message instead.")
+    if not body:
+        _assistant_say("I didn't get a message for the email. Cancelling it.")
+        return False
 
     # preview
     _ui_assistant(
@@ -309,55 +286,213 @@ def SendEmailFlow(initial_command: str = "") -> bool:
         f"Subject: {subject}\n\n"
         f"{body}"
     )
-    _speak("Okay. I drafted the email and I am sending it now.")
-
-    # 4) Send
-    _ui_status("Sending email...")
-    ok: List[str] = []
-    failed: List[Tuple[str, str]] = []
-    for to_addr in recipients:
-        res = SendEmailSMTP(to_addr, subject, body)
-        if res is True:
-            ok.append(to_addr)
-        else:
-            failed.append((to_addr, str(res)))
 
-    # 5) Report result
-    if ok and not failed:
-        _assistant_say("Email sent successfully.")
-        return True
+    # 4) Queue for background delivery; the result is announced when it finishes.
+    enqueue(recipients, subject, body)
+    _assistant_say("Okay. I drafted the email and queued it for sending. I'll tell you when it's delivered.")
+    return True
+
+
+# ----------------------------
+# Event bus -> UI
+# ----------------------------
+# Events published on the Eel thread are shown immediately. Events from
+# other threads (email spool, reminders, the image worker via the bridge)
+# are queued and the Eel loop is woken through a gevent async watcher.
+
+_busy = 0  # > 0 while a command runs or the assistant speaks
+
+_UI_THREAD = threading.get_ident()  # Eel's gevent loop runs on the main thread
+_UI_EVENTS: "queue.Queue[tuple]" = queue.Queue()
+_ui_wakeup = None
+_ui_draining = False
+
+
+def _dispatch_ui_event(topic: str, payload) -> None:
+    if topic == STATUS:
+        _eel_safe("DisplayMessage", payload)
+    elif topic == TRANSCRIPT and isinstance(payload, dict):
+        _eel_safe("ShowTranscript", payload.get("text") or "")
+    elif topic == ANNOUNCE:
+        _assistant_say(payload, speak=True)
+    elif topic == WAKE:
+        if not _is_busy():
+            _eel_safe("ShowSiriWave")
+            eel.spawn(takeAllCommands)
+    elif topic == IMAGE and isinstance(payload, dict):
+        if payload.get("state") == "done":
+            count = len(payload.get("paths") or [])
+            _assistant_say(f"Your image{'s are' if count > 1 else ' is'} ready.", speak=True)
+        elif payload.get("state") == "failed":
+            _assistant_say(f"Image generation failed. {payload.get('error') or ''}".strip(), speak=True)
+
+
+def _drain_ui_events() -> None:
+    global _ui_draining
+    if _ui_draining:
+        return  # the running drain will pick the new events up
+    _ui_draining = True
+    try:
+        while True:
+            try:
+                topic, payload = _UI_EVENTS.get_nowait()
+            except queue.Empty:
+                return
+            _dispatch_ui_event(topic, payload)
+    finally:
+        _ui_draining = False
+
+
+def _on_bus_event(topic: str, payload) -> None:
+    if threading.get_ident() == _UI_THREAD:
+        _dispatch_ui_event(topic, payload)
+        return
+    _UI_EVENTS.put((topic, payload))
+    if _ui_wakeup is not None:
+        _ui_wakeup.send()  # thread-safe
+
+
+def _ui_event_poller() -> None:
+    """Fallback when gevent's async watcher is unavailable."""
+    while True:
+        _drain_ui_events()
+        eel.sleep(0.05)
+
+
+def _start_ui_events() -> None:
+    global _ui_wakeup
+    subscribe(ALL, _on_bus_event)
+    try:
+        import gevent
+        _ui_wakeup = gevent.get_hub().loop.async_()
+        _ui_wakeup.start(lambda: gevent.spawn(_drain_ui_events))
+    except Exception:
+        eel.spawn(_ui_event_poller)
+    _drain_ui_events()
+
+
+def _on_email_finished(job: dict) -> None:
+    from Backend.EmailSpool import describe
+    publish(ANNOUNCE, describe(job))
+
+
+def _on_reminder_due(reminder_id: int, due, message: str) -> None:
+    from datetime import datetime
+    late = (datetime.now() - due).total_seconds()
+    prefix = "Reminder" if late < 120 else f"Missed reminder from {due.strftime('%d %B %I:%M %p')}"
+    publish(ANNOUNCE, f"{prefix}: {message}")
+
+
+def _is_busy() -> bool:
+    return _busy > 0 or bool(last(MIC))
+
+
+def _on_wake(segment) -> None:
+    publish(WAKE, True)  # handled on the UI thread like a mic button press
+
+
+def _start_background_services() -> None:
+    _start_ui_events()
+    try:
+        start_bridge()  # lets the image worker publish job updates
+    except Exception as e:
+        print("Event bus bridge unavailable:", repr(e))
+
+    try:
+        from Backend.EmailSpool import add_listener, start
+        add_listener(_on_email_finished)
+        start()  # also re-queues anything interrupted by a previous crash
+    except Exception as e:
+        print("Email spool unavailable:", repr(e))
+
+    try:
+        from Backend.Reminders import add_listener as add_reminder_listener
+        add_reminder_listener(_on_reminder_due)  # starts the timer; overdue reminders fire now
+    except Exception as e:
+        print("Reminders unavailable:", repr(e))
+
+    try:
+        from Backend.RealtimePrefetch import start as start_prefetch
+        start_prefetch(_load_chatlog())  # the log seeds popular currencies/places on first run
+    except Exception as e:
+        print("Realtime prefetch unavailable:", repr(e))
+
+    try:
+        from Backend.EarlyRouting import start as start_early_routing
+        start_early_routing()  # decision model runs on stable speech prefixes
+    except Exception as e:
+        print("Early routing unavailable:", repr(e))
+
+    if ALWAYS_LISTEN:
+        try:
+            from Backend.WakeListener import start_listening
+            start_listening(_on_wake, is_paused=_is_busy)
+        except Exception as e:
+            print("Always-on listening unavailable:", repr(e))
 
-    lines: List[str] = []
-    if ok:
-        lines.append(f"✅ Sent to: {', '.join(ok)}")
-    if failed:
-        lines.append("❌ Failed:")
-        for to_addr, err in failed:
-            lines.append(f"  - {to_addr}: {err}")
 
-    _ui_assistant("\n".join(lines))
-    _assistant_say("I couldn't send the email to everyone. Please check the chat for details.")
-    return False
+def _set_reminder(text: str) -> None:
+    try:
+        from Backend.Reminders import ReminderInPast, add_reminder_from_text, describe_due
+        added = add_reminder_from_text(text)
+    except ReminderInPast as e:
+        _assistant_say(f"I can't set a reminder in the past: {e}.")
+        return
+    except Exception as e:
+        _ui_assistant(f"Reminder error: {e}")
+        return
+    if not added:
+        _assistant_say("I couldn't tell when to remind you. Please say a time or date, like 'remind me at 9 pm to call mom'.")
+        return
+    _, due, message = added
+    _assistant_say(f"Okay, I'll remind you {describe_due(due)}: {message}.")
 
 
 # ----------------------------
 # Core assistant logic
 # ----------------------------
 
-def _run_image_generation(prompt: str) -> None:
-    os.makedirs(FRONTEND_FILES_DIR, exist_ok=True)
+def _report_automation(command: str, result) -> None:
+    """Show each automation result as soon as that command finishes."""
+    from Backend.Automation import DescribeResult
+    _ui_assistant(DescribeResult(command, result))
+
+
+def _report_content_progress(topic: str, chars: int) -> None:
+    _ui_status(f"Writing {topic}... {chars} characters")
 
-    with open(IMAGE_GEN_FILE, "w", encoding="utf-8") as f:
-        f.write(f"{prompt},True")
 
+def _run_automation(tasks: List[str]) -> List[str]:
+    """Run automation tasks, reporting each as it finishes; returns the ones that failed."""
+    try:
+        from Backend.Automation import Automation
+        return asyncio_run(Automation(tasks, on_result=_report_automation, on_progress=_report_content_progress))
+    except Exception as e:
+        _ui_assistant(f"Automation error: {e}")
+        return list(tasks)
+
+
+def _say_tasks_done(tasks: List[str], failed: List[str]) -> None:
+    """Spoken summary once only tasks were run (each result is already shown)."""
+    if not failed:
+        _assistant_say("Done.", speak=True)
+    elif len(failed) == len(tasks):
+        _assistant_say("Sorry, that didn't work." if len(tasks) == 1 else "Sorry, none of that worked.", speak=True)
+    else:
+        _assistant_say(f"Done, except: {', '.join(failed)}.", speak=True)
+
+
+def _run_image_generation(prompt: str) -> None:
     script_path = os.path.join(BASE_DIR, "Backend", "ImageGeneration.py")
     if not os.path.exists(script_path):
         _ui_assistant(f"Image generator not found: {script_path}")
         return
 
     try:
+        # Run as a module so it can import Backend.* (shared config). Progress
+        # comes back on the event bus (topic IMAGE) via the bridge.
         p = subprocess.Popen(
-            [sys.executable, script_path],
+            [sys.executable, "-m", "Backend.ImageGeneration", prompt],
             cwd=BASE_DIR,          # important on Windows
             shell=False,
         )
@@ -368,6 +503,29 @@ def _run_image_generation(prompt: str) -> None:
         print("IMAGE ERROR:", repr(e))
 
 
+def _answer_speculatively(speculation, decision: List[str]) -> bool:
+    """Answer with the chatbot call started alongside the decision model, if it fits."""
+    from Backend.Speculation import get_speculator, is_plain_general
+    speculator = get_speculator()
+    if not is_plain_general(decision):
+        speculator.cancel(speculation)
+        return False
+
+    _ui_status("Thinking ...")
+    ans = speculator.commit(speculation)
+    if ans is None:
+        return False  # answered the usual way
+    try:
+        from Backend.AnswerCache import get_cache
+        from Backend.Chatbot import LogExchange
+        LogExchange(speculation.query, ans)
+        get_cache().put(speculation.query, ans)
+    except Exception as e:
+        print("Chat log not updated:", repr(e))
+    _assistant_say(AnswerModifier(ans), speak=True)
+    return True
+
+
 def _process_query(query: str) -> None:
     """Process a single user query.
 
@@ -389,21 +547,33 @@ def _process_query(query: str) -> None:
     # ------------------------
 
     # Exit shortcuts
-    if q_norm in {"exit", "quit", "bye", "goodbye"}:
+    if q_norm in EXIT_WORDS:
         _assistant_say("Okay, bye!", speak=True)
         os._exit(0)
 
     # Email commands: handle even if the decision model isn't available.
-    if q_norm.startswith("send email") or q_norm.startswith("email "):
+    if is_email_command(q_norm):
         SendEmailFlow(initial_command=query)
         return
 
-    # Image requests like: "supercar image", "car photo", "generate a picture of a tiger"
-    if re.search(r"\b(image|photo|picture|wallpaper)\b", q_norm) and not q_norm.startswith("generate image"):
-        # remove common filler words to form a clean prompt
-        prompt = re.sub(r"\b(show me|give me|generate|create|make|an|a|the|of|please)\b", "", q_norm)
-        prompt = re.sub(r"\b(image|photo|picture|wallpaper)\b", "", prompt).strip()
+    # "search my history for ...", "what did I ask about ... last week"
+    try:
+        from Backend.ChatHistory import answer_history_command
+        history_answer = answer_history_command(query)
+    except Exception as e:
+        history_answer = f"History search error: {e}"
+    if history_answer:
+        _assistant_say(history_answer, speak=True)
+        return
 
+    # Reminders are parsed locally, no need for the decision model.
+    if REMINDER_PREFIXES.match(q_norm):
+        _set_reminder(query)
+        return
+
+    # Image requests like: "supercar image", "car photo", "generate a picture of a tiger"
+    prompt = _image_request_prompt(q_norm)
+    if prompt is not None:
         if prompt:
             _ui_status("Generating image...")
             _assistant_say("Generating the image.", speak=True)
@@ -424,13 +594,8 @@ def _process_query(query: str) -> None:
         return
 
     # If it's a *pure* automation command (open/close/play/etc.) run it directly.
-    if any(q_norm.startswith(p) for p in AUTOMATION_PREFIXES) and (" and " not in q_norm) and ("," not in q_norm):
-        try:
-            from Backend.Automation import Automation
-            asyncio_run(Automation([q_norm]))
-            _assistant_say("Done.", speak=True)
-        except Exception as e:
-            _ui_assistant(f"Automation error: {e}")
+    if is_pure_automation(q_norm):
+        _say_tasks_done([q_norm], _run_automation([q_norm]))
         return
 
     _ui_status("Thinking ...")
@@ -457,9 +622,22 @@ def _process_query(query: str) -> None:
     decision: List[str] = []
     dmm_error: Optional[Exception] = None
 
+    # Start the chatbot answer now; it is used if the decision turns out plain "general".
+    speculation = None
+    if SPECULATIVE_CHAT:
+        try:
+            from Backend.Speculation import get_speculator, worth_speculating
+            if worth_speculating(query):
+                speculation = get_speculator().start(query)
+        except Exception as e:
+            print("Speculative chat unavailable:", repr(e))
+
     try:
-        from Backend.Model import FirstLayerDMM
-        decision = FirstLayerDMM(query)
+        from Backend.EarlyRouting import take_decision
+        decision = take_decision(query)  # started while the user was finishing the sentence
+        if decision is None:
+            from Backend.Model import FirstLayerDMM
+            decision = FirstLayerDMM(query)
         if not isinstance(decision, list):
             decision = []
     except Exception as e:
@@ -472,6 +650,10 @@ def _process_query(query: str) -> None:
     print("decision:", decision)
     print("=== /DEBUG ===\n")
 
+    if speculation is not None:
+        if _answer_speculatively(speculation, fallback_decision(q_norm) if dmm_error is not None else decision):
+            return
+
     # ------------------------
     # If DMM is missing, do a lightweight heuristic routing
     # ------------------------
@@ -484,14 +666,18 @@ def _process_query(query: str) -> None:
         general_parts: List[str] = []
 
         for p in parts:
-            if p in {"exit", "quit", "bye", "goodbye"}:
+            if p in EXIT_WORDS:
                 _assistant_say("Okay, bye!", speak=True)
                 os._exit(0)
 
-            if p.startswith("send email") or p.startswith("email "):
+            if is_email_command(p):
                 SendEmailFlow(initial_command=p)
                 continue
 
+            if REMINDER_PREFIXES.match(p):
+                _set_reminder(p)
+                continue
+
             if p.startswith("generate image"):
                 prompt = p.removeprefix("generate image").strip().strip(".")
                 if prompt:
@@ -506,12 +692,7 @@ def _process_query(query: str) -> None:
 
             general_parts.append(p)
 
-        if automation_tasks:
-            try:
-                from Backend.Automation import Automation
-                asyncio_run(Automation(automation_tasks))
-            except Exception as e:
-                _ui_assistant(f"Automation error: {e}")
+        automation_failed = _run_automation(automation_tasks) if automation_tasks else []
 
         if general_parts:
             # Use chatbot on the remaining part
@@ -526,7 +707,7 @@ def _process_query(query: str) -> None:
         else:
             # If we only executed tasks, we're done.
             if automation_tasks:
-                _assistant_say("Done.", speak=True)
+                _say_tasks_done(automation_tasks, automation_failed)
 
         # (Optional) show why the decision model is unavailable
         _ui_assistant(f"(Decision model unavailable; using fallback routing. {dmm_error})")
@@ -542,25 +723,26 @@ def _process_query(query: str) -> None:
         for t in email_tasks:
             SendEmailFlow(initial_command=t)
 
-    # Trigger image generation tasks
-    did_generate_image = False
-    for t in decision:
-        if t.startswith("generate image"):
-            prompt = t.removeprefix("generate image").strip().strip(".")
-            if prompt:
-                _ui_status("Generating image...")
-                _assistant_say("Generating the image.", speak=True)
-                _run_image_generation(prompt)
-                did_generate_image = True
+    reminder_tasks = [t for t in decision if t.startswith("reminder")]
+    for t in reminder_tasks:
+        _set_reminder(t)
+
+    # Trigger image generation tasks (one batch for all prompts)
+    image_prompts = [
+        t.removeprefix("generate image").strip().strip(".")
+        for t in decision
+        if t.startswith("generate image")
+    ]
+    image_prompts = [p for p in image_prompts if p]
+    did_generate_image = bool(image_prompts)
+    if did_generate_image:
+        _ui_status("Generating image...")
+        _assistant_say("Generating the images." if len(image_prompts) > 1 else "Generating the image.", speak=True)
+        _run_image_generation("; ".join(image_prompts))
 
     # Run automation tasks
     automation_tasks = [t for t in decision if any(t.startswith(p) for p in AUTOMATION_PREFIXES)]
-    if automation_tasks:
-        try:
-            from Backend.Automation import Automation
-            asyncio_run(Automation(automation_tasks))
-        except Exception as e:
-            _ui_assistant(f"Automation error: {e}")
+    automation_failed = _run_automation(automation_tasks) if automation_tasks else []
 
     # IMPORTANT: If this was an image-only request, do NOT also produce a chatbot answer.
     # (This prevents responses like "I'm a text-based AI, I can't display images..." after
@@ -575,7 +757,7 @@ def _process_query(query: str) -> None:
         if not wants_text_too:
             # If we only did tasks (image/automation/email), we're done.
             if automation_tasks or email_tasks:
-                _assistant_say("Done.", speak=True)
+                _say_tasks_done(automation_tasks + email_tasks, automation_failed)
             return
 
     # Answering logic (general / realtime)
@@ -607,10 +789,19 @@ def _process_query(query: str) -> None:
     for t in decision:
         if t.startswith("general"):
             try:
-                from Backend.Chatbot import ChatBot
+                from Backend.Chatbot import ChatBot, LogExchange
+                from Backend.AnswerCache import get_cache
                 q_final = t.removeprefix("general").strip() or query
                 _ui_status("Thinking ...")
-                ans = ChatBot(q_final)
+                # Time-insensitive general questions are answered from the cache when possible.
+                cache = get_cache()
+                ans = cache.get(q_final)
+                if ans is None:
+                    ans = ChatBot(q_final)
+                    if not ans.startswith("An error occurred"):
+                        cache.put(q_final, ans)
+                else:
+                    LogExchange(q_final, ans)
                 ans = AnswerModifier(ans)
                 _assistant_say(ans, speak=True)
                 return
@@ -632,8 +823,8 @@ def _process_query(query: str) -> None:
 
     # If we got here, there wasn't a conversational answer task.
     if automation_tasks or email_tasks:
-        _assistant_say("Done.", speak=True)
-    else:
+        _say_tasks_done(automation_tasks + email_tasks, automation_failed)
+    elif not reminder_tasks:
         # Last-resort fallback
         try:
             from Backend.Chatbot import ChatBot
@@ -653,6 +844,8 @@ def init() -> bool:
     """Called once from the web UI when it is ready."""
     _ensure_dirs_and_files()
     _seed_default_chat_if_empty()
+    _start_background_services()
+    _index_chat_history()
 
     # Smooth startup animations (safe even if any are missing)
     _eel_safe("hideLoader")
@@ -664,22 +857,37 @@ def init() -> bool:
     _eel_safe("hideStart")
     sleep(0.5)
 
-    # Load previous chat
-    history = _load_chatlog()[-50:]
-    for item in history:
-        role = (item.get("role") or "").lower()
-        content = str(item.get("content") or "")
-        if not content.strip():
-            continue
-        if role == "user":
-            _ui_user(content)
-        else:
-            _ui_assistant(content)
+    # Load previous chat in one round trip; the UI renders the newest page
+    # and pages older messages in on scroll.
+    _ui_history(_load_chatlog()[-CHAT_HISTORY_LIMIT:])
 
     _ui_idle()
     return True
 
 
+def _index_chat_history() -> None:
+    """Catch the search index up with turns logged while it wasn't running."""
+    try:
+        from Backend.ChatHistory import index_new_turns
+        index_new_turns(_load_chatlog())
+    except Exception as e:
+        print("Chat history index unavailable:", repr(e))
+
+
+@eel.expose
+def search_history(text: str, limit: int = 20) -> list:
+    """Ranked full-text search over past turns, for the UI."""
+    try:
+        from Backend.ChatHistory import search_history as _search
+        return [
+            {"role": h.role, "content": h.content, "snippet": h.snippet, "ts": h.ts}
+            for h in _search(text or "", limit=limit)
+        ]
+    except Exception as e:
+        print("History search error:", repr(e))
+        return []
+
+
 @eel.expose
 def play_assistant_sound() -> bool:
     """Optional click sound when the mic button is pressed."""
@@ -708,6 +916,8 @@ def takeAllCommands(message: Optional[str] = None) -> bool:
     - If `message` is empty/None -> use voice input
     - Otherwise -> treat `message` as a typed command
     """
+    global _busy
+    _busy += 1
     try:
         msg = (message or "").strip()
 
@@ -732,6 +942,7 @@ def takeAllCommands(message: Optional[str] = None) -> bool:
         _ui_assistant("Sorry, something went wrong. Check the console for details.")
         traceback.print_exc()
     finally:
+        _busy -= 1
         _ui_idle()
 
     return True